@@ -0,0 +1,277 @@
+"""
+Price alert engine
+Active alerts are indexed per ticker by sorted threshold, so each refresh
+only checks tickers whose price changed. Alerts can be kept in SQLite so
+every worker process sees the same set.
+"""
+
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from metrics import record_error
+from snapshot import MarketSnapshot
+from upstream import UpstreamClient
+
+
+class QueueNotifier:
+    """Keeps recently triggered alerts in memory for polling clients"""
+
+    def __init__(self, maxlen: int = 1000):
+        self.events: deque = deque(maxlen=maxlen)
+
+    def notify(self, event: dict):
+        self.events.append(event)
+
+    def recent(self, limit: int = 50) -> List[dict]:
+        return list(self.events)[-limit:][::-1]
+
+
+class WebhookNotifier:
+    """POSTs each triggered alert as JSON to a webhook URL"""
+
+    def __init__(self, url: str, client: UpstreamClient):
+        self.url = url
+        self.client = client
+        self._pending = set()
+
+    def notify(self, event: dict):
+        task = asyncio.create_task(self._send(event))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _send(self, event: dict):
+        try:
+            await self.client.post(self.url, json=event)
+        except Exception:
+            record_error("alert_webhook", "Alert webhook to %s failed", self.url)
+
+
+class AlertEngine:
+    """Alerts by stable id, plus per-ticker threshold lists for evaluation.
+
+    `above` alerts fire once the YES price reaches the target from below,
+    `below` alerts once it falls to the target. Each list is sorted by
+    target, so a price update finds every triggered alert with one bisect.
+    Triggered alerts are deactivated and handed to each notifier.
+
+    With `db_path`, alerts are also stored in SQLite and reloaded whenever
+    another process changed them. Triggering is a guarded UPDATE, so when
+    several workers see the same crossing only one of them notifies. The
+    statements run on one writer thread, never on the event loop, since
+    another process holding the write lock can stall them for seconds;
+    `_lock` keeps the in-memory index consistent across those awaits.
+    """
+
+    def __init__(self, notifiers: Iterable = (), db_path: str = ""):
+        self.notifiers = list(notifiers)
+        self.db_path = db_path
+        self._db: Optional[sqlite3.Connection] = None
+        self._writer: Optional[ThreadPoolExecutor] = None
+        self._lock = asyncio.Lock()
+        self._pending = set()
+        self._data_version: Optional[int] = None
+        self.alerts: Dict[str, dict] = {}
+        self._above: Dict[str, List[Tuple[float, str]]] = {}
+        self._below: Dict[str, List[Tuple[float, str]]] = {}
+
+    def open(self):
+        """Open the SQLite store (if configured) and load its alerts"""
+        if not self.db_path or self._db is not None:
+            return
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS alerts (id TEXT PRIMARY KEY, active INTEGER NOT NULL, data TEXT NOT NULL)"
+        )
+        self._reload(self._changes(None))
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alerts-db")
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    async def _run(self, fn, *args):
+        """Run a database call on the writer thread"""
+        return await asyncio.get_running_loop().run_in_executor(self._writer, fn, *args)
+
+    def _changes(self, known: Optional[int]) -> Optional[Tuple[int, List[dict]]]:
+        """Every alert, or None if no other connection wrote since `known`"""
+        version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        if version == known:
+            return None
+        return version, [json.loads(data) for (data,) in self._db.execute("SELECT data FROM alerts")]
+
+    def _reload(self, changes: Optional[Tuple[int, List[dict]]]):
+        if changes is None:
+            return
+        self._data_version, alerts = changes
+        self.alerts = {}
+        self._above = {}
+        self._below = {}
+        for alert in alerts:
+            self.alerts[alert["id"]] = alert
+            if alert.get("active", True):
+                self._index(alert)
+
+    async def sync(self):
+        """Reload every alert if another connection has written since the last check"""
+        if self._db is None:
+            return
+        self._reload(await self._run(self._changes, self._data_version))
+
+    async def list(self) -> List[dict]:
+        async with self._lock:
+            await self.sync()
+            return list(self.alerts.values())
+
+    async def triggered(self, limit: int = 50) -> List[dict]:
+        """Triggered alerts, newest first"""
+        async with self._lock:
+            await self.sync()
+            fired = [a for a in self.alerts.values() if a.get("triggered_at")]
+        fired.sort(key=lambda a: a["triggered_at"], reverse=True)
+        return fired[:limit]
+
+    async def add(self, alert: dict) -> dict:
+        alert = {**alert, "id": uuid.uuid4().hex[:12], "created_at": time.time()}
+        async with self._lock:
+            await self.sync()
+            if self._db is not None:
+                await self._run(self._insert, alert)
+            self.alerts[alert["id"]] = alert
+            if alert.get("active", True):
+                self._index(alert)
+        return alert
+
+    async def remove(self, alert_id: str) -> bool:
+        async with self._lock:
+            await self.sync()
+            alert = self.alerts.pop(alert_id, None)
+            if alert is None:
+                return False
+            if self._db is not None:
+                await self._run(self._delete, alert_id)
+            self._unindex(alert)
+        return True
+
+    def _insert(self, alert: dict):
+        self._db.execute(
+            "INSERT INTO alerts (id, active, data) VALUES (?, ?, ?)",
+            (alert["id"], int(alert.get("active", True)), json.dumps(alert)),
+        )
+
+    def _delete(self, alert_id: str):
+        self._db.execute("DELETE FROM alerts WHERE id = ?", (alert_id,))
+
+    def _claim(self, alerts: List[dict]) -> List[dict]:
+        """Record the triggers; drops alerts another process fired first"""
+        claimed = []
+        for alert in alerts:
+            cursor = self._db.execute(
+                "UPDATE alerts SET active = 0, data = ? WHERE id = ? AND active = 1",
+                (json.dumps(alert), alert["id"]),
+            )
+            if cursor.rowcount == 1:
+                claimed.append(alert)
+        return claimed
+
+    def _thresholds(self, alert: dict) -> Optional[Dict[str, List[Tuple[float, str]]]]:
+        return {"above": self._above, "below": self._below}.get(alert["condition"])
+
+    def _index(self, alert: dict):
+        thresholds = self._thresholds(alert)
+        if thresholds is not None:
+            insort(thresholds.setdefault(alert["ticker"], []), (alert["target_price"], alert["id"]))
+
+    def _unindex(self, alert: dict):
+        thresholds = self._thresholds(alert)
+        entries = thresholds.get(alert["ticker"]) if thresholds is not None else None
+        if not entries:
+            return
+        entry = (alert["target_price"], alert["id"])
+        i = bisect_left(entries, entry)
+        if i < len(entries) and entries[i] == entry:
+            del entries[i]
+        if not entries:
+            del thresholds[alert["ticker"]]
+
+    def evaluate(self, ticker: str, price: float) -> List[dict]:
+        """Deactivate every active alert on the ticker that the price has crossed"""
+        fired: List[str] = []
+        above = self._above.get(ticker)
+        if above:
+            i = bisect_right(above, (price, "\uffff"))
+            fired.extend(alert_id for _, alert_id in above[:i])
+            del above[:i]
+            if not above:
+                del self._above[ticker]
+        below = self._below.get(ticker)
+        if below:
+            i = bisect_left(below, (price, ""))
+            fired.extend(alert_id for _, alert_id in below[i:])
+            del below[i:]
+            if not below:
+                del self._below[ticker]
+
+        triggered = []
+        for alert_id in fired:
+            alert = self.alerts[alert_id]
+            alert.update(active=False, triggered_at=time.time(), trigger_price=price)
+            triggered.append(alert)
+        return triggered
+
+    def _crossed(self, snapshot: MarketSnapshot) -> List[dict]:
+        if not (self._above or self._below):
+            return []
+        delta = snapshot.delta
+        store = snapshot.store
+        crossed = []
+        for rows in (delta.changed, delta.added):
+            for i in rows:
+                ticker = store.tickers[i]
+                if ticker in self._above or ticker in self._below:
+                    crossed.extend(self.evaluate(ticker, float(store.yes_price[i])))
+        return crossed
+
+    def _notify(self, alerts: List[dict]):
+        for alert in alerts:
+            for notifier in self.notifiers:
+                notifier.notify(dict(alert))
+
+    def on_refresh(self, snapshot: MarketSnapshot) -> Optional[asyncio.Task]:
+        """Check only tickers that were added or changed in this refresh.
+
+        Without a database this notifies right away. With one, the reload
+        and claims need the database, so the check runs as a task, which
+        is returned.
+        """
+        if self._db is None:
+            self._notify(self._crossed(snapshot))
+            return None
+        task = asyncio.create_task(self._check(snapshot))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        return task
+
+    async def _check(self, snapshot: MarketSnapshot) -> List[dict]:
+        try:
+            async with self._lock:
+                await self.sync()
+                crossed = self._crossed(snapshot)
+                triggered = await self._run(self._claim, crossed) if crossed else []
+        except Exception:
+            record_error("alerts_db", "Error checking alerts against snapshot %r", snapshot.key)
+            return []
+        self._notify(triggered)
+        return triggered
@@ -0,0 +1,145 @@
+"""
+AI analysis cache
+Per-ticker cache of LLM analyses with TTL and price-move invalidation,
+single-flighted LLM calls and optional SQLite persistence.
+"""
+
+import asyncio
+import json
+import sqlite3
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from metrics import cache_events
+
+
+class CachedAnalysis:
+    __slots__ = ("price", "created_at", "result")
+
+    def __init__(self, price: float, created_at: float, result: dict):
+        self.price = price
+        self.created_at = created_at
+        self.result = result
+
+
+class AnalysisCache:
+    """Analyses keyed by ticker.
+
+    An entry is served while it is younger than `ttl` seconds and the market
+    price has moved by no more than `price_threshold` since it was made.
+    Concurrent requests for the same ticker share one in-flight computation.
+    With `db_path`, entries are written to SQLite and reloaded on startup.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 900.0,
+        price_threshold: float = 0.03,
+        db_path: str = "",
+        max_entries: int = 10000,
+    ):
+        self.ttl = ttl
+        self.price_threshold = price_threshold
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._entries: Dict[str, CachedAnalysis] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "invalidated": 0}
+
+    def open(self):
+        """Open the SQLite file (if configured) and load unexpired entries"""
+        if not self.db_path or self._db is not None:
+            return
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS analyses ("
+            "ticker TEXT PRIMARY KEY, price REAL, created_at REAL, result TEXT)"
+        )
+        cutoff = time.time() - self.ttl
+        self._db.execute("DELETE FROM analyses WHERE created_at < ?", (cutoff,))
+        self._db.commit()
+        for ticker, price, created_at, result in self._db.execute(
+            "SELECT ticker, price, created_at, result FROM analyses"
+        ):
+            self._entries[ticker] = CachedAnalysis(price, created_at, json.loads(result))
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def get(self, ticker: str, price: float) -> Optional[dict]:
+        """Cached analysis if it is still fresh for the current price"""
+        entry = self._entries.get(ticker)
+        if entry is None:
+            return None
+        if time.time() - entry.created_at >= self.ttl or abs(price - entry.price) > self.price_threshold:
+            self.stats["invalidated"] += 1
+            del self._entries[ticker]
+            return None
+        return entry.result
+
+    def peek(self, ticker: str) -> Optional[dict]:
+        """Latest cached analysis regardless of price, if unexpired"""
+        entry = self._entries.get(ticker)
+        if entry is None or time.time() - entry.created_at >= self.ttl:
+            return None
+        return entry.result
+
+    async def put(self, ticker: str, price: float, result: dict):
+        entry = CachedAnalysis(price, time.time(), result)
+        self._entries[ticker] = entry
+        if len(self._entries) > self.max_entries:
+            self._evict()
+        if self._db is not None:
+            await asyncio.to_thread(self._write, ticker, entry)
+
+    def _write(self, ticker: str, entry: CachedAnalysis):
+        self._db.execute(
+            "INSERT OR REPLACE INTO analyses (ticker, price, created_at, result) VALUES (?, ?, ?, ?)",
+            (ticker, entry.price, entry.created_at, json.dumps(entry.result)),
+        )
+        self._db.commit()
+
+    def _evict(self):
+        # Drop the oldest half once the cache outgrows its bound
+        by_age = sorted(self._entries, key=lambda t: self._entries[t].created_at)
+        for ticker in by_age[: len(by_age) // 2]:
+            del self._entries[ticker]
+
+    async def get_or_compute(
+        self,
+        ticker: str,
+        price: float,
+        compute: Callable[[], Awaitable[Tuple[dict, bool]]],
+    ) -> dict:
+        """Return a cached analysis or run `compute` once for all concurrent callers.
+
+        `compute` returns the analysis and whether it is worth caching.
+        """
+        cached = self.get(ticker, price)
+        if cached is not None:
+            self.stats["hits"] += 1
+            cache_events.inc(cache="analysis", result="hit")
+            return cached
+
+        task = self._inflight.get(ticker)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            cache_events.inc(cache="analysis", result="coalesced")
+        else:
+            self.stats["misses"] += 1
+            cache_events.inc(cache="analysis", result="miss")
+            task = asyncio.create_task(self._compute(ticker, price, compute))
+            self._inflight[ticker] = task
+        return await asyncio.shield(task)
+
+    async def _compute(self, ticker, price, compute) -> dict:
+        try:
+            result, cacheable = await compute()
+            if cacheable:
+                await self.put(ticker, price, result)
+            return result
+        finally:
+            self._inflight.pop(ticker, None)
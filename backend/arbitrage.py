@@ -0,0 +1,266 @@
+"""
+Arbitrage scanner
+Groups markets by Kalshi event and prices multi-outcome baskets after fees,
+re-pricing only the events whose markets changed in each refresh.
+"""
+
+import heapq
+import itertools
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from fees import kalshi_fee
+from snapshot import MarketSnapshot
+
+
+class RankedHeap:
+    """Items kept in score order under frequent updates.
+
+    Updating or removing a key leaves its old heap entry behind; entries
+    whose sequence number no longer matches the live one are skipped when
+    read and dropped when the heap is compacted.
+    """
+
+    def __init__(self):
+        self._heap: List[tuple] = []
+        self._live: Dict[str, tuple] = {}
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def set(self, key: str, score: float, item: dict):
+        seq = next(self._seq)
+        self._live[key] = (seq, item)
+        heapq.heappush(self._heap, (-score, seq, key))
+        self._compact()
+
+    def discard(self, key: str):
+        if self._live.pop(key, None) is not None:
+            self._compact()
+
+    def top(self, n: int) -> List[dict]:
+        """Best `n` live items, highest score first"""
+        items, kept = [], []
+        while self._heap and len(items) < n:
+            entry = heapq.heappop(self._heap)
+            live = self._live.get(entry[2])
+            if live is None or live[0] != entry[1]:
+                continue
+            kept.append(entry)
+            items.append(live[1])
+        for entry in kept:
+            heapq.heappush(self._heap, entry)
+        return items
+
+    def _compact(self):
+        if len(self._heap) > 2 * len(self._live) + 64:
+            live = {key: seq for key, (seq, _) in self._live.items()}
+            self._heap = [e for e in self._heap if live.get(e[2]) == e[1]]
+            heapq.heapify(self._heap)
+
+
+class ArbitrageScanner:
+    """Incremental arbitrage search over the full-market snapshot.
+
+    Per market: buying YES and NO together for less than $1 after fees,
+    and wide bid/ask spreads. Per event whose outcomes are mutually
+    exclusive (as flagged by Kalshi): buying every NO pays at least n - 1,
+    and buying every YES pays 1 provided one listed outcome resolves YES.
+    Profits are for `contracts` contracts per leg, net of taker fees.
+    A side without a real ask (`yes_quoted`/`no_quoted` false) cannot be
+    bought, so no market or basket that needs it is reported.
+
+    `depth(ticker, side, price)` may report the contracts offered at a
+    leg's price; without it depth is None.
+    """
+
+    def __init__(
+        self,
+        contracts: int = 100,
+        min_profit: float = 0.0,
+        wide_spread: float = 0.05,
+        depth: Optional[Callable[[str, str, float], Optional[int]]] = None,
+    ):
+        self.contracts = contracts
+        self.min_profit = min_profit
+        self.wide_spread = wide_spread
+        self.depth = depth
+        self.exclusive: Dict[str, bool] = {}
+        self.events: Dict[str, Set[str]] = {}
+        self.event_of: Dict[str, str] = {}
+        self.opportunities = RankedHeap()
+        self.spreads = RankedHeap()
+        self.store = None
+
+    def top(self, limit: int = 20) -> List[dict]:
+        """Fee-adjusted arbitrage first, then the widest spreads"""
+        return (self.opportunities.top(limit) + self.spreads.top(limit))[:limit]
+
+    def set_exclusive(self, flags: Dict[str, bool]):
+        """Update event exclusivity flags and re-price events that changed"""
+        changed = [event for event, flag in flags.items() if self.exclusive.get(event) != flag]
+        self.exclusive.update(flags)
+        self.rescan(e for e in changed if e in self.events)
+
+    def on_refresh(self, snapshot: MarketSnapshot):
+        if snapshot.key != "":
+            return
+        self.store = store = snapshot.store
+        delta = snapshot.delta
+        dirty: Set[str] = set()
+
+        for ticker in delta.removed:
+            self.opportunities.discard(f"market:{ticker}")
+            self.spreads.discard(ticker)
+            dirty.add(self._ungroup(ticker))
+
+        for rows in (delta.added, delta.changed):
+            for i in rows:
+                m = store.records[i]
+                self._scan_market(m)
+                event = m.get("event_ticker")
+                if self.event_of.get(m["ticker"]) != event:
+                    dirty.add(self._ungroup(m["ticker"]))
+                    if event:
+                        self.events.setdefault(event, set()).add(m["ticker"])
+                        self.event_of[m["ticker"]] = event
+                dirty.add(event)
+
+        dirty.discard(None)
+        dirty.discard("")
+        self.rescan(dirty)
+
+    def reprice(self, tickers: Iterable[str]):
+        """Re-price markets (and their events) whose depth changed"""
+        if self.store is None:
+            return
+        events = set()
+        for ticker in tickers:
+            m = self.store.get(ticker)
+            if m is not None:
+                self._scan_market(m)
+                events.add(self.event_of.get(ticker))
+        events.discard(None)
+        self.rescan(events)
+
+    def rescan(self, events: Iterable[str]):
+        """Re-price the given events against the latest snapshot"""
+        if self.store is None:
+            return
+        for event in events:
+            self._scan_event(event)
+
+    def _ungroup(self, ticker: str) -> Optional[str]:
+        event = self.event_of.pop(ticker, None)
+        members = self.events.get(event)
+        if members is not None:
+            members.discard(ticker)
+            if not members:
+                del self.events[event]
+        return event
+
+    @staticmethod
+    def _quoted(m: dict, side: str) -> bool:
+        # Markets recorded before the flags existed count as quoted
+        return m.get("yes_quoted" if side == "YES" else "no_quoted", True)
+
+    def _leg(self, m: dict, side: str) -> dict:
+        price = m["yes_price"] if side == "YES" else m["no_price"]
+        return {
+            "ticker": m["ticker"],
+            "title": m["title"],
+            "side": side,
+            "price": price,
+            "fee": kalshi_fee(price, self.contracts),
+            "depth": self.depth(m["ticker"], side, price) if self.depth else None,
+        }
+
+    def _priced(self, legs: List[dict], payout: float) -> dict:
+        """Cost, fees and fee-adjusted profit of buying every leg"""
+        cost = sum(leg["price"] for leg in legs) * self.contracts
+        fees = sum(leg["fee"] for leg in legs)
+        profit = payout * self.contracts - cost - fees
+        depths = [leg["depth"] for leg in legs]
+        return {
+            "legs": legs,
+            "contracts": self.contracts,
+            "cost": round(cost, 2),
+            "fees": round(fees, 2),
+            "fee_adjusted_profit": round(profit, 2),
+            "profit_potential": f"{profit / (cost + fees) * 100:.1f}%" if cost + fees else "0.0%",
+            "max_contracts": None if None in depths else min(depths, default=None),
+        }
+
+    def _basket(self, markets: List[dict], side: str, payout: float) -> Optional[dict]:
+        """One leg per market on `side`, or None if any market has no ask there"""
+        if not all(self._quoted(m, side) for m in markets):
+            return None
+        return self._priced([self._leg(m, side) for m in markets], payout)
+
+    def _scan_market(self, m: dict):
+        ticker = m["ticker"]
+        yes_price, no_price = m["yes_price"], m["no_price"]
+        if not (self._quoted(m, "YES") and self._quoted(m, "NO")):
+            # The placeholder price of a missing side would fake both checks
+            self.opportunities.discard(f"market:{ticker}")
+            self.spreads.discard(ticker)
+            return
+
+        legs = [self._leg(m, "YES"), self._leg(m, "NO")]
+        priced = self._priced(legs, 1)
+        if priced["fee_adjusted_profit"] > self.min_profit:
+            self.opportunities.set(f"market:{ticker}", priced["fee_adjusted_profit"], {
+                **m,
+                **priced,
+                "type": "underpriced",
+                "strategy": f"Buy YES at {yes_price:.0%} + NO at {no_price:.0%} = guaranteed profit",
+            })
+        else:
+            self.opportunities.discard(f"market:{ticker}")
+
+        spread = m["spread"]
+        if spread > self.wide_spread:
+            self.spreads.set(ticker, spread, {
+                **m,
+                "type": "wide_spread",
+                "spread": f"{spread*100:.1f}%",
+                "strategy": "Wide spread indicates potential mispricing",
+            })
+        else:
+            self.spreads.discard(ticker)
+
+    def _scan_event(self, event: str):
+        members = self.events.get(event, ())
+        yes_key, no_key = f"event:{event}:yes", f"event:{event}:no"
+        if len(members) < 2 or not self.exclusive.get(event):
+            self.opportunities.discard(yes_key)
+            self.opportunities.discard(no_key)
+            return
+
+        markets = [self.store.get(t) for t in sorted(members)]
+        n = len(markets)
+
+        # A basket is only riskless with every leg bought, so one missing ask voids it
+        yes = self._basket(markets, "YES", 1)
+        if yes is not None and yes["fee_adjusted_profit"] > self.min_profit:
+            self.opportunities.set(yes_key, yes["fee_adjusted_profit"], {
+                "event_ticker": event,
+                "title": f"{event} ({n} outcomes)",
+                **yes,
+                "type": "event_yes_underpriced",
+                "strategy": f"Buy YES on all {n} outcomes: pays $1 per set if one of them resolves YES",
+            })
+        else:
+            self.opportunities.discard(yes_key)
+
+        no = self._basket(markets, "NO", n - 1)
+        if no is not None and no["fee_adjusted_profit"] > self.min_profit:
+            self.opportunities.set(no_key, no["fee_adjusted_profit"], {
+                "event_ticker": event,
+                "title": f"{event} ({n} outcomes)",
+                **no,
+                "type": "event_no_dutch_book",
+                "strategy": f"Buy NO on all {n} outcomes: at most one resolves YES, so at least ${n - 1} per set",
+            })
+        else:
+            self.opportunities.discard(no_key)
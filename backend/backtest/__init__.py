@@ -0,0 +1,4 @@
+"""
+Backtesting: record full-market snapshots from the live app, then replay
+them with settlements through the suggestion and AI-edge strategies.
+"""
@@ -0,0 +1,145 @@
+"""
+Replay inputs
+Recorded snapshot frames (gzip NDJSON from the recorder, or Parquet) and
+market settlements, read from local files.
+"""
+
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import Dict, Iterator, List, Tuple
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+FRAME_FILE = re.compile(r"^snapshots-(\d{4}-\d{2}-\d{2})\.(ndjson\.gz|ndjson|parquet)$")
+
+
+def frame_files(directory: str, start: date, end: date) -> List[Tuple[date, str]]:
+    """Recorded files for each day in [start, end], oldest first"""
+    files = []
+    for name in os.listdir(directory):
+        match = FRAME_FILE.match(name)
+        if match is None:
+            continue
+        day = date.fromisoformat(match.group(1))
+        if start <= day <= end:
+            files.append((day, os.path.join(directory, name)))
+    files.sort()
+    return files
+
+
+def _open(path: str):
+    return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+
+def iter_frames(path: str) -> Iterator[dict]:
+    """Frames of one recorded file in time order"""
+    if path.endswith(".parquet"):
+        yield from _parquet_frames(path)
+        return
+    with _open(path) as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+def _parquet_frames(path: str) -> Iterator[dict]:
+    """One frame per distinct `ts`; every row upserts one market.
+
+    Parquet files carry no removals, and the first frame is a keyframe.
+    """
+    if pq is None:
+        raise RuntimeError(f"pyarrow is required to replay {path}")
+    columns = pq.read_table(path).sort_by("ts").to_pydict()
+    stamps = columns.pop("ts")
+    names = list(columns)
+    i, n = 0, len(stamps)
+    while i < n:
+        j = i
+        while j < n and stamps[j] == stamps[i]:
+            j += 1
+        markets = [{k: columns[k][r] for k in names if columns[k][r] is not None} for r in range(i, j)]
+        yield {"ts": stamps[i], "keyframe": i == 0, "markets": markets, "removed": []}
+        i = j
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def load_settlements(path: str) -> Dict[str, Tuple[str, float]]:
+    """Ticker -> (result, settled_at) from NDJSON (optionally gzipped) or Parquet.
+
+    Each record has `ticker`, `result` ("yes"/"no") and `settled_at` as
+    epoch seconds or an ISO timestamp. Other results (voided markets) are
+    skipped.
+    """
+    if path.endswith(".parquet"):
+        if pq is None:
+            raise RuntimeError(f"pyarrow is required to read {path}")
+        rows = pq.read_table(path).to_pylist()
+    else:
+        with _open(path) as f:
+            rows = [loads(line) for line in f if line.strip()]
+    settlements = {}
+    for row in rows:
+        result = str(row.get("result", "")).lower()
+        if result in ("yes", "no") and row.get("settled_at") is not None:
+            settlements[row["ticker"]] = (result, _timestamp(row["settled_at"]))
+    return settlements
+
+
+class ReplayState:
+    """Latest market dicts while replaying frames.
+
+    Exposes `get` and `records` like a MarketStore, which is all the
+    suggestion views need.
+    """
+
+    def __init__(self):
+        self.markets: Dict[str, dict] = {}
+
+    def __len__(self) -> int:
+        return len(self.markets)
+
+    @property
+    def records(self) -> List[dict]:
+        return list(self.markets.values())
+
+    def get(self, ticker: str):
+        return self.markets.get(ticker)
+
+    def apply(self, frame: dict) -> Tuple[List[dict], List[str]]:
+        """Merge a frame; returns the markets it touched and the tickers it removed"""
+        removed = list(frame.get("removed") or ())
+        if frame.get("keyframe"):
+            listed = {m["ticker"] for m in frame["markets"]}
+            removed.extend(t for t in self.markets if t not in listed)
+            self.markets = {t: m for t, m in self.markets.items() if t in listed}
+        for ticker in removed:
+            self.markets.pop(ticker, None)
+        changed = []
+        for entry in frame["markets"]:
+            market = self.markets.get(entry["ticker"])
+            if market is None:
+                market = self.markets[entry["ticker"]] = dict(entry)
+            else:
+                market.update(entry)
+            changed.append(market)
+        return changed, removed
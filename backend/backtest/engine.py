@@ -0,0 +1,130 @@
+"""
+Paper account simulation
+Buys contracts at recorded prices with Kalshi taker fees and settles them
+against recorded results.
+"""
+
+import heapq
+from typing import Dict, List, Optional, Set, Tuple
+
+from fees import kalshi_fee
+
+
+class Simulator:
+    """Cash and held-to-settlement positions for one strategy.
+
+    A position is opened at most once per ticker. Contracts are sized down
+    to what the cash covers, fee included. Settled winners pay $1 per
+    contract, and the proceeds can be spent on later trades.
+    """
+
+    def __init__(self, name: str, bankroll: float, settlements: Dict[str, Tuple[str, float]]):
+        self.name = name
+        self.bankroll = bankroll
+        self.cash = bankroll
+        self.settlements = settlements
+        # ticker -> {"side", "contracts", "price", "cost", "fees", "opened_at"}
+        self.positions: Dict[str, dict] = {}
+        self._due: List[Tuple[float, str]] = []
+        self._skipped: Set[str] = set()
+        self.stats = {
+            "trades": 0,
+            "contracts": 0,
+            "cost": 0.0,
+            "fees": 0.0,
+            "payout": 0.0,
+            "settled": 0,
+            "wins": 0,
+            "skipped_settled": 0,
+        }
+
+    def holds(self, ticker: str) -> bool:
+        return ticker in self.positions
+
+    def buy(self, ts: float, ticker: str, side: str, price: float, contracts: int) -> bool:
+        if ticker in self.positions or contracts <= 0 or not 0 < price < 1:
+            return False
+        settlement = self.settlements.get(ticker)
+        if settlement is not None and settlement[1] <= ts:
+            # Recorded after it settled; no fill was possible
+            if ticker not in self._skipped:
+                self._skipped.add(ticker)
+                self.stats["skipped_settled"] += 1
+            return False
+        fee = kalshi_fee(price, contracts)
+        if price * contracts + fee > self.cash:
+            contracts = int(self.cash / (price + kalshi_fee(price)))
+            fee = kalshi_fee(price, contracts)
+            while contracts > 0 and price * contracts + fee > self.cash:
+                contracts -= 1
+                fee = kalshi_fee(price, contracts)
+            if contracts <= 0:
+                return False
+        cost = price * contracts
+        self.cash -= cost + fee
+        self.positions[ticker] = {
+            "side": side,
+            "contracts": contracts,
+            "price": price,
+            "cost": cost,
+            "fees": fee,
+            "opened_at": ts,
+        }
+        self.stats["trades"] += 1
+        self.stats["contracts"] += contracts
+        self.stats["cost"] += cost
+        self.stats["fees"] += fee
+        if settlement is not None:
+            heapq.heappush(self._due, (settlement[1], ticker))
+        return True
+
+    def settle_due(self, ts: float):
+        """Settle every held position whose market settled by `ts`"""
+        while self._due and self._due[0][0] <= ts:
+            _, ticker = heapq.heappop(self._due)
+            self._settle(ticker)
+
+    def _settle(self, ticker: str):
+        position = self.positions.get(ticker)
+        if position is None or position.get("result") is not None:
+            return
+        result = self.settlements[ticker][0]
+        payout = float(position["contracts"]) if position["side"] == result else 0.0
+        position["result"] = result
+        position["payout"] = payout
+        self.cash += payout
+        self.stats["payout"] += payout
+        self.stats["settled"] += 1
+        self.stats["wins"] += payout > 0
+
+    def report(self, prices: Optional[Dict[str, dict]] = None) -> dict:
+        """Totals once every known settlement is applied.
+
+        Positions without a settlement are marked at their last recorded
+        price from `prices` (ticker -> market), or at cost without one.
+        """
+        while self._due:
+            self._settle(heapq.heappop(self._due)[1])
+        open_value = 0.0
+        open_positions = 0
+        for ticker, position in self.positions.items():
+            if position.get("result") is not None:
+                continue
+            open_positions += 1
+            market = (prices or {}).get(ticker)
+            if market is None:
+                open_value += position["cost"]
+            else:
+                open_value += position["contracts"] * market[f"{position['side']}_price"]
+        stats = self.stats
+        pnl = stats["payout"] + open_value - stats["cost"] - stats["fees"]
+        invested = stats["cost"] + stats["fees"]
+        return {
+            **{k: round(v, 2) if isinstance(v, float) else v for k, v in stats.items()},
+            "open_positions": open_positions,
+            "open_value": round(open_value, 2),
+            "pnl": round(pnl, 2),
+            "roi": round(pnl / invested, 4) if invested else 0.0,
+            "win_rate": round(stats["wins"] / stats["settled"], 4) if stats["settled"] else None,
+            "ending_equity": round(self.bankroll + pnl, 2),
+        }
@@ -0,0 +1,144 @@
+"""
+Snapshot recorder
+Snapshot listener that appends the full-market snapshot to one gzip NDJSON
+file per UTC day, for replay by the backtester.
+"""
+
+import gzip
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+from metrics import record_error
+from snapshot import MarketSnapshot
+from store import MarketStore
+
+try:
+    import orjson
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode()
+
+# Fields written for a market whose price or volume changed
+CHANGED_FIELDS = ("ticker", "yes_price", "no_price", "volume", "spread")
+
+
+def frame_path(directory: str, day: str) -> str:
+    return os.path.join(directory, f"snapshots-{day}.ndjson.gz")
+
+
+class SnapshotRecorder:
+    """Writes a frame at most every `interval` seconds.
+
+    A frame is one JSON line: `{"ts", "keyframe", "markets", "removed"}`.
+    The first frame of each day's file is a keyframe holding every market,
+    so a file replays on its own; later frames hold only markets added or
+    changed since the previous frame and the tickers that disappeared.
+    `probability(ticker)` may supply the cached AI probability, which is
+    written as `ai_probability` whenever it changes. Each frame is its own
+    gzip member, so a file stays readable after a crash. `active()` can
+    switch recording off, e.g. in every worker but the snapshot leader.
+
+    `on_refresh` only reads the cached probabilities on the event loop;
+    diffing, encoding and the gzip write run in order on a writer thread.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        interval: float = 60.0,
+        probability: Optional[Callable[[str], Optional[float]]] = None,
+        active: Optional[Callable[[], bool]] = None,
+    ):
+        self.directory = directory
+        self.interval = interval
+        self.probability = probability
+        self.active = active
+        self.frames = 0
+        self._day: Optional[str] = None
+        self._last = 0.0
+        self._previous: Optional[MarketStore] = None
+        self._probabilities: Dict[str, float] = {}
+        self._writer: Optional[ThreadPoolExecutor] = None
+
+    def on_refresh(self, snapshot: MarketSnapshot):
+        if snapshot.key != "" or not self.directory:
+            return
+        if self.active is not None and not self.active():
+            return
+        now = time.time()
+        if now - self._last < self.interval:
+            return
+        self._last = now
+        store = snapshot.store
+        probabilities = self._lookup(store)
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-recorder")
+        self._writer.submit(self._record, store, now, probabilities)
+
+    def close(self):
+        """Wait for queued frames to be written"""
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+
+    def _lookup(self, store: MarketStore) -> Optional[Dict[str, float]]:
+        if self.probability is None:
+            return None
+        probabilities = {}
+        for ticker in store.tickers:
+            prob = self.probability(ticker)
+            if prob is not None:
+                probabilities[ticker] = prob
+        return probabilities
+
+    def _record(self, store: MarketStore, now: float, probabilities: Optional[Dict[str, float]]):
+        try:
+            self.record(store, now, probabilities)
+        except Exception:
+            record_error("snapshot_recorder", "Error writing snapshot frame to %s", self.directory)
+
+    def record(self, store: MarketStore, now: float, probabilities: Optional[Dict[str, float]] = None):
+        """Append one frame; `probabilities` defaults to asking `probability()`"""
+        day = datetime.fromtimestamp(now, timezone.utc).strftime("%Y-%m-%d")
+        keyframe = day != self._day or self._previous is None
+
+        if keyframe:
+            markets = [dict(m) for m in store.records]
+            removed = []
+        else:
+            delta = store.diff(self._previous)
+            markets = [dict(store.records[i]) for i in delta.added]
+            markets.extend({k: store.records[i][k] for k in CHANGED_FIELDS} for i in delta.changed)
+            removed = delta.removed
+            for ticker in removed:
+                self._probabilities.pop(ticker, None)
+
+        if probabilities is None:
+            probabilities = self._lookup(store)
+        if probabilities:
+            written = {m["ticker"]: m for m in markets}
+            for ticker, prob in probabilities.items():
+                if not keyframe and self._probabilities.get(ticker) == prob:
+                    continue
+                self._probabilities[ticker] = prob
+                entry = written.get(ticker)
+                if entry is None:
+                    entry = written[ticker] = {"ticker": ticker}
+                    markets.append(entry)
+                entry["ai_probability"] = prob
+
+        frame = {"ts": now, "keyframe": keyframe, "markets": markets, "removed": removed}
+        os.makedirs(self.directory, exist_ok=True)
+        with gzip.open(frame_path(self.directory, day), "ab", compresslevel=6) as f:
+            f.write(dumps(frame) + b"\n")
+        self._day = day
+        self._last = now
+        self._previous = store
+        self.frames += 1
@@ -0,0 +1,167 @@
+"""
+Backtest runner
+Splits a date range into chunks, replays each chunk in a process pool and
+streams one NDJSON report line per chunk as it finishes, then a summary.
+
+    cd backend && python -m backtest.run --data recordings --settlements settlements.ndjson.gz \\
+        --start 2026-07-01 --end 2026-09-30 --strategy balanced --strategy edge
+
+Each chunk is an independent cohort starting from the same bankroll, so
+chunks do not wait on each other; positions are held to settlement.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from typing import Dict, Iterator, List
+
+from backtest.data import ReplayState, frame_files, iter_frames, load_settlements
+from backtest.engine import Simulator
+from backtest.strategies import build_strategy
+
+SUM_FIELDS = ("trades", "contracts", "cost", "fees", "payout", "settled", "wins", "open_positions", "open_value", "pnl")
+
+
+def replay_range(job: dict) -> dict:
+    """Replay the recorded days of one chunk through every strategy"""
+    started = time.perf_counter()
+    settlements = load_settlements(job["settlements"]) if job["settlements"] else {}
+    strategies = [build_strategy(spec) for spec in job["strategies"]]
+    sims = {s.name: Simulator(s.name, job["bankroll"], settlements) for s in strategies}
+    state = ReplayState()
+    frames = 0
+    files = frame_files(job["data"], date.fromisoformat(job["start"]), date.fromisoformat(job["end"]))
+    for _, path in files:
+        for frame in iter_frames(path):
+            changed, removed = state.apply(frame)
+            ts = frame["ts"]
+            for strategy in strategies:
+                sim = sims[strategy.name]
+                sim.settle_due(ts)
+                strategy.on_frame(ts, state, changed, removed, sim)
+            frames += 1
+    return {
+        "type": "range",
+        "start": job["start"],
+        "end": job["end"],
+        "files": len(files),
+        "frames": frames,
+        "markets": len(state),
+        "seconds": round(time.perf_counter() - started, 3),
+        "strategies": {name: sim.report(state.markets) for name, sim in sims.items()},
+    }
+
+
+def date_ranges(start: date, end: date, days: int) -> Iterator[tuple]:
+    while start <= end:
+        stop = min(start + timedelta(days=days - 1), end)
+        yield start, stop
+        start = stop + timedelta(days=1)
+
+
+def strategy_specs(names: List[str], rules_path: str, stake: float, kelly_multiplier: float) -> List[dict]:
+    rules = {}
+    if rules_path:
+        with open(rules_path) as f:
+            rules = {rule["name"]: rule for rule in json.load(f)}
+    specs = []
+    for name in names:
+        if name == "edge":
+            specs.append({"type": "edge", "multiplier": kelly_multiplier})
+        else:
+            specs.append({"type": "suggestion", "name": name, "rule": rules.get(name), "stake": stake})
+    return specs
+
+
+def summarize(results: List[dict], bankroll: float) -> dict:
+    totals: Dict[str, dict] = {}
+    for result in results:
+        for name, report in result["strategies"].items():
+            total = totals.setdefault(name, {field: 0 for field in SUM_FIELDS})
+            for field in SUM_FIELDS:
+                total[field] += report[field]
+    for total in totals.values():
+        invested = total["cost"] + total["fees"]
+        total["roi"] = round(total["pnl"] / invested, 4) if invested else 0.0
+        total["win_rate"] = round(total["wins"] / total["settled"], 4) if total["settled"] else None
+        for field in ("cost", "fees", "payout", "open_value", "pnl"):
+            total[field] = round(total[field], 2)
+    return {
+        "type": "summary",
+        "ranges": len(results),
+        "frames": sum(r["frames"] for r in results),
+        "bankroll_per_range": bankroll,
+        "strategies": totals,
+    }
+
+
+def run_jobs(jobs: List[dict], workers: int) -> Iterator[dict]:
+    """Chunk results in completion order"""
+    if workers == 1:
+        for job in jobs:
+            yield replay_range(job)
+        return
+    with ProcessPoolExecutor(max_workers=workers or None) as pool:
+        for future in as_completed([pool.submit(replay_range, job) for job in jobs]):
+            yield future.result()
+
+
+def main(args) -> int:
+    specs = strategy_specs(args.strategy or ["balanced", "edge"], args.rules, args.stake, args.kelly_multiplier)
+    # Fail on unknown strategies before starting any workers
+    for spec in specs:
+        build_strategy(spec)
+
+    jobs = [
+        {
+            "data": args.data,
+            "settlements": args.settlements,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "strategies": specs,
+            "bankroll": args.bankroll,
+        }
+        for start, end in date_ranges(date.fromisoformat(args.start), date.fromisoformat(args.end), args.range_days)
+    ]
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    results = []
+    started = time.perf_counter()
+    try:
+        for result in run_jobs(jobs, args.workers):
+            results.append(result)
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+        results.sort(key=lambda r: r["start"])
+        summary = summarize(results, args.bankroll)
+        summary["seconds"] = round(time.perf_counter() - started, 3)
+        out.write(json.dumps(summary) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded snapshots through trading strategies")
+    parser.add_argument("--data", default=os.getenv("SNAPSHOT_RECORD_DIR", "recordings"))
+    parser.add_argument("--settlements", default="", help="NDJSON(.gz) or Parquet of ticker, result, settled_at")
+    parser.add_argument("--start", required=True, help="First day, YYYY-MM-DD")
+    parser.add_argument("--end", required=True, help="Last day, YYYY-MM-DD")
+    parser.add_argument(
+        "--strategy",
+        action="append",
+        help="Suggestion view (built-in or from --rules) or 'edge'; repeatable",
+    )
+    parser.add_argument("--rules", default="", help="JSON list of suggestion rules")
+    parser.add_argument("--bankroll", type=float, default=10000)
+    parser.add_argument("--stake", type=float, default=100, help="Dollars per suggestion pick")
+    parser.add_argument("--kelly-multiplier", type=float, default=0.5)
+    parser.add_argument("--range-days", type=int, default=7, help="Days per parallel chunk")
+    parser.add_argument("--workers", type=int, default=0, help="Processes (0 = one per CPU, 1 = inline)")
+    parser.add_argument("--output", help="Write the NDJSON report here instead of stdout")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,48 @@
+"""
+Settlement export
+Downloads settled markets from Kalshi into the NDJSON file the backtester
+reads.
+
+    cd backend && python -m backtest.settlements settlements.ndjson.gz
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import sys
+
+from ingest import iter_pages
+from upstream import UpstreamClient
+
+
+async def export(out_path: str, base_url: str, max_pages: int) -> int:
+    client = UpstreamClient("kalshi", base_url)
+    await client.start()
+    written = 0
+    opener = gzip.open if out_path.endswith(".gz") else open
+    try:
+        with opener(out_path, "wt") as out:
+            params = {"status": "settled", "limit": 1000}
+            async for page in iter_pages(client, "/markets", "markets", params, max_pages):
+                for m in page:
+                    result = m.get("result")
+                    if result not in ("yes", "no"):
+                        continue
+                    settled_at = m.get("settlement_time") or m.get("close_time")
+                    out.write(json.dumps({"ticker": m["ticker"], "result": result, "settled_at": settled_at}) + "\n")
+                    written += 1
+    finally:
+        await client.aclose()
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export settled Kalshi markets for backtesting")
+    parser.add_argument("output")
+    parser.add_argument("--api", default=os.getenv("KALSHI_API_URL", "https://api.elections.kalshi.com/trade-api/v2"))
+    parser.add_argument("--max-pages", type=int, default=500)
+    args = parser.parse_args()
+    count = asyncio.run(export(args.output, args.api, args.max_pages))
+    print(f"{count} settlements written to {args.output}", file=sys.stderr)
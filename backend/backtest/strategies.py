@@ -0,0 +1,96 @@
+"""
+Backtest strategies
+Each strategy sees the markets a frame touched and trades a Simulator. The
+rules are the live ones: suggestion views from suggestions.py, the edge
+rule from edge.py and Kelly fractions from kelly.py.
+"""
+
+from typing import List, Optional
+
+from edge import EDGE_THRESHOLD, recommend
+from kelly import kelly_fraction
+from suggestions import SuggestionIndex
+
+from backtest.data import ReplayState
+from backtest.engine import Simulator
+
+
+class SuggestionStrategy:
+    """Buys YES on every market that enters a suggestion view's top k.
+
+    `rule` (the body accepted by POST /api/suggestions/rules) defines a
+    user view; without it `name` must be a built-in view. Each pick is
+    sized to spend about `stake` dollars.
+    """
+
+    def __init__(self, name: str, rule: Optional[dict] = None, stake: float = 100.0, k: int = 5):
+        self.name = name
+        self.stake = stake
+        self.index = SuggestionIndex(k=k)
+        if rule is not None:
+            # Same defaults as the SuggestionRule request model
+            defaults = {"min_probability": 0, "max_probability": 1, "min_volume": 1000, "max_spread": 1}
+            self.index.add_rule({**defaults, **rule, "name": name})
+        if name not in self.index.views:
+            raise ValueError(f"Unknown suggestion view {name!r}")
+        # Only this view has to be maintained
+        self.index.views = {name: self.index.views[name]}
+
+    def on_frame(self, ts: float, state: ReplayState, changed: List[dict], removed: List[str], sim: Simulator):
+        self.index.store = state
+        for ticker in removed:
+            self.index.discard(ticker)
+        for m in changed:
+            self.index.evaluate(m)
+        for m in self.index.get(self.name):
+            if not sim.holds(m["ticker"]) and m["yes_price"] > 0:
+                sim.buy(ts, m["ticker"], "yes", m["yes_price"], int(self.stake / m["yes_price"]))
+
+
+class EdgeStrategy:
+    """Trades the AI recommendation on markets with a recorded `ai_probability`.
+
+    The side comes from `recommend(probability - yes_price)` and the size
+    from the Kelly fraction of that side, scaled by `multiplier` and capped
+    at `max_fraction` of the cash on hand.
+    """
+
+    def __init__(
+        self,
+        name: str = "edge",
+        threshold: float = EDGE_THRESHOLD,
+        multiplier: float = 0.5,
+        max_fraction: float = 0.05,
+    ):
+        self.name = name
+        self.threshold = threshold
+        self.multiplier = multiplier
+        self.max_fraction = max_fraction
+
+    def on_frame(self, ts: float, state: ReplayState, changed: List[dict], removed: List[str], sim: Simulator):
+        for m in changed:
+            prob = m.get("ai_probability")
+            if prob is None or sim.holds(m["ticker"]):
+                continue
+            call = recommend(prob - m["yes_price"], self.threshold)
+            if call == "PASS":
+                continue
+            if call == "YES":
+                side, win_prob, price = "yes", prob, m["yes_price"]
+            else:
+                side, win_prob, price = "no", 1 - prob, m["no_price"]
+            if not 0 < price < 1:
+                continue
+            fraction = min(float(kelly_fraction(win_prob, price)) * self.multiplier, self.max_fraction)
+            sim.buy(ts, m["ticker"], side, price, int(sim.cash * fraction / price))
+
+
+def build_strategy(spec: dict):
+    """Strategy from a spec: {"type": "suggestion", "name", "rule"?, "stake"?} or {"type": "edge", ...}"""
+    spec = dict(spec)
+    kind = spec.pop("type")
+    if kind == "suggestion":
+        return SuggestionStrategy(**spec)
+    if kind == "edge":
+        return EdgeStrategy(**spec)
+    raise ValueError(f"Unknown strategy type {kind!r}")
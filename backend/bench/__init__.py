@@ -0,0 +1,4 @@
+"""
+Offline benchmark harness: a synthetic Kalshi/Anthropic upstream and an
+in-process load generator for the API.
+"""
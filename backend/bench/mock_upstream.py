@@ -0,0 +1,204 @@
+"""
+Mock upstream
+Synthetic stand-in for the Kalshi and Anthropic APIs: paginated markets
+grouped into events, order books and LLM analyses, with configurable
+latency and error rates. Mounted in-process through httpx.ASGITransport,
+or served on its own with `python -m bench.mock_upstream`.
+"""
+
+import asyncio
+import json
+import os
+import random
+import zlib
+from typing import List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from categories import SERIES_FILTERS
+
+# Exactly the series names the app filters on, so category requests match
+SERIES = [series for names in SERIES_FILTERS.values() for series in names.split(",")]
+WORDS = ["bitcoin", "election", "rate", "inflation", "super bowl", "tesla", "senate", "weather", "ai", "gdp"]
+
+
+class MockConfig:
+    """Latency (seconds) and error rate knobs, adjustable while running"""
+
+    def __init__(
+        self,
+        markets: int = 20000,
+        outcomes: int = 4,
+        market_latency: float = 0.02,
+        orderbook_latency: float = 0.01,
+        llm_latency: float = 0.5,
+        error_rate: float = 0.0,
+        mispriced: float = 0.02,
+        seed: int = 0,
+    ):
+        self.markets = markets
+        self.outcomes = outcomes
+        self.market_latency = market_latency
+        self.orderbook_latency = orderbook_latency
+        self.llm_latency = llm_latency
+        self.error_rate = error_rate
+        self.mispriced = mispriced
+        self.seed = seed
+
+
+def fair_prices(rng: random.Random, outcomes: int) -> List[int]:
+    """Cents per outcome, each at least 3, summing to 100"""
+    spare = 100 - 3 * outcomes
+    cuts = sorted(rng.randint(0, spare) for _ in range(outcomes - 1))
+    return [3 + b - a for a, b in zip([0] + cuts, cuts + [spare])]
+
+
+def synthetic_markets(config: MockConfig) -> list:
+    """Deterministic market universe of events with `outcomes` markets each.
+
+    Asks sit 1-2 cents above a fair price split that sums to $1, so no
+    basket is profitable after fees. A `mispriced` fraction of events
+    instead shaves 3 cents off every YES ask (or every NO ask), which
+    shows up as single-market and event-level arbitrage.
+    """
+    rng = random.Random(config.seed)
+    markets = []
+    for e in range(-(-config.markets // config.outcomes)):
+        series = SERIES[e % len(SERIES)]
+        event = f"KX{series}-{e:05d}"
+        mispriced = rng.random() < config.mispriced
+        shaved = rng.choice(["yes", "no"]) if mispriced else None
+        for o, fair in enumerate(fair_prices(rng, config.outcomes)):
+            yes_ask = fair - 3 if shaved == "yes" else fair + rng.randint(1, 2)
+            no_ask = 100 - fair - 3 if shaved == "no" else 100 - fair + rng.randint(1, 2)
+            markets.append({
+                "ticker": f"{event}-O{o}",
+                "event_ticker": event,
+                "series_ticker": series,
+                "title": f"Will {rng.choice(WORDS)} {rng.choice(WORDS)} happen #{len(markets)}?",
+                "yes_ask": max(1, min(99, yes_ask)),
+                "no_ask": max(1, min(99, no_ask)),
+                "volume": int(rng.paretovariate(1.2) * 500),
+                "close_time": "2030-01-01T00:00:00Z",
+                "status": "open",
+            })
+    return markets
+
+
+def create_app(config: Optional[MockConfig] = None) -> FastAPI:
+    config = config or MockConfig()
+    app = FastAPI(title="Mock upstream")
+    app.state.config = config
+    markets = synthetic_markets(config)
+    by_ticker = {m["ticker"]: m for m in markets}
+    events = sorted({m["event_ticker"] for m in markets})
+
+    async def delay(seconds: float) -> Optional[JSONResponse]:
+        if seconds:
+            await asyncio.sleep(seconds * random.uniform(0.5, 1.5))
+        if config.error_rate and random.random() < config.error_rate:
+            return JSONResponse({"error": "injected"}, status_code=503)
+        return None
+
+    @app.get("/markets")
+    async def list_markets(
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        series_ticker: Optional[str] = None,
+        status: Optional[str] = None,
+    ):
+        error = await delay(config.market_latency)
+        if error:
+            return error
+        rows = markets
+        if series_ticker:
+            rows = [m for m in markets if m["series_ticker"] == series_ticker]
+        start = int(cursor or 0)
+        page = rows[start:start + limit]
+        next_cursor = str(start + limit) if start + limit < len(rows) else ""
+        return {"markets": page, "cursor": next_cursor}
+
+    @app.get("/markets/{ticker}")
+    async def get_market(ticker: str):
+        error = await delay(config.market_latency)
+        if error:
+            return error
+        market = by_ticker.get(ticker)
+        if market is None:
+            return JSONResponse({"error": "not found"}, status_code=404)
+        return {"market": market}
+
+    @app.get("/markets/{ticker}/orderbook")
+    async def get_orderbook(ticker: str, depth: int = 0):
+        error = await delay(config.orderbook_latency)
+        if error:
+            return error
+        market = by_ticker.get(ticker)
+        if market is None:
+            return JSONResponse({"error": "not found"}, status_code=404)
+        rng = random.Random(zlib.crc32(ticker.encode()))
+        best_yes_bid = 100 - market["no_ask"]
+        best_no_bid = 100 - market["yes_ask"]
+        levels = depth or 10
+        book = {
+            "yes": [[p, rng.randint(1, 500)] for p in range(max(1, best_yes_bid - levels + 1), best_yes_bid + 1)],
+            "no": [[p, rng.randint(1, 500)] for p in range(max(1, best_no_bid - levels + 1), best_no_bid + 1)],
+        }
+        return {"orderbook": book}
+
+    @app.get("/events")
+    async def list_events(limit: int = 200, cursor: Optional[str] = None, status: Optional[str] = None):
+        error = await delay(config.market_latency)
+        if error:
+            return error
+        start = int(cursor or 0)
+        page = events[start:start + limit]
+        return {
+            "events": [{"event_ticker": e, "mutually_exclusive": True} for e in page],
+            "cursor": str(start + limit) if start + limit < len(events) else "",
+        }
+
+    @app.post("/messages")
+    async def messages(request: Request):
+        body = await request.json()
+        error = await delay(config.llm_latency)
+        if error:
+            return error
+        prompt = body["messages"][0]["content"]
+        rng = random.Random(zlib.crc32(prompt.encode()))
+        analysis = {
+            "probability": rng.randint(5, 95),
+            "recommendation": rng.choice(["YES", "NO", "PASS"]),
+            "reasoning": "Synthetic analysis from the benchmark upstream.",
+            "confidence": rng.choice(["low", "medium", "high"]),
+            "risk_factors": ["Synthetic data", "No real market"],
+        }
+        return {"content": [{"type": "text", "text": json.dumps(analysis)}]}
+
+    return app
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Serve the mock Kalshi/Anthropic upstream")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--markets", type=int, default=int(os.getenv("MOCK_MARKETS", "20000")))
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--market-latency", type=float, default=0.02)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--mispriced", type=float, default=0.02)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(MockConfig(
+            markets=args.markets,
+            market_latency=args.market_latency,
+            llm_latency=args.llm_latency,
+            error_rate=args.error_rate,
+            mispriced=args.mispriced,
+        )),
+        port=args.port,
+    )
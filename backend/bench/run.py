@@ -0,0 +1,197 @@
+"""
+Load generator
+Runs the API in-process against the mock upstream and reports latency
+percentiles, throughput and peak RSS per endpoint scenario.
+
+    cd backend && python -m bench.run --requests 500 --concurrency 16 --check
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+
+THRESHOLDS_PATH = os.path.join(os.path.dirname(__file__), "thresholds.json")
+
+# (method, path, json body) for one request
+RequestSpec = Tuple[str, str, object]
+
+FILTERS = [
+    "/api/markets?limit=100",
+    "/api/markets?category=crypto&limit=50",
+    "/api/markets?search=bitcoin&sort_by=probability&limit=50",
+    "/api/markets?bucket=longshot&min_volume=1000&limit=100",
+    "/api/markets?category=sports&sort_by=closing&sort_order=asc&limit=25",
+    "/api/markets?fields=ticker,yes_price&limit=1000",
+]
+
+
+def scenarios(tickers: List[str]) -> Dict[str, Callable[[], RequestSpec]]:
+    def trade() -> RequestSpec:
+        return ("POST", "/api/paper/trade", {
+            "ticker": random.choice(tickers),
+            "title": "bench",
+            "side": random.choice(["YES", "NO"]),
+            "price": round(random.uniform(0.05, 0.95), 2),
+            "quantity": random.randint(1, 20),
+            "timestamp": "",
+        })
+
+    return {
+        "markets": lambda: ("GET", "/api/markets?limit=100", None),
+        "markets_filtered": lambda: ("GET", random.choice(FILTERS), None),
+        "suggestions": lambda: ("GET", "/api/suggestions", None),
+        "arbitrage": lambda: ("GET", "/api/arbitrage", None),
+        "analyze": lambda: ("POST", f"/api/analyze/{random.choice(tickers)}", None),
+        "paper_trade": trade,
+        "paper_portfolio": lambda: ("GET", "/api/paper/portfolio?simulate=true&paths=2000", None),
+    }
+
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+async def run_scenario(client, make_request: Callable[[], RequestSpec], requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    empty = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors, empty
+        while remaining > 0:
+            remaining -= 1
+            method, path, body = make_request()
+            start = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            elif response.content.strip() in (b"[]", b"{}"):
+                empty += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "empty": empty,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def check(results: Dict[str, dict], thresholds: dict) -> List[str]:
+    """Threshold violations, one message each"""
+    failures = []
+    for name, limits in thresholds.get("scenarios", {}).items():
+        result = results.get(name)
+        if result is None:
+            continue
+        if "p95_ms" in limits and result["p95_ms"] > limits["p95_ms"]:
+            failures.append(f"{name}: p95 {result['p95_ms']}ms > {limits['p95_ms']}ms")
+        if "min_rps" in limits and result["rps"] < limits["min_rps"]:
+            failures.append(f"{name}: {result['rps']} rps < {limits['min_rps']} rps")
+        if "max_error_rate" in limits and result["errors"] / result["requests"] > limits["max_error_rate"]:
+            failures.append(f"{name}: {result['errors']}/{result['requests']} errors")
+        # A scenario answering with nothing is timing an empty response
+        if limits.get("require_results") and result.get("empty"):
+            failures.append(f"{name}: {result['empty']}/{result['requests']} empty responses")
+    max_rss = thresholds.get("peak_rss_mb")
+    peak = max((r["peak_rss_mb"] for r in results.values()), default=0)
+    if max_rss is not None and peak > max_rss:
+        failures.append(f"peak RSS {peak}MB > {max_rss}MB")
+    return failures
+
+
+async def main(args) -> int:
+    from bench.mock_upstream import MockConfig, create_app
+
+    tmp = tempfile.mkdtemp(prefix="kalshi-bench-")
+    os.environ.setdefault("ANTHROPIC_API_KEY", "bench")
+    os.environ["PAPER_DB_PATH"] = os.path.join(tmp, "paper.db")
+    os.environ.setdefault("PAPER_STARTING_BALANCE", "1e12")
+    os.environ["KALSHI_API_URL"] = "http://upstream"
+    os.environ["ANTHROPIC_API_URL"] = "http://upstream"
+
+    import httpx
+    import main as api
+
+    upstream = httpx.ASGITransport(app=create_app(MockConfig(
+        markets=args.markets,
+        market_latency=args.market_latency,
+        llm_latency=args.llm_latency,
+        error_rate=args.error_rate,
+        mispriced=args.mispriced,
+    )))
+    api.kalshi.transport = upstream
+    api.anthropic.transport = upstream
+
+    results: Dict[str, dict] = {}
+    async with api.app.router.lifespan_context(api.app):
+        started = time.perf_counter()
+        snapshot = await api.market_cache.get("")
+        await api.refresh_event_flags()
+        print(f"warm-up: {len(snapshot.store)} markets in {time.perf_counter() - started:.2f}s")
+        tickers = snapshot.store.tickers
+
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            for name, make_request in scenarios(tickers).items():
+                if args.only and name not in args.only:
+                    continue
+                requests = args.analyze_requests if name == "analyze" else args.requests
+                results[name] = await run_scenario(client, make_request, requests, args.concurrency)
+                r = results[name]
+                print(
+                    f"{name:18} {r['requests']:6} req {r['rps']:9.1f} rps  "
+                    f"p50 {r['p50_ms']:8.2f}ms  p95 {r['p95_ms']:8.2f}ms  p99 {r['p99_ms']:8.2f}ms  "
+                    f"errors {r['errors']:4}  empty {r['empty']:4}  rss {r['peak_rss_mb']:.0f}MB"
+                )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.check:
+        with open(args.thresholds) as f:
+            failures = check(results, json.load(f))
+        for failure in failures:
+            print(f"REGRESSION {failure}")
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the API against a mock upstream")
+    parser.add_argument("--markets", type=int, default=20000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--analyze-requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--market-latency", type=float, default=0.02)
+    parser.add_argument("--llm-latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--mispriced", type=float, default=0.02, help="Fraction of events priced for arbitrage")
+    parser.add_argument("--only", nargs="*", help="Scenario names to run")
+    parser.add_argument("--json", help="Write results to this file")
+    parser.add_argument("--check", action="store_true", help="Fail on threshold regressions")
+    parser.add_argument("--thresholds", default=THRESHOLDS_PATH)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,82 @@
+"""
+Market category classification
+One declarative rule table compiled into a single title regex and a single
+series-ticker regex, memoized per market.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+# (category, title keywords, Kalshi series ticker prefixes), highest priority first.
+# Keywords match whole words with an optional plural "s"; a trailing "*" matches any suffix.
+CATEGORY_RULES: List[Tuple[str, List[str], List[str]]] = [
+    ("politics", ["trump", "biden", "president*", "senate", "congress", "election*"], ["PRES", "SENATE", "HOUSE", "GOV"]),
+    ("crypto", ["bitcoin", "btc", "ethereum", "crypto*"], ["BTC", "ETH", "CRYPTO"]),
+    ("sports", ["nfl", "nba", "mlb", "super bowl", "world series"], ["NFL", "NBA", "MLB", "NHL", "SOCCER"]),
+    ("economics", ["fed", "rate", "gdp", "inflation", "cpi"], ["GDP", "CPI", "FOMC", "FED"]),
+    ("companies", ["tesla", "apple", "google", "amazon", "microsoft"], ["AAPL", "GOOGL", "TSLA", "AMZN"]),
+    ("climate", [], ["CLIMATE", "WEATHER"]),
+    ("financials", [], ["SPX", "NDX", "DJI"]),
+    ("tech", [], ["AI", "TECH"]),
+    ("health", [], ["COVID", "FDA"]),
+]
+
+DEFAULT_CATEGORY = "general"
+CLASSIFY_CACHE_SIZE = 1 << 16
+
+
+def _keyword_pattern(keyword: str) -> str:
+    if keyword.endswith("*"):
+        return re.escape(keyword[:-1]) + r"\w*"
+    return re.escape(keyword).replace(r"\ ", r"\s+") + "s?"
+
+
+def _series_pattern(series: str) -> str:
+    # Kalshi appends letters to series names (KXNFLGAME, KXBTCD), but a
+    # two-letter prefix like AI must stand alone to avoid AIRLINE and friends
+    if len(series) <= 2:
+        return series + "(?![A-Z])"
+    return series
+
+
+def _compile_rules():
+    title_groups = []
+    series_groups = []
+    for i, (_, keywords, series) in enumerate(CATEGORY_RULES):
+        if keywords:
+            title_groups.append(f"(?P<c{i}>{'|'.join(_keyword_pattern(k) for k in keywords)})")
+        if series:
+            series_groups.append(f"(?P<c{i}>{'|'.join(_series_pattern(s) for s in series)})")
+    title_re = re.compile(rf"\b(?:{'|'.join(title_groups)})\b", re.IGNORECASE)
+    # Series segment of the ticker, with Kalshi's optional KX prefix
+    series_re = re.compile(rf"^(?:KX)?(?:{'|'.join(series_groups)})")
+    return title_re, series_re
+
+
+TITLE_RE, SERIES_RE = _compile_rules()
+
+SERIES_FILTERS: Dict[str, str] = {
+    category: ",".join(series) for category, _, series in CATEGORY_RULES if series
+}
+
+
+def _rule_index(match: re.Match) -> int:
+    return int(match.lastgroup[1:])
+
+
+@lru_cache(maxsize=CLASSIFY_CACHE_SIZE)
+def classify(ticker: str, title: str) -> str:
+    """Category for a market; title keywords win over series ticker prefixes"""
+    best = None
+    for match in TITLE_RE.finditer(title):
+        rule = _rule_index(match)
+        if best is None or rule < best:
+            best = rule
+            if rule == 0:
+                break
+    if best is None:
+        match = SERIES_RE.match(ticker.upper())
+        if match:
+            best = _rule_index(match)
+    return CATEGORY_RULES[best][0] if best is not None else DEFAULT_CATEGORY
@@ -0,0 +1,16 @@
+"""
+Edge recommendation rule
+Turns the gap between an estimated probability and the market's YES price
+into a YES / NO / PASS call.
+"""
+
+# Minimum edge, in probability points, before taking a side
+EDGE_THRESHOLD = 0.05
+
+
+def recommend(edge: float, threshold: float = EDGE_THRESHOLD) -> str:
+    if edge > threshold:
+        return "YES"
+    if edge < -threshold:
+        return "NO"
+    return "PASS"
@@ -0,0 +1,146 @@
+"""
+Live market feed
+Fans snapshot deltas out to subscribers, grouped by filter so each distinct
+view is diffed and encoded once per refresh.
+"""
+
+import asyncio
+import json
+from typing import Dict, List, Optional, Set, Tuple
+
+from snapshot import MarketSnapshot, SnapshotCache
+
+DELTA_FIELDS = ("yes_price", "no_price", "volume", "spread")
+
+
+class FeedFilter:
+    __slots__ = ("key", "bucket", "search", "min_volume", "limit")
+
+    def __init__(
+        self,
+        key: str = "",
+        bucket: Optional[str] = None,
+        search: Optional[str] = None,
+        min_volume: int = 0,
+        limit: Optional[int] = None,
+    ):
+        self.key = key
+        self.bucket = bucket
+        self.search = search
+        self.min_volume = min_volume
+        self.limit = limit
+
+    def ident(self) -> Tuple:
+        return (self.key, self.bucket, self.search, self.min_volume, self.limit)
+
+    def view(self, snapshot: MarketSnapshot) -> List[dict]:
+        """Markets in this view, highest volume first"""
+        return snapshot.store.query(
+            min_volume=self.min_volume,
+            search=self.search,
+            bucket=self.bucket,
+            limit=self.limit,
+        )
+
+
+class Subscription:
+    """One client's queue of encoded messages"""
+
+    def __init__(self, feed: "MarketFeed", feed_filter: FeedFilter, max_queue: int):
+        self.feed = feed
+        self.filter = feed_filter
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.needs_resync = False
+
+    def push(self, message: str):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Slow client: drop its backlog and send a fresh snapshot instead
+            self.needs_resync = True
+
+    async def next_message(self) -> str:
+        if self.needs_resync:
+            self.needs_resync = False
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return self.feed.snapshot_message(self.filter)
+        return await self.queue.get()
+
+
+class FeedGroup:
+    """Subscribers sharing one filter, and the tickers currently in their view"""
+
+    def __init__(self, feed_filter: FeedFilter):
+        self.filter = feed_filter
+        self.visible: Set[str] = set()
+        self.subscribers: Set[Subscription] = set()
+
+
+class MarketFeed:
+    """Snapshot-then-delta market feed driven by SnapshotCache refreshes"""
+
+    def __init__(self, cache: SnapshotCache, max_queue: int = 32):
+        self.cache = cache
+        self.max_queue = max_queue
+        self.groups: Dict[Tuple, FeedGroup] = {}
+        cache.listeners.append(self.on_refresh)
+
+    async def subscribe(self, feed_filter: FeedFilter) -> Subscription:
+        """Register a subscriber; its first message is the current snapshot"""
+        await self.cache.get(feed_filter.key)
+        group = self.groups.get(feed_filter.ident())
+        if group is None:
+            group = self.groups[feed_filter.ident()] = FeedGroup(feed_filter)
+            snapshot = self.cache.peek(feed_filter.key)
+            if snapshot is not None:
+                group.visible = {m["ticker"] for m in feed_filter.view(snapshot)}
+
+        subscription = Subscription(self, feed_filter, self.max_queue)
+        group.subscribers.add(subscription)
+        subscription.push(self.snapshot_message(feed_filter))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        ident = subscription.filter.ident()
+        group = self.groups.get(ident)
+        if group is None:
+            return
+        group.subscribers.discard(subscription)
+        if not group.subscribers:
+            del self.groups[ident]
+
+    def snapshot_message(self, feed_filter: FeedFilter) -> str:
+        snapshot = self.cache.peek(feed_filter.key)
+        markets = feed_filter.view(snapshot) if snapshot is not None else []
+        return json.dumps({"type": "snapshot", "markets": markets})
+
+    def on_refresh(self, snapshot: MarketSnapshot):
+        """Compute each group's view delta once and fan it out"""
+        groups = [g for g in self.groups.values() if g.filter.key == snapshot.key]
+        if not groups:
+            return
+        # Keep the snapshot warm for as long as anyone is subscribed
+        self.cache.touch(snapshot.key)
+
+        delta = snapshot.delta
+        if not delta:
+            return
+        changed = set(delta.changed_tickers)
+        for group in groups:
+            view = group.filter.view(snapshot)
+            tickers = {m["ticker"] for m in view}
+            added = [m for m in view if m["ticker"] not in group.visible]
+            removed = sorted(group.visible - tickers)
+            updated = [
+                {"ticker": m["ticker"], **{f: m[f] for f in DELTA_FIELDS}}
+                for m in view
+                if m["ticker"] in changed and m["ticker"] in group.visible
+            ]
+            group.visible = tickers
+            if not (added or removed or updated):
+                continue
+
+            message = json.dumps({"type": "delta", "added": added, "removed": removed, "changed": updated})
+            for subscription in group.subscribers:
+                subscription.push(message)
@@ -0,0 +1,15 @@
+"""
+Kalshi trading fees
+"""
+
+import math
+
+# Fee = round up(rate x contracts x price x (1 - price)) to the next cent
+TAKER_FEE_RATE = 0.07
+
+
+def kalshi_fee(price: float, contracts: int = 1, rate: float = TAKER_FEE_RATE) -> float:
+    """Taker fee in dollars for buying `contracts` at `price` (0-1)"""
+    cents = rate * contracts * price * (1 - price) * 100
+    # Guard the ceiling against float noise such as 175.00000000000003
+    return math.ceil(round(cents, 6)) / 100
@@ -0,0 +1,111 @@
+"""
+Market ingestion pipeline
+Walks Kalshi's cursor-paginated /markets (and /events) endpoints and
+yields transformed markets one at a time as pages arrive.
+"""
+
+import asyncio
+from typing import AsyncIterator, Callable, List, Optional
+
+from upstream import UpstreamClient
+
+_DONE = object()
+
+
+async def iter_pages(
+    client: UpstreamClient,
+    path: str,
+    key: str,
+    params: dict,
+    max_pages: int = 50,
+) -> AsyncIterator[List[dict]]:
+    """Yield the `key` list of each page of one cursor chain on `path`.
+
+    The next page is requested as soon as the cursor is known, so the fetch
+    overlaps with the caller processing the current page.
+    """
+
+    async def fetch(cursor: Optional[str]) -> dict:
+        page_params = dict(params)
+        if cursor:
+            page_params["cursor"] = cursor
+        response = await client.get(path, params=page_params)
+        response.raise_for_status()
+        return response.json()
+
+    pending = asyncio.create_task(fetch(None))
+    pages = 0
+    try:
+        while pending is not None:
+            data = await pending
+            pages += 1
+            cursor = data.get("cursor")
+            pending = asyncio.create_task(fetch(cursor)) if cursor and pages < max_pages else None
+            yield data.get(key, [])
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+def iter_market_pages(
+    client: UpstreamClient,
+    params: dict,
+    max_pages: int = 50,
+) -> AsyncIterator[List[dict]]:
+    """Yield raw market pages for one cursor chain"""
+    return iter_pages(client, "/markets", "markets", params, max_pages)
+
+
+async def iter_markets(
+    client: UpstreamClient,
+    series_ticker: str,
+    transform: Callable[[dict], dict],
+    page_size: int = 1000,
+    max_pages: int = 50,
+    concurrency: int = 4,
+) -> AsyncIterator[dict]:
+    """Yield transformed open markets for a series filter ("" for all).
+
+    A comma-separated series filter is split into independent cursor chains
+    that are walked concurrently, at most `concurrency` at a time. Pages are
+    handed over through a bounded queue, so memory stays flat no matter how
+    many markets exist.
+    """
+    base = {"limit": page_size, "status": "open"}
+    chains = [{**base, "series_ticker": s} for s in series_ticker.split(",") if s] or [base]
+
+    if len(chains) == 1:
+        async for page in iter_market_pages(client, chains[0], max_pages):
+            for m in page:
+                yield transform(m)
+        return
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def walk(params: dict):
+        try:
+            async with semaphore:
+                async for page in iter_market_pages(client, params, max_pages):
+                    await queue.put(page)
+        except Exception:
+            await queue.put(_DONE)
+            raise
+        await queue.put(_DONE)
+
+    workers = [asyncio.create_task(walk(params)) for params in chains]
+    try:
+        remaining = len(workers)
+        while remaining:
+            page = await queue.get()
+            if page is _DONE:
+                remaining -= 1
+                continue
+            for m in page:
+                yield transform(m)
+        # Surface the first upstream failure once every chain has finished
+        for worker in workers:
+            worker.result()
+    finally:
+        for worker in workers:
+            worker.cancel()
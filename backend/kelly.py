@@ -0,0 +1,169 @@
+"""
+Kelly sizing for binary contracts
+A contract bought at price c pays $1, so net odds are b = (1 - c) / c and
+the Kelly fraction simplifies to f = (p - c) / (1 - c). Everything here
+works on arrays, one element per market.
+"""
+
+import numpy as np
+
+# Bets with positive edge up to this many are solved over every win/loss
+# combination; larger batches use sampled outcomes
+ENUMERATE_LEGS = 12
+# Outcome matrix entries (scenarios x bets) when sampling
+SAMPLE_BUDGET = 2_000_000
+MIN_SAMPLES = 256
+MAX_SAMPLES = 8192
+MAX_ITERATIONS = 200
+TOLERANCE = 1e-9
+# Bets optimized together at first; bets whose gradient says they should
+# be funded join in batches of this size
+WORKING_SET = 32
+# Default cap on the summed fractions, so part of the bankroll stays in cash
+DEFAULT_MAX_TOTAL = 0.5
+
+
+def kelly_fraction(prob: np.ndarray, price: np.ndarray) -> np.ndarray:
+    """Single-bet Kelly fraction of bankroll for buying at `price`, floored at 0"""
+    prob = np.asarray(prob, dtype=np.float64)
+    price = np.asarray(price, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f = (prob - price) / (1 - price)
+    return np.clip(np.nan_to_num(f, nan=0.0, neginf=0.0), 0.0, 1.0)
+
+
+def best_side(prob: np.ndarray, yes_price: np.ndarray, no_price: np.ndarray):
+    """Pick YES or NO per market by edge.
+
+    Returns (is_yes, win probability, price, edge) for the chosen side.
+    """
+    prob = np.asarray(prob, dtype=np.float64)
+    yes_edge = prob - yes_price
+    no_edge = (1 - prob) - no_price
+    is_yes = yes_edge >= no_edge
+    win_prob = np.where(is_yes, prob, 1 - prob)
+    price = np.where(is_yes, yes_price, no_price)
+    return is_yes, win_prob, price, np.where(is_yes, yes_edge, no_edge)
+
+
+def _project(v: np.ndarray, cap: float) -> np.ndarray:
+    """Euclidean projection onto {f >= 0, sum(f) <= cap}"""
+    f = np.maximum(v, 0.0)
+    if f.sum() <= cap:
+        return f
+    u = np.sort(v)[::-1]
+    excess = np.cumsum(u) - cap
+    ranks = np.arange(1, len(v) + 1)
+    rho = np.flatnonzero(u - excess / ranks > 0)[-1]
+    return np.maximum(v - excess[rho] / (rho + 1), 0.0)
+
+
+def _scenarios(p: np.ndarray, b: np.ndarray, seed: int = 0):
+    """Per-outcome returns (scenarios x bets) and outcome probabilities.
+
+    A staked dollar returns b on a win and -1 on a loss. The all-lose
+    outcome is always present, so every solution keeps wealth positive
+    when every bet fails.
+    """
+    n = len(p)
+    if n <= ENUMERATE_LEGS:
+        wins = ((np.arange(2 ** n)[:, None] >> np.arange(n)) & 1).astype(bool)
+        weights = np.prod(np.where(wins, p, 1 - p), axis=1)
+    else:
+        samples = int(np.clip(SAMPLE_BUDGET // n, MIN_SAMPLES, MAX_SAMPLES))
+        wins = np.random.default_rng(seed).random((samples, n)) < p
+        wins = np.vstack([wins, np.zeros(n, dtype=bool)])
+        weights = np.full(samples + 1, 1.0 / samples)
+        weights[-1] = max(float(np.prod(1 - p)), 1e-12)
+    return np.where(wins, b, -1.0), weights / weights.sum()
+
+
+def _growth(wealth: np.ndarray, weights: np.ndarray) -> float:
+    if np.any(wealth <= 0):
+        return -np.inf
+    return float(weights @ np.log(wealth))
+
+
+def _ascend(returns: np.ndarray, weights: np.ndarray, cap: float, f: np.ndarray) -> np.ndarray:
+    """Projected Newton-scaled gradient ascent on E[log(1 + returns @ f)] from `f`.
+
+    Each step moves towards the projection of a diagonally scaled gradient
+    step (plain gradient if that is not an ascent direction), backtracking
+    until the growth improves. Every iterate is a convex combination of
+    feasible points, so it stays inside {f >= 0, sum(f) <= cap}.
+    """
+    squared = returns * returns
+    wealth = 1.0 + returns @ f
+    current = float(weights @ np.log(wealth))
+    for _ in range(MAX_ITERATIONS):
+        ratio = weights / wealth
+        grad = returns.T @ ratio
+        curvature = squared.T @ (ratio / wealth)
+        direction = _project(f + grad / np.maximum(curvature, 1e-12), cap) - f
+        slope = grad @ direction
+        if slope <= 0:
+            direction = _project(f + grad / max(float(curvature.max()), 1e-12), cap) - f
+            slope = grad @ direction
+        if slope <= TOLERANCE:
+            break
+        step = 1.0
+        while step > 1e-10:
+            candidate = f + step * direction
+            candidate_wealth = 1.0 + returns @ candidate
+            value = _growth(candidate_wealth, weights)
+            if value >= current + 1e-4 * step * slope:
+                break
+            step /= 2
+        else:
+            break
+        f, wealth, current = candidate, candidate_wealth, value
+    return f
+
+
+def _maximize_growth(returns: np.ndarray, weights: np.ndarray, cap: float) -> np.ndarray:
+    """Maximize E[log(1 + returns @ f)] over {f >= 0, sum(f) <= cap}.
+
+    Only a few bets end up funded in large batches, so the ascent runs on
+    a working set (initially the bets with the best expected return) and
+    is repeated with the bets that violate the optimality conditions at
+    its solution: an unfunded bet whose marginal growth beats the funded
+    ones' (or beats 0 while the cap has room) joins the working set.
+    """
+    n = returns.shape[1]
+    f = np.zeros(n)
+    working = np.argsort(-(weights @ returns))[:WORKING_SET]
+    while True:
+        f[working] = _ascend(returns[:, working], weights, cap, f[working])
+        grad = returns.T @ (weights / (1.0 + returns @ f))
+        funded = f > 0
+        level = max(0.0, float(grad[funded].min())) if funded.any() else 0.0
+        outside = np.ones(n, dtype=bool)
+        outside[working] = False
+        violators = np.flatnonzero(outside & (grad > level + np.sqrt(TOLERANCE)))
+        if len(violators) == 0:
+            return f
+        joining = violators[np.argsort(-grad[violators])[:WORKING_SET]]
+        working = np.concatenate([working, joining])
+
+
+def constrained_kelly(prob: np.ndarray, price: np.ndarray, max_total: float = DEFAULT_MAX_TOTAL) -> np.ndarray:
+    """Simultaneous Kelly fractions for independent bets, summing to at most `max_total`.
+
+    Maximizes the joint expected log growth E[log(1 + sum f_i X_i)], where
+    X_i is bet i's return per dollar, over every win/loss combination (or
+    sampled combinations for large batches). Because all bets can lose
+    together, the fractions always sum to less than 1 even without a cap.
+    Bets without a positive edge get 0.
+    """
+    p = np.asarray(prob, dtype=np.float64)
+    price = np.asarray(price, dtype=np.float64)
+    valid = (price > 0) & (price < 1)
+    b = np.where(valid, (1 - price) / np.where(valid, price, 1), 0.0)
+    active = np.flatnonzero(valid & (p * b - (1 - p) > 0))
+
+    fractions = np.zeros(len(p))
+    if len(active) == 0 or max_total <= 0:
+        return fractions
+    returns, weights = _scenarios(p[active], b[active])
+    fractions[active] = _maximize_growth(returns, weights, max_total)
+    return fractions
@@ -0,0 +1,193 @@
+"""
+Paper trading ledger
+Append-only SQLite trade log with per-ticker/side positions and account
+totals maintained in the same transaction as each trade.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS account (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    balance REAL NOT NULL,
+    starting_balance REAL NOT NULL,
+    trade_count INTEGER NOT NULL DEFAULT 0,
+    total_cost REAL NOT NULL DEFAULT 0,
+    epoch INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS trades (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticker TEXT NOT NULL,
+    title TEXT NOT NULL,
+    side TEXT NOT NULL,
+    price REAL NOT NULL,
+    quantity INTEGER NOT NULL,
+    cost REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    epoch INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS resets (
+    epoch INTEGER PRIMARY KEY,
+    balance REAL NOT NULL,
+    trade_count INTEGER NOT NULL,
+    reset_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS positions (
+    ticker TEXT NOT NULL,
+    side TEXT NOT NULL,
+    title TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    cost REAL NOT NULL,
+    PRIMARY KEY (ticker, side)
+);
+"""
+
+# Columns added after the first release, for ledgers created before them
+MIGRATIONS = [
+    ("account", "epoch", "ALTER TABLE account ADD COLUMN epoch INTEGER NOT NULL DEFAULT 0"),
+    ("trades", "epoch", "ALTER TABLE trades ADD COLUMN epoch INTEGER NOT NULL DEFAULT 0"),
+]
+
+
+class InsufficientBalance(Exception):
+    pass
+
+
+class PaperLedger:
+    """SQLite-backed paper trading account in WAL mode.
+
+    Every trade is one IMMEDIATE transaction: the balance is debited with a
+    guarded UPDATE (so two workers cannot both spend the same dollars), the
+    trade is appended, and the ticker/side position is upserted. Reading the
+    portfolio never touches the trade log.
+
+    Trades are never deleted. A reset starts a new epoch: it is recorded
+    in `resets`, positions (a projection of the current epoch's trades)
+    are cleared, and only the current epoch's trades are listed.
+    """
+
+    def __init__(self, path: str, starting_balance: float = 10000):
+        self.path = path
+        self.starting_balance = starting_balance
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def open(self):
+        """Connect and create the schema; called again after `close`"""
+        if self._db is not None:
+            return
+        db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=30)
+        db.row_factory = sqlite3.Row
+        if self.path != ":memory:":
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(SCHEMA)
+        for table, column, statement in MIGRATIONS:
+            if column not in {row["name"] for row in db.execute(f"PRAGMA table_info({table})")}:
+                db.execute(statement)
+        db.execute("CREATE INDEX IF NOT EXISTS trades_epoch ON trades (epoch, id)")
+        db.execute(
+            "INSERT OR IGNORE INTO account (id, balance, starting_balance) VALUES (1, ?, ?)",
+            (self.starting_balance, self.starting_balance),
+        )
+        self._db = db
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def place_trade(self, trade: dict) -> float:
+        """Record a trade and return the new balance"""
+        cost = trade["price"] * trade["quantity"]
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                debited = db.execute(
+                    "UPDATE account SET balance = balance - ?, trade_count = trade_count + 1,"
+                    " total_cost = total_cost + ? WHERE id = 1 AND balance >= ?",
+                    (cost, cost, cost),
+                ).rowcount
+                if not debited:
+                    raise InsufficientBalance()
+                db.execute(
+                    "INSERT INTO trades (ticker, title, side, price, quantity, cost, timestamp, epoch)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, (SELECT epoch FROM account WHERE id = 1))",
+                    (trade["ticker"], trade["title"], trade["side"], trade["price"],
+                     trade["quantity"], cost, trade["timestamp"]),
+                )
+                db.execute(
+                    "INSERT INTO positions (ticker, side, title, quantity, cost) VALUES (?, ?, ?, ?, ?)"
+                    " ON CONFLICT (ticker, side) DO UPDATE SET quantity = quantity + excluded.quantity,"
+                    " cost = cost + excluded.cost, title = excluded.title",
+                    (trade["ticker"], trade["side"], trade["title"], trade["quantity"], cost),
+                )
+                balance = db.execute("SELECT balance FROM account WHERE id = 1").fetchone()[0]
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return balance
+
+    def _positions(self) -> List[dict]:
+        rows = self._db.execute(
+            "SELECT ticker, title, side, quantity, cost FROM positions ORDER BY cost DESC"
+        ).fetchall()
+        return [
+            {**dict(row), "price": row["cost"] / row["quantity"] if row["quantity"] else 0}
+            for row in rows
+        ]
+
+    def positions(self) -> List[dict]:
+        with self._lock:
+            return self._positions()
+
+    def portfolio(self) -> dict:
+        """Balance, precomputed totals and aggregated positions, read in one transaction"""
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN")
+            try:
+                account = db.execute(
+                    "SELECT balance, starting_balance, trade_count, total_cost FROM account WHERE id = 1"
+                ).fetchone()
+                positions = self._positions()
+            finally:
+                db.execute("COMMIT")
+        return {**dict(account), "positions": positions}
+
+    def trades(self, limit: int = 100) -> List[dict]:
+        """Most recent trades since the last reset"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, ticker, title, side, price, quantity, cost, timestamp FROM trades"
+                " WHERE epoch = (SELECT epoch FROM account WHERE id = 1) ORDER BY id DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def reset(self) -> float:
+        """Start a new epoch: record the reset, clear positions and restore the starting balance"""
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    "INSERT INTO resets (epoch, balance, trade_count, reset_at)"
+                    " SELECT epoch, balance, trade_count, ? FROM account WHERE id = 1",
+                    (datetime.utcnow().isoformat(),),
+                )
+                db.execute("DELETE FROM positions")
+                db.execute(
+                    "UPDATE account SET balance = starting_balance, trade_count = 0, total_cost = 0,"
+                    " epoch = epoch + 1 WHERE id = 1"
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        return self.starting_balance
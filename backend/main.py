@@ -3,19 +3,80 @@ Kalshi+ Backend API
 AI-powered prediction market analysis platform
 """
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import Optional, List
-import httpx
+from contextlib import aclosing, asynccontextmanager
+import asyncio
+import logging
 import os
+import time
 from datetime import datetime, timedelta
 import json
+import numpy as np
+
+from snapshot import SnapshotCache
+from shared import FileBus, LeaderLock
+from upstream import UpstreamClient
+from ingest import iter_markets, iter_pages
+from store import BUCKET_EDGES, BUCKET_NAMES
+from search import SearchIndex
+from categories import SERIES_FILTERS, classify
+from analysis_cache import AnalysisCache
+from feed import FeedFilter, MarketFeed
+from alerts import AlertEngine, QueueNotifier, WebhookNotifier
+from ledger import InsufficientBalance, PaperLedger
+from risk import mark_positions, simulate_outcomes
+from timeseries import TimeSeriesStore
+from arbitrage import ArbitrageScanner
+from orderbook import OrderBookManager
+from suggestions import SuggestionIndex
+from kelly import DEFAULT_MAX_TOTAL, best_side, constrained_kelly, kelly_fraction
+from edge import recommend
+from backtest.recorder import SnapshotRecorder
+from responses import DefaultResponse, ResponseCache, project
+from metrics import REGISTRY, SamplingProfiler, fallbacks, logger, record_error, stage, stage_seconds
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await kalshi.start()
+    await anthropic.start()
+    ledger.open()
+    analysis_cache.open()
+    timeseries.open()
+    alert_engine.open()
+    if snapshot_leader is not None and snapshot_leader.acquire():
+        logger.info("Elected snapshot leader (pid %d)", os.getpid())
+    refresher = asyncio.create_task(market_cache.run(MARKET_REFRESH_INTERVAL))
+    event_refresher = asyncio.create_task(run_event_refresher(EVENT_REFRESH_INTERVAL))
+    book_refresher = asyncio.create_task(orderbooks.run(ORDERBOOK_REFRESH_INTERVAL))
+    # Warm the unfiltered snapshot so the first dashboard load is a cache hit
+    market_cache.refresh("")
+    yield
+    refresher.cancel()
+    event_refresher.cancel()
+    book_refresher.cancel()
+    await kalshi.aclose()
+    await anthropic.aclose()
+    await webhooks.aclose()
+    ledger.close()
+    analysis_cache.close()
+    timeseries.close()
+    snapshot_recorder.close()
+    alert_engine.close()
+    if snapshot_leader is not None:
+        snapshot_leader.release()
+
 
 app = FastAPI(
     title="Kalshi+ API",
     description="AI-powered prediction market analysis",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=DefaultResponse,
+    lifespan=lifespan,
 )
 
 # CORS for frontend
@@ -28,9 +89,116 @@ app.add_middleware(
 )
 
 # Kalshi API base URL
-KALSHI_API = "https://api.elections.kalshi.com/trade-api/v2"
+KALSHI_API = os.getenv("KALSHI_API_URL", "https://api.elections.kalshi.com/trade-api/v2")
+ANTHROPIC_API = os.getenv("ANTHROPIC_API_URL", "https://api.anthropic.com/v1")
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
 
+# AI analysis cache
+ANALYSIS_CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL", "900"))
+ANALYSIS_PRICE_THRESHOLD = float(os.getenv("ANALYSIS_PRICE_THRESHOLD", "0.03"))
+ANALYSIS_CACHE_DB = os.getenv("ANALYSIS_CACHE_DB", "")
+ANALYSIS_CONCURRENCY = int(os.getenv("ANALYSIS_CONCURRENCY", "8"))
+ANALYSIS_BATCH_MAX = int(os.getenv("ANALYSIS_BATCH_MAX", "100"))
+KELLY_BATCH_MAX = int(os.getenv("KELLY_BATCH_MAX", "5000"))
+
+# Paper trading
+PAPER_DB_PATH = os.getenv("PAPER_DB_PATH", "paper_trading.db")
+PAPER_STARTING_BALANCE = float(os.getenv("PAPER_STARTING_BALANCE", "10000"))
+
+# Price/volume history, sampled from the full-market snapshot
+TIMESERIES_INTERVAL = float(os.getenv("TIMESERIES_INTERVAL", "60"))
+TIMESERIES_POINTS = int(os.getenv("TIMESERIES_POINTS", "120"))
+TIMESERIES_WINDOW = int(os.getenv("TIMESERIES_WINDOW", "30"))
+TIMESERIES_DB = os.getenv("TIMESERIES_DB", "")
+TIMESERIES_RETENTION = float(os.getenv("TIMESERIES_RETENTION", str(7 * 86400)))
+VOLUME_SPIKE_Z = float(os.getenv("VOLUME_SPIKE_Z", "2"))
+
+# Arbitrage scanner
+ARBITRAGE_CONTRACTS = int(os.getenv("ARBITRAGE_CONTRACTS", "100"))
+ARBITRAGE_MIN_PROFIT = float(os.getenv("ARBITRAGE_MIN_PROFIT", "0"))
+EVENT_REFRESH_INTERVAL = float(os.getenv("EVENT_REFRESH_INTERVAL", "600"))
+
+# Order books for watched markets and (optionally) the top N by volume
+ORDERBOOK_TOP_N = int(os.getenv("ORDERBOOK_TOP_N", "0"))
+ORDERBOOK_DEPTH = int(os.getenv("ORDERBOOK_DEPTH", "0"))
+ORDERBOOK_REFRESH_INTERVAL = float(os.getenv("ORDERBOOK_REFRESH_INTERVAL", "10"))
+ORDERBOOK_WATCH_TTL = float(os.getenv("ORDERBOOK_WATCH_TTL", "300"))
+
+# Price alerts
+ALERT_WEBHOOK_URL = os.getenv("ALERT_WEBHOOK_URL", "")
+ALERTS_DB = os.getenv("ALERTS_DB", "")
+
+# Snapshot recording for backtests (off unless a directory is set)
+SNAPSHOT_RECORD_DIR = os.getenv("SNAPSHOT_RECORD_DIR", "")
+SNAPSHOT_RECORD_INTERVAL = float(os.getenv("SNAPSHOT_RECORD_INTERVAL", "60"))
+
+# Multi-worker deployments: "shared" elects one leader process to poll Kalshi
+# and publish snapshots under SNAPSHOT_SHARED_DIR for the other workers
+SNAPSHOT_MODE = os.getenv("SNAPSHOT_MODE", "local")
+SNAPSHOT_SHARED_DIR = os.getenv("SNAPSHOT_SHARED_DIR", "/tmp/kalshi-plus")
+
+# Observability
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+PROFILER_ENABLED = os.getenv("PROFILER_ENABLED", "0") == "1"
+# Seconds a stop request waits for the sampler thread to exit
+PROFILER_STOP_TIMEOUT = 1.0
+logging.basicConfig(level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+# One INFO line per upstream request is too noisy
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
+# Upstream connection pools
+UPSTREAM_MAX_CONNECTIONS = int(os.getenv("UPSTREAM_MAX_CONNECTIONS", "20"))
+UPSTREAM_MAX_KEEPALIVE = int(os.getenv("UPSTREAM_MAX_KEEPALIVE", "10"))
+UPSTREAM_HTTP2 = os.getenv("UPSTREAM_HTTP2", "1") == "1"
+UPSTREAM_RETRIES = int(os.getenv("UPSTREAM_RETRIES", "3"))
+
+kalshi = UpstreamClient(
+    "kalshi",
+    KALSHI_API,
+    timeout=float(os.getenv("KALSHI_TIMEOUT", "30")),
+    max_connections=UPSTREAM_MAX_CONNECTIONS,
+    max_keepalive=UPSTREAM_MAX_KEEPALIVE,
+    http2=UPSTREAM_HTTP2,
+    retries=UPSTREAM_RETRIES,
+)
+anthropic = UpstreamClient(
+    "anthropic",
+    ANTHROPIC_API,
+    timeout=float(os.getenv("ANTHROPIC_TIMEOUT", "60")),
+    max_connections=UPSTREAM_MAX_CONNECTIONS,
+    max_keepalive=UPSTREAM_MAX_KEEPALIVE,
+    http2=UPSTREAM_HTTP2,
+    retries=UPSTREAM_RETRIES,
+    headers={
+        "x-api-key": ANTHROPIC_API_KEY,
+        "anthropic-version": "2023-06-01",
+        "content-type": "application/json",
+    },
+)
+
+webhooks = UpstreamClient("webhooks", "", timeout=10.0, retries=2)
+
+# Bounds concurrent LLM calls across all requests
+llm_slots = asyncio.Semaphore(ANALYSIS_CONCURRENCY)
+
+analysis_cache = AnalysisCache(
+    ttl=ANALYSIS_CACHE_TTL,
+    price_threshold=ANALYSIS_PRICE_THRESHOLD,
+    db_path=ANALYSIS_CACHE_DB,
+)
+
+# Market snapshot cache (seconds)
+MARKET_CACHE_TTL = float(os.getenv("MARKET_CACHE_TTL", "15"))
+MARKET_CACHE_MAX_STALE = float(os.getenv("MARKET_CACHE_MAX_STALE", "300"))
+MARKET_REFRESH_INTERVAL = float(os.getenv("MARKET_REFRESH_INTERVAL", "5"))
+
+RESPONSE_CACHE_ENTRIES = int(os.getenv("RESPONSE_CACHE_ENTRIES", "256"))
+
+# Cursor-paginated ingestion
+MARKET_PAGE_SIZE = int(os.getenv("MARKET_PAGE_SIZE", "1000"))
+MARKET_MAX_PAGES = int(os.getenv("MARKET_MAX_PAGES", "50"))
+MARKET_FETCH_CONCURRENCY = int(os.getenv("MARKET_FETCH_CONCURRENCY", "4"))
+
 # Categories mapping
 CATEGORIES = {
     "trending": {"name": "Trending", "icon": "🔥"},
@@ -49,10 +217,8 @@ CATEGORIES = {
     "world": {"name": "World", "icon": "🌐"},
 }
 
-# In-memory storage (replace with database in production)
-paper_trades = []
-alerts = []
-portfolio = {"balance": 10000, "positions": []}
+# Paper trading ledger, shared by every worker through SQLite
+ledger = PaperLedger(PAPER_DB_PATH, starting_balance=PAPER_STARTING_BALANCE)
 
 
 class Market(BaseModel):
@@ -77,6 +243,34 @@ class AIAnalysis(BaseModel):
     risk_factors: List[str]
 
 
+class BatchAnalysisRequest(BaseModel):
+    tickers: List[str]
+    format: str = "ndjson"  # ndjson or sse
+
+
+class SuggestionRule(BaseModel):
+    name: str
+    min_probability: float = 0
+    max_probability: float = 1
+    min_volume: int = 1000
+    max_spread: float = 1
+    reason: str = ""
+
+
+class KellyBet(BaseModel):
+    ticker: str
+    probability: Optional[float] = None  # model YES probability; cached AI analysis if omitted
+    yes_price: Optional[float] = Field(default=None, gt=0, lt=1)  # contract prices; executable/snapshot prices if omitted
+    no_price: Optional[float] = Field(default=None, gt=0, lt=1)
+
+
+class KellyBatchRequest(BaseModel):
+    bets: List[KellyBet]
+    bankroll: float = Field(default=1000, gt=0)
+    multiplier: float = Field(default=1.0, gt=0)  # 0.5 for half Kelly
+    max_exposure: float = Field(default=DEFAULT_MAX_TOTAL, gt=0, le=1)  # fraction of bankroll across all bets
+
+
 class PaperTrade(BaseModel):
     ticker: str
     title: str
@@ -101,7 +295,48 @@ async def root():
 
 @app.get("/api/health")
 async def health():
-    return {"status": "healthy", "version": "2.0.0"}
+    return {
+        "status": "healthy",
+        "version": "2.0.0",
+        "snapshot": {"mode": SNAPSHOT_MODE, "leader": market_cache.is_leader, "pid": os.getpid()},
+    }
+
+
+@app.get("/api/health/upstream")
+async def upstream_health():
+    """Connection pool saturation and request counters per upstream"""
+    return {"kalshi": kalshi.stats(), "anthropic": anthropic.stats()}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text exposition of every registered metric"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/debug/profiler")
+async def profiler_report(format: str = "json", limit: int = Query(default=50, ge=1)):
+    """Hottest sampled stacks; `format=folded` for flamegraph tools"""
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler disabled")
+    if format == "folded":
+        return PlainTextResponse(profiler.folded())
+    return profiler.report(limit)
+
+
+@app.post("/api/debug/profiler/{action}")
+async def profiler_control(action: str, interval: Optional[float] = Query(default=None, gt=0, le=1)):
+    """Start or stop the sampling profiler"""
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler disabled")
+    if action == "start":
+        profiler.start(interval)
+    elif action == "stop":
+        # The sampler finishes its current sweep first; wait for it off the loop
+        await asyncio.to_thread(profiler.stop, PROFILER_STOP_TIMEOUT)
+    else:
+        raise HTTPException(status_code=400, detail="Action must be start or stop")
+    return {"running": profiler.running, "interval": profiler.interval}
 
 
 @app.get("/api/categories")
@@ -109,119 +344,348 @@ async def get_categories():
     return CATEGORIES
 
 
+BUCKET_RANGES = {
+    name: (float(BUCKET_EDGES[i]), float(BUCKET_EDGES[i + 1]))
+    for i, name in enumerate(BUCKET_NAMES)
+}
+
+
+def transform_market(m: dict) -> dict:
+    """Convert a raw Kalshi market into our format.
+
+    A side with nothing offered is shown at 0.50; `yes_quoted`/`no_quoted`
+    say whether the price is a real ask, so pricing code can skip it.
+    """
+    yes_price = m.get("yes_ask", 50) / 100 if m.get("yes_ask") else 0.50
+    no_price = m.get("no_ask", 50) / 100 if m.get("no_ask") else 0.50
+    return {
+        "ticker": m.get("ticker", ""),
+        "event_ticker": m.get("event_ticker", ""),
+        "title": m.get("title", "Unknown"),
+        "yes_price": yes_price,
+        "no_price": no_price,
+        "volume": m.get("volume", 0) or 0,
+        "close_time": m.get("close_time"),
+        "category": classify(m.get("ticker", ""), m.get("title", "")),
+        "status": m.get("status", "open"),
+        "spread": abs(yes_price - (1 - no_price)),
+        "yes_quoted": bool(m.get("yes_ask")),
+        "no_quoted": bool(m.get("no_ask")),
+    }
+
+
+def stream_markets(series_ticker: str, transform=transform_market):
+    """Async iterator over every open market for a series filter ("" for all)"""
+    return iter_markets(
+        kalshi,
+        series_ticker,
+        transform,
+        page_size=MARKET_PAGE_SIZE,
+        max_pages=MARKET_MAX_PAGES,
+        concurrency=MARKET_FETCH_CONCURRENCY,
+    )
+
+
+async def fetch_market_snapshot(series_ticker: str) -> List[dict]:
+    """Fetch all open markets for a series filter ("" for all) and transform them.
+
+    Fetching and transforming interleave page by page, so transform time
+    is summed per market and reported apart from the fetch.
+    """
+    transform_seconds = 0.0
+
+    def timed_transform(m: dict) -> dict:
+        nonlocal transform_seconds
+        start = time.perf_counter()
+        market = transform_market(m)
+        transform_seconds += time.perf_counter() - start
+        return market
+
+    start = time.perf_counter()
+    markets = [m async for m in stream_markets(series_ticker, timed_transform)]
+    stage_seconds.observe(transform_seconds, stage="transform")
+    stage_seconds.observe(time.perf_counter() - start - transform_seconds, stage="fetch")
+    return markets
+
+
+def market_matches(m: dict, min_volume: int, search_lower: Optional[str], bucket_range) -> bool:
+    """Apply the volume, search and bucket filters to one market"""
+    if m["volume"] < min_volume:
+        return False
+
+    if search_lower and search_lower not in m["title"].lower():
+        return False
+
+    # Bucket filter
+    if bucket_range:
+        low, high = bucket_range
+        if not (low <= m["yes_price"] < high):
+            return False
+
+    return True
+
+
+def category_series(category: Optional[str]) -> str:
+    """Series filter key for a category ("" for all markets)"""
+    if category and category not in ["trending", "new"]:
+        return SERIES_FILTERS.get(category, "")
+    return ""
+
+
+if SNAPSHOT_MODE == "shared":
+    snapshot_bus = FileBus(SNAPSHOT_SHARED_DIR)
+    snapshot_leader = LeaderLock(os.path.join(SNAPSHOT_SHARED_DIR, "leader.lock"))
+else:
+    snapshot_bus = snapshot_leader = None
+
+market_cache = SnapshotCache(
+    fetch_market_snapshot,
+    ttl=MARKET_CACHE_TTL,
+    max_stale=MARKET_CACHE_MAX_STALE,
+    bus=snapshot_bus,
+    leader=snapshot_leader,
+)
+market_feed = MarketFeed(market_cache)
+
+alert_notifier = QueueNotifier()
+alert_engine = AlertEngine(
+    [alert_notifier] + ([WebhookNotifier(ALERT_WEBHOOK_URL, webhooks)] if ALERT_WEBHOOK_URL else []),
+    db_path=ALERTS_DB,
+)
+market_cache.listeners.append(alert_engine.on_refresh)
+
+timeseries = TimeSeriesStore(
+    capacity=TIMESERIES_POINTS,
+    window=TIMESERIES_WINDOW,
+    interval=TIMESERIES_INTERVAL,
+    db_path=TIMESERIES_DB,
+    retention=TIMESERIES_RETENTION,
+    # Every worker samples, only the snapshot leader writes TIMESERIES_DB
+    persist=lambda: market_cache.is_leader,
+)
+market_cache.listeners.append(timeseries.on_refresh)
+# History is sampled from the unfiltered snapshot, so keep it warm
+market_cache.pinned.add("")
+
+orderbooks = OrderBookManager(
+    kalshi,
+    market_cache,
+    top_n=ORDERBOOK_TOP_N,
+    depth=ORDERBOOK_DEPTH,
+    watch_ttl=ORDERBOOK_WATCH_TTL,
+)
+
+arbitrage = ArbitrageScanner(
+    contracts=ARBITRAGE_CONTRACTS,
+    min_profit=ARBITRAGE_MIN_PROFIT,
+    depth=orderbooks.depth_at,
+)
+market_cache.listeners.append(arbitrage.on_refresh)
+orderbooks.listeners.append(arbitrage.reprice)
+
+
+def executable_quote(ticker: str) -> Optional[dict]:
+    """Bid/ask and spread from the order book when the ticker is tracked"""
+    book = orderbooks.get(ticker)
+    if book is None or book.spread() is None:
+        return None
+    return {
+        "yes_bid": book.best_bid("yes") / 100,
+        "yes_ask": book.best_ask("yes") / 100,
+        "book_spread": book.spread(),
+    }
+
+
+# Encoded /api/markets bodies, reused until their snapshot refreshes
+market_responses = ResponseCache(max_entries=RESPONSE_CACHE_ENTRIES)
+
+suggestion_index = SuggestionIndex(quote=executable_quote)
+market_cache.listeners.append(suggestion_index.on_refresh)
+orderbooks.listeners.append(suggestion_index.reprice)
+
+
+def cached_probability(ticker: str) -> Optional[float]:
+    cached = analysis_cache.peek(ticker)
+    return cached.get("ai_probability") if cached else None
+
+
+snapshot_recorder = SnapshotRecorder(
+    SNAPSHOT_RECORD_DIR,
+    interval=SNAPSHOT_RECORD_INTERVAL,
+    probability=cached_probability,
+    active=lambda: market_cache.is_leader,
+)
+market_cache.listeners.append(snapshot_recorder.on_refresh)
+
+# Sampling profiler, idle until started through /api/debug/profiler/start
+profiler = SamplingProfiler()
+
+REGISTRY.gauge(
+    "kalshi_plus_upstream_in_flight", "Upstream requests in flight", ["upstream"],
+    lambda: {(c.name,): c.in_flight for c in (kalshi, anthropic)},
+)
+REGISTRY.gauge(
+    "kalshi_plus_snapshot_markets", "Markets in each cached snapshot", ["key"],
+    lambda: {(key,): len(market_cache.peek(key).store) for key in market_cache.keys()},
+)
+REGISTRY.gauge(
+    "kalshi_plus_snapshot_age_seconds", "Age of each cached snapshot", ["key"],
+    lambda: {(key,): round(market_cache.peek(key).age(), 3) for key in market_cache.keys()},
+)
+
+
+async def refresh_event_flags():
+    """Load which open events have mutually exclusive outcomes"""
+    flags = {}
+    params = {"limit": 200, "status": "open"}
+    async for page in iter_pages(kalshi, "/events", "events", params, MARKET_MAX_PAGES):
+        for event in page:
+            flags[event.get("event_ticker", "")] = bool(event.get("mutually_exclusive"))
+    arbitrage.set_exclusive(flags)
+
+
+async def run_event_refresher(interval: float):
+    while True:
+        try:
+            await refresh_event_flags()
+        except Exception:
+            record_error("events", "Error refreshing events")
+        await asyncio.sleep(interval)
+
+
 @app.get("/api/markets")
 async def get_markets(
+    request: Request,
     category: Optional[str] = None,
     search: Optional[str] = None,
     sort_by: str = "volume",
     sort_order: str = "desc",
     limit: int = 100,
     min_volume: int = 0,
-    bucket: Optional[str] = None
+    bucket: Optional[str] = None,
+    fields: Optional[str] = None,
 ):
-    """Fetch markets from Kalshi API with filtering"""
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # Fetch events and markets
-            params = {"limit": 200, "status": "open"}
-            
-            if category and category not in ["trending", "new"]:
-                # Map category to Kalshi series_ticker prefix
-                category_map = {
-                    "politics": "PRES,SENATE,HOUSE,GOV",
-                    "sports": "NFL,NBA,MLB,NHL,SOCCER",
-                    "crypto": "BTC,ETH,CRYPTO",
-                    "economics": "GDP,CPI,FOMC,FED",
-                    "climate": "CLIMATE,WEATHER",
-                    "companies": "AAPL,GOOGL,TSLA,AMZN",
-                    "financials": "SPX,NDX,DJI",
-                    "tech": "AI,TECH",
-                    "health": "COVID,FDA",
-                }
-                if category in category_map:
-                    params["series_ticker"] = category_map[category]
-            
-            response = await client.get(f"{KALSHI_API}/markets", params=params)
-            
-            if response.status_code != 200:
-                # Return sample data if API fails
-                return get_sample_markets(category, search, sort_by, sort_order, limit)
-            
-            data = response.json()
-            markets = data.get("markets", [])
-            
-            # Transform to our format
-            result = []
-            for m in markets:
-                yes_price = m.get("yes_ask", 50) / 100 if m.get("yes_ask") else 0.50
-                no_price = m.get("no_ask", 50) / 100 if m.get("no_ask") else 0.50
-                volume = m.get("volume", 0) or 0
-                
-                if volume < min_volume:
-                    continue
-                
-                if search and search.lower() not in m.get("title", "").lower():
-                    continue
-                
-                # Bucket filter
-                if bucket:
-                    prob = yes_price
-                    bucket_ranges = {
-                        "longshot": (0, 0.15),
-                        "unlikely": (0.15, 0.35),
-                        "uncertain": (0.35, 0.65),
-                        "likely": (0.65, 0.85),
-                        "favorite": (0.85, 1.0),
-                    }
-                    if bucket in bucket_ranges:
-                        low, high = bucket_ranges[bucket]
-                        if not (low <= prob < high):
-                            continue
-                
-                result.append({
-                    "ticker": m.get("ticker", ""),
-                    "title": m.get("title", "Unknown"),
-                    "yes_price": yes_price,
-                    "no_price": no_price,
-                    "volume": volume,
-                    "close_time": m.get("close_time"),
-                    "category": detect_category(m.get("title", "")),
-                    "status": m.get("status", "open"),
-                    "spread": abs(yes_price - (1 - no_price)),
-                })
-            
-            # Sort
-            reverse = sort_order == "desc"
-            if sort_by == "volume":
-                result.sort(key=lambda x: x["volume"], reverse=reverse)
-            elif sort_by == "probability":
-                result.sort(key=lambda x: x["yes_price"], reverse=reverse)
-            elif sort_by == "spread":
-                result.sort(key=lambda x: x["spread"], reverse=reverse)
-            elif sort_by == "closing":
-                result.sort(key=lambda x: x["close_time"] or "", reverse=not reverse)
-            
-            return result[:limit]
-            
-    except Exception as e:
-        print(f"Error fetching markets: {e}")
+    """Fetch markets from the cached Kalshi snapshot with filtering.
+
+    The encoded body is cached per query until the snapshot refreshes;
+    `fields=ticker,yes_price` keeps only the listed fields.
+    """
+    snapshot = await market_cache.get(category_series(category))
+    if snapshot is None:
+        # Return sample data if API fails and nothing is cached
+        fallbacks.inc(kind="sample_markets")
+        logger.warning("No market snapshot for %r, serving sample markets", category)
+        return project(get_sample_markets(category, search, sort_by, sort_order, limit), fields)
+
+    key = (snapshot.key, search, sort_by, sort_order, limit, min_volume, bucket, fields)
+    return market_responses.respond(
+        request,
+        key,
+        snapshot.fetched_at,
+        lambda: project(
+            query_snapshot(snapshot, search, sort_by, sort_order, limit, min_volume, bucket), fields
+        ),
+    )
+
+
+def query_snapshot(snapshot, search, sort_by, sort_order, limit, min_volume, bucket) -> List[dict]:
+    with stage("filter_sort"):
+        return snapshot.store.query(
+            min_volume=min_volume,
+            search=search,
+            bucket=bucket,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            limit=limit,
+        )
+
+
+async def query_markets(
+    category: Optional[str] = None,
+    search: Optional[str] = None,
+    sort_by: str = "volume",
+    sort_order: str = "desc",
+    limit: int = 100,
+    min_volume: int = 0,
+    bucket: Optional[str] = None
+) -> List[dict]:
+    """Filtered markets as dicts, for use inside other endpoints"""
+    snapshot = await market_cache.get(category_series(category))
+    if snapshot is None:
+        fallbacks.inc(kind="sample_markets")
         return get_sample_markets(category, search, sort_by, sort_order, limit)
+    return query_snapshot(snapshot, search, sort_by, sort_order, limit, min_volume, bucket)
+
+
+@app.get("/api/markets/stream")
+async def stream_markets_ndjson(
+    category: Optional[str] = None,
+    search: Optional[str] = None,
+    limit: Optional[int] = None,
+    min_volume: int = 0,
+    bucket: Optional[str] = None
+):
+    """Stream every matching open market from Kalshi as NDJSON, in upstream order"""
+    search_lower = search.lower() if search else None
+    bucket_range = BUCKET_RANGES.get(bucket) if bucket else None
+
+    async def lines():
+        sent = 0
+        try:
+            async with aclosing(stream_markets(category_series(category))) as markets:
+                async for m in markets:
+                    if not market_matches(m, min_volume, search_lower, bucket_range):
+                        continue
+                    yield json.dumps(m) + "\n"
+                    sent += 1
+                    if limit is not None and sent >= limit:
+                        break
+        except Exception:
+            record_error("market_stream", "Error streaming markets")
+            yield json.dumps({"error": "upstream unavailable"}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.websocket("/ws/markets")
+async def market_updates(websocket: WebSocket):
+    """Live markets: one snapshot for the subscribed filter, then deltas per refresh.
+
+    Filters come from the query string (category, bucket, search, min_volume,
+    limit) and can be replaced by sending {"action": "subscribe", ...}.
+    """
+    await websocket.accept()
 
+    def parse_filter(params) -> FeedFilter:
+        return FeedFilter(
+            key=category_series(params.get("category")),
+            bucket=params.get("bucket"),
+            search=params.get("search") or None,
+            min_volume=int(params.get("min_volume") or 0),
+            limit=int(params["limit"]) if params.get("limit") else None,
+        )
 
-def detect_category(title: str) -> str:
-    """Detect category from market title"""
-    title_lower = title.lower()
-    if any(w in title_lower for w in ["trump", "biden", "president", "senate", "congress", "election"]):
-        return "politics"
-    if any(w in title_lower for w in ["bitcoin", "btc", "ethereum", "crypto"]):
-        return "crypto"
-    if any(w in title_lower for w in ["nfl", "nba", "mlb", "super bowl", "world series"]):
-        return "sports"
-    if any(w in title_lower for w in ["fed", "rate", "gdp", "inflation", "cpi"]):
-        return "economics"
-    if any(w in title_lower for w in ["tesla", "apple", "google", "amazon", "microsoft"]):
-        return "companies"
-    return "general"
+    subscription = await market_feed.subscribe(parse_filter(websocket.query_params))
+    receiver = asyncio.create_task(websocket.receive_json())
+    try:
+        while True:
+            sender = asyncio.create_task(subscription.next_message())
+            done, _ = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if sender in done:
+                await websocket.send_text(sender.result())
+            else:
+                sender.cancel()
+            if receiver in done:
+                message = receiver.result()
+                if message.get("action") == "subscribe":
+                    market_feed.unsubscribe(subscription)
+                    subscription = await market_feed.subscribe(parse_filter(message))
+                receiver = asyncio.create_task(websocket.receive_json())
+    except (WebSocketDisconnect, ValueError):
+        pass
+    finally:
+        receiver.cancel()
+        market_feed.unsubscribe(subscription)
 
 
 def get_sample_markets(category=None, search=None, sort_by="volume", sort_order="desc", limit=100):
@@ -246,7 +710,8 @@ def get_sample_markets(category=None, search=None, sort_by="volume", sort_order=
         samples = [s for s in samples if s["category"] == category]
     
     if search:
-        samples = [s for s in samples if search.lower() in s["title"].lower()]
+        matches = SearchIndex(samples).matching_tickers(search)
+        samples = [s for s in samples if s["ticker"] in matches]
     
     return samples[:limit]
 
@@ -254,15 +719,19 @@ def get_sample_markets(category=None, search=None, sort_by="volume", sort_order=
 @app.get("/api/markets/{ticker}")
 async def get_market(ticker: str):
     """Get single market details"""
+    market = market_cache.find(ticker)
+    if market is not None:
+        return market
+
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(f"{KALSHI_API}/markets/{ticker}")
-            if response.status_code == 200:
-                return response.json().get("market", {})
-    except:
-        pass
+        response = await kalshi.get(f"/markets/{ticker}")
+        if response.status_code == 200:
+            return transform_market(response.json().get("market", {}))
+    except Exception:
+        record_error("market_lookup", "Error fetching market %s", ticker)
     
     # Return sample
+    fallbacks.inc(kind="sample_market")
     return {
         "ticker": ticker,
         "title": f"Market {ticker}",
@@ -272,12 +741,49 @@ async def get_market(ticker: str):
     }
 
 
+@app.post("/api/analyze/batch")
+async def analyze_batch(request: BatchAnalysisRequest):
+    """AI analysis of many markets, streamed back as each one finishes"""
+    tickers = list(dict.fromkeys(request.tickers))
+    if len(tickers) > ANALYSIS_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {ANALYSIS_BATCH_MAX} tickers per batch")
+
+    # One snapshot read covers every ticker it already knows
+    await market_cache.get("")
+    markets = {t: market_cache.find(t) for t in tickers}
+
+    async def analyze_one(ticker: str) -> dict:
+        market = markets[ticker] or await get_market(ticker)
+        return await analyze(ticker, market)
+
+    sse = request.format == "sse"
+
+    async def results():
+        tasks = [asyncio.create_task(analyze_one(t)) for t in tickers]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                result = await next_done
+                yield f"event: analysis\ndata: {json.dumps(result)}\n\n" if sse else json.dumps(result) + "\n"
+            if sse:
+                yield "event: done\ndata: {}\n\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    media_type = "text/event-stream" if sse else "application/x-ndjson"
+    return StreamingResponse(results(), media_type=media_type)
+
+
 @app.post("/api/analyze/{ticker}")
 async def analyze_market(ticker: str):
     """AI analysis of a market"""
     # Get market data first
     market = await get_market(ticker)
-    
+    return await analyze(ticker, market)
+
+
+async def analyze(ticker: str, market: dict) -> dict:
+    """Analysis for a market, served from the cache when still valid"""
     if not ANTHROPIC_API_KEY:
         # Return mock analysis if no API key
         market_prob = market.get("yes_price", 0.5)
@@ -290,7 +796,7 @@ async def analyze_market(ticker: str):
             "ai_probability": round(ai_prob, 2),
             "market_probability": market_prob,
             "edge": round(edge, 2),
-            "recommendation": "YES" if edge > 0.05 else ("NO" if edge < -0.05 else "PASS"),
+            "recommendation": recommend(edge),
             "reasoning": "AI analysis requires ANTHROPIC_API_KEY to be set. This is a placeholder analysis based on market dynamics.",
             "confidence": "medium",
             "risk_factors": [
@@ -300,9 +806,17 @@ async def analyze_market(ticker: str):
             ]
         }
     
+    return await analysis_cache.get_or_compute(
+        ticker,
+        market.get("yes_price", 0.5),
+        lambda: run_analysis(ticker, market),
+    )
+
+
+async def run_analysis(ticker: str, market: dict):
+    """Ask Claude for an analysis; returns (analysis, cacheable)"""
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            prompt = f"""Analyze this prediction market and provide your independent probability estimate:
+        prompt = f"""Analyze this prediction market and provide your independent probability estimate:
 
 Market: {market.get('title', ticker)}
 Current YES price: {market.get('yes_price', 0.5):.0%}
@@ -319,47 +833,45 @@ Provide:
 Respond in JSON format:
 {{"probability": 45, "recommendation": "YES", "reasoning": "...", "confidence": "medium", "risk_factors": ["...", "..."]}}"""
 
-            response = await client.post(
-                "https://api.anthropic.com/v1/messages",
-                headers={
-                    "x-api-key": ANTHROPIC_API_KEY,
-                    "anthropic-version": "2023-06-01",
-                    "content-type": "application/json",
-                },
-                json={
-                    "model": "claude-sonnet-4-20250514",
-                    "max_tokens": 500,
-                    "messages": [{"role": "user", "content": prompt}]
-                }
-            )
+        async with llm_slots:
+            with stage("llm", ticker=ticker):
+                response = await anthropic.post(
+                    "/messages",
+                    json={
+                        "model": "claude-sonnet-4-20250514",
+                        "max_tokens": 500,
+                        "messages": [{"role": "user", "content": prompt}]
+                    }
+                )
+        
+        if response.status_code == 200:
+            result = response.json()
+            content = result["content"][0]["text"]
             
-            if response.status_code == 200:
-                result = response.json()
-                content = result["content"][0]["text"]
+            # Parse JSON from response
+            import re
+            json_match = re.search(r'\{.*\}', content, re.DOTALL)
+            if json_match:
+                analysis = json.loads(json_match.group())
+                ai_prob = analysis["probability"] / 100
+                market_prob = market.get("yes_price", 0.5)
                 
-                # Parse JSON from response
-                import re
-                json_match = re.search(r'\{.*\}', content, re.DOTALL)
-                if json_match:
-                    analysis = json.loads(json_match.group())
-                    ai_prob = analysis["probability"] / 100
-                    market_prob = market.get("yes_price", 0.5)
-                    
-                    return {
-                        "market_ticker": ticker,
-                        "market_title": market.get("title", ticker),
-                        "ai_probability": ai_prob,
-                        "market_probability": market_prob,
-                        "edge": round(ai_prob - market_prob, 2),
-                        "recommendation": analysis["recommendation"],
-                        "reasoning": analysis["reasoning"],
-                        "confidence": analysis["confidence"],
-                        "risk_factors": analysis["risk_factors"]
-                    }
-    except Exception as e:
-        print(f"AI analysis error: {e}")
+                return {
+                    "market_ticker": ticker,
+                    "market_title": market.get("title", ticker),
+                    "ai_probability": ai_prob,
+                    "market_probability": market_prob,
+                    "edge": round(ai_prob - market_prob, 2),
+                    "recommendation": analysis["recommendation"],
+                    "reasoning": analysis["reasoning"],
+                    "confidence": analysis["confidence"],
+                    "risk_factors": analysis["risk_factors"]
+                }, True
+    except Exception:
+        record_error("analysis", "AI analysis of %s failed", ticker)
     
     # Fallback
+    fallbacks.inc(kind="analysis")
     return {
         "market_ticker": ticker,
         "market_title": market.get("title", ticker),
@@ -370,89 +882,83 @@ Respond in JSON format:
         "reasoning": "Unable to complete AI analysis at this time.",
         "confidence": "low",
         "risk_factors": ["Analysis unavailable"]
-    }
+    }, False
 
 
 @app.get("/api/suggestions")
-async def get_suggestions(risk_level: str = "balanced"):
-    """Get AI-curated betting suggestions"""
-    markets = await get_markets(limit=50, min_volume=1000)
-    
-    suggestions = {
-        "balanced": [],
-        "high_potential": [],
-        "low_risk": [],
-        "best_value": [],
-    }
-    
-    for m in markets:
-        prob = m["yes_price"]
-        volume = m["volume"]
-        spread = m.get("spread", 0.02)
-        
-        # Balanced: good probability range with decent volume
-        if 0.3 <= prob <= 0.7 and volume > 5000:
-            suggestions["balanced"].append({**m, "reason": "Good probability range with strong volume"})
-        
-        # High potential: longshots with volume
-        if prob < 0.2 and volume > 2000:
-            suggestions["high_potential"].append({**m, "reason": f"Potential {1/prob:.1f}x return if YES wins"})
-        
-        # Low risk: high probability with tight spread
-        if prob > 0.75 and spread < 0.03:
-            suggestions["low_risk"].append({**m, "reason": "High probability with tight spread"})
-        
-        # Best value: unusual volume at extreme odds
-        if (prob < 0.15 or prob > 0.85) and volume > 10000:
-            suggestions["best_value"].append({**m, "reason": "Unusual volume at extreme odds"})
-    
-    # Limit each category
-    for key in suggestions:
-        suggestions[key] = suggestions[key][:5]
-    
-    return suggestions
+async def get_suggestions(risk_level: Optional[str] = None):
+    """Get AI-curated betting suggestions.
+
+    Every view is always present; with `risk_level` (a built-in view or a
+    user rule name), the other views are left empty.
+    """
+    if risk_level is not None and risk_level not in suggestion_index.views:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Unknown risk_level {risk_level!r}; expected one of {sorted(suggestion_index.views)}",
+        )
+    await market_cache.get("")
+    if risk_level is None:
+        return suggestion_index.all()
+    return {name: suggestion_index.get(name) if name == risk_level else [] for name in suggestion_index.views}
+
+
+@app.get("/api/suggestions/rules")
+async def get_suggestion_rules():
+    return list(suggestion_index.rules.values())
+
+
+@app.post("/api/suggestions/rules")
+async def create_suggestion_rule(rule: SuggestionRule):
+    """Add (or replace) a user-defined suggestion view"""
+    if rule.name in suggestion_index.builtin:
+        raise HTTPException(status_code=400, detail=f"{rule.name} is a built-in view")
+    return suggestion_index.add_rule(rule.dict())
+
+
+@app.delete("/api/suggestions/rules/{name}")
+async def delete_suggestion_rule(name: str):
+    if not suggestion_index.remove_rule(name):
+        raise HTTPException(status_code=404, detail="Rule not found")
+    return {"success": True}
 
 
 @app.get("/api/arbitrage")
-async def get_arbitrage():
-    """Find potential arbitrage opportunities"""
-    markets = await get_markets(limit=100)
-    opportunities = []
-    
-    for m in markets:
-        yes_price = m["yes_price"]
-        no_price = m["no_price"]
-        
-        # Check if YES + NO < 1 (buy both for guaranteed profit)
-        if yes_price + no_price < 0.98:
-            profit = 1 - (yes_price + no_price)
-            opportunities.append({
-                **m,
-                "type": "underpriced",
-                "profit_potential": f"{profit*100:.1f}%",
-                "strategy": f"Buy YES at {yes_price:.0%} + NO at {no_price:.0%} = guaranteed profit"
-            })
-        
-        # Check for wide spreads (market inefficiency)
-        spread = abs(yes_price - (1 - no_price))
-        if spread > 0.05:
-            opportunities.append({
-                **m,
-                "type": "wide_spread",
-                "spread": f"{spread*100:.1f}%",
-                "strategy": "Wide spread indicates potential mispricing"
-            })
-    
-    return opportunities[:20]
+async def get_arbitrage(limit: int = Query(default=20, ge=1, le=200)):
+    """Find arbitrage opportunities, ranked by fee-adjusted profit"""
+    await market_cache.get("")
+    return arbitrage.top(limit)
 
 
 @app.get("/api/volume-spikes")
 async def get_volume_spikes():
-    """Detect unusual volume activity"""
-    markets = await get_markets(sort_by="volume", limit=50)
-    
-    # In production, compare to historical averages
-    # For now, flag high-volume markets
+    """Detect unusual volume activity against each market's own history"""
+    if not timeseries.warmed_up():
+        return await volume_leaders()
+
+    snapshot = await market_cache.get("")
+    if snapshot is None:
+        return []
+    store = snapshot.store
+    spikes = []
+    for ticker, (z, velocity) in timeseries.spikes(store.tickers, VOLUME_SPIKE_Z).items():
+        spikes.append({
+            **store.get(ticker),
+            "spike_magnitude": "high" if z > VOLUME_SPIKE_Z + 1 else "medium",
+            "interpretation": (
+                "Significant trading activity - possible news or insider activity"
+                if z > VOLUME_SPIKE_Z + 1 else "Above average volume"
+            ),
+            "z_score": round(z, 2),
+            "volume_velocity": round(velocity, 1),
+        })
+    spikes.sort(key=lambda s: s["z_score"], reverse=True)
+    return spikes[:15]
+
+
+async def volume_leaders():
+    """Flag high-volume markets while there is too little history for z-scores"""
+    markets = await query_markets(sort_by="volume", limit=50)
     spikes = []
     for m in markets:
         if m["volume"] > 20000:
@@ -471,6 +977,22 @@ async def get_volume_spikes():
     return spikes[:15]
 
 
+@app.get("/api/markets/{ticker}/orderbook")
+async def get_market_orderbook(ticker: str, size: int = Query(default=100, ge=1)):
+    """Bid/ask, mid, depth and fill prices for `size` contracts from the order book"""
+    try:
+        book = await orderbooks.watch(ticker)
+    except Exception as e:
+        raise HTTPException(status_code=502, detail=f"Order book unavailable: {e}")
+    return book.to_dict(size)
+
+
+@app.get("/api/markets/{ticker}/history")
+async def get_market_history(ticker: str):
+    """Sampled price and volume history for a market"""
+    return {"ticker": ticker, "interval": TIMESERIES_INTERVAL, "points": timeseries.history(ticker)}
+
+
 @app.get("/api/kelly")
 async def calculate_kelly(
     probability: float = Query(..., ge=0, le=1),
@@ -507,64 +1029,168 @@ async def calculate_kelly(
     }
 
 
+@app.post("/api/kelly/batch")
+async def calculate_kelly_batch(request: KellyBatchRequest):
+    """Kelly sizing for many markets at once, from contract prices.
+
+    Each market is sized on whichever side has the larger edge. `fraction`
+    is the independent single-bet Kelly fraction; `allocation` is the
+    simultaneous Kelly stake (maximizing the joint log growth of all bets,
+    which can all lose together) with total exposure capped at
+    `max_exposure` of the bankroll, scaled by `multiplier`.
+    """
+    if len(request.bets) > KELLY_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {KELLY_BATCH_MAX} bets per batch")
+    await market_cache.get("")
+
+    rows, skipped = [], []
+    for bet in request.bets:
+        probability = bet.probability
+        if probability is None:
+            cached = analysis_cache.peek(bet.ticker)
+            probability = cached.get("ai_probability") if cached else None
+        yes_price, no_price = bet.yes_price, bet.no_price
+        if yes_price is None or no_price is None:
+            book = orderbooks.get(bet.ticker)
+            market = market_cache.find(bet.ticker)
+            if book is not None and book.best_ask("yes") is not None and book.best_ask("no") is not None:
+                yes_price = yes_price if yes_price is not None else book.best_ask("yes") / 100
+                no_price = no_price if no_price is not None else book.best_ask("no") / 100
+            elif market is not None:
+                yes_price = yes_price if yes_price is not None else market["yes_price"]
+                no_price = no_price if no_price is not None else market["no_price"]
+        if probability is None or yes_price is None or no_price is None:
+            skipped.append({
+                "ticker": bet.ticker,
+                "reason": "no probability" if probability is None else "no price",
+            })
+            continue
+        if not (0 < yes_price < 1 and 0 < no_price < 1):
+            # A settled or unquoted side, e.g. a book with nothing offered
+            skipped.append({"ticker": bet.ticker, "reason": "price out of range"})
+            continue
+        rows.append((bet.ticker, probability, yes_price, no_price))
+
+    if not rows:
+        return {"bankroll": request.bankroll, "bets": [], "skipped": skipped, "total_allocation": 0}
+
+    tickers = [r[0] for r in rows]
+    prob, yes_price, no_price = (np.array([r[i] for r in rows], dtype=np.float64) for i in (1, 2, 3))
+    prob = np.clip(prob, 0, 1)
+    is_yes, win_prob, price, edge = best_side(prob, yes_price, no_price)
+    single = kelly_fraction(win_prob, price)
+    # The joint solve is a few hundred matrix products for large batches
+    joint = await asyncio.to_thread(
+        constrained_kelly, win_prob, price, request.max_exposure / request.multiplier
+    )
+    allocation = joint * request.multiplier * request.bankroll
+    contracts = np.floor(np.divide(allocation, price, out=np.zeros_like(price), where=price > 0))
+
+    bets = [
+        {
+            "ticker": t,
+            "probability": round(p, 4),
+            "side": "YES" if y else "NO",
+            "price": c,
+            "edge": round(e, 4),
+            "fraction": round(f, 4),
+            "allocation_fraction": round(j * request.multiplier, 4),
+            "allocation": round(a, 2),
+            "contracts": int(n),
+        }
+        for t, p, y, c, e, f, j, a, n in zip(
+            tickers, prob.tolist(), is_yes.tolist(), price.tolist(), edge.tolist(),
+            single.tolist(), joint.tolist(), allocation.tolist(), contracts.tolist(),
+        )
+    ]
+    bets.sort(key=lambda b: b["allocation"], reverse=True)
+    return {
+        "bankroll": request.bankroll,
+        "bets": bets,
+        "skipped": skipped,
+        "total_allocation": round(float(allocation.sum()), 2),
+    }
+
+
 # Paper Trading Endpoints
 @app.get("/api/paper/portfolio")
-async def get_paper_portfolio():
-    """Get paper trading portfolio"""
+async def get_paper_portfolio(
+    simulate: bool = False,
+    paths: int = Query(default=10000, ge=0, le=100000)
+):
+    """Get paper trading portfolio, marked to market.
+
+    `simulate=true` adds a Monte Carlo settlement P&L distribution over
+    `paths` paths; it is opt-in so the plain read stays cheap.
+    """
+    portfolio = await asyncio.to_thread(ledger.portfolio)
+    snapshot = await market_cache.get("")
+    store = snapshot.store if snapshot else None
+
+    portfolio["valuation"] = mark_positions(portfolio["positions"], store)
+    if simulate:
+        portfolio["simulation"] = await asyncio.to_thread(
+            simulate_outcomes, portfolio["positions"], store, paths
+        )
     return portfolio
 
 
 @app.post("/api/paper/trade")
 async def place_paper_trade(trade: PaperTrade):
     """Place a paper trade"""
-    cost = trade.price * trade.quantity
-    
-    if cost > portfolio["balance"]:
+    record = trade.dict()
+    record["timestamp"] = trade.timestamp or datetime.utcnow().isoformat()
+
+    try:
+        balance = await asyncio.to_thread(ledger.place_trade, record)
+    except InsufficientBalance:
         raise HTTPException(status_code=400, detail="Insufficient balance")
-    
-    portfolio["balance"] -= cost
-    portfolio["positions"].append({
-        "ticker": trade.ticker,
-        "title": trade.title,
-        "side": trade.side,
-        "price": trade.price,
-        "quantity": trade.quantity,
-        "cost": cost,
-        "timestamp": trade.timestamp or datetime.utcnow().isoformat()
-    })
-    paper_trades.append(trade.dict())
-    
-    return {"success": True, "new_balance": portfolio["balance"]}
+
+    return {"success": True, "new_balance": balance}
+
+
+@app.get("/api/paper/trades")
+async def get_paper_trades(limit: int = Query(default=100, ge=1, le=1000)):
+    """Most recent paper trades"""
+    return await asyncio.to_thread(ledger.trades, limit)
 
 
 @app.post("/api/paper/reset")
 async def reset_paper_portfolio():
     """Reset paper trading portfolio"""
-    portfolio["balance"] = 10000
-    portfolio["positions"] = []
-    paper_trades.clear()
-    return {"success": True, "balance": 10000}
+    balance = await asyncio.to_thread(ledger.reset)
+    return {"success": True, "balance": balance}
 
 
 # Alerts Endpoints
 @app.get("/api/alerts")
 async def get_alerts():
     """Get all price alerts"""
-    return alerts
+    return await alert_engine.list()
 
 
 @app.post("/api/alerts")
 async def create_alert(alert: Alert):
     """Create a price alert"""
-    alerts.append(alert.dict())
-    return {"success": True, "alert_count": len(alerts)}
+    if alert.condition not in ("above", "below"):
+        raise HTTPException(status_code=400, detail="Condition must be 'above' or 'below'")
+    created = await alert_engine.add(alert.dict())
+    return {"success": True, "id": created["id"], "alert_count": len(alert_engine.alerts)}
+
+
+@app.get("/api/alerts/triggered")
+async def get_triggered_alerts(limit: int = 50):
+    """Recently triggered alerts, newest first"""
+    if ALERTS_DB:
+        # Shared across workers, unlike the in-process notifier queue
+        return await alert_engine.triggered(limit)
+    return alert_notifier.recent(limit)
 
 
-@app.delete("/api/alerts/{index}")
-async def delete_alert(index: int):
+@app.delete("/api/alerts/{alert_id}")
+async def delete_alert(alert_id: str):
     """Delete an alert"""
-    if 0 <= index < len(alerts):
-        alerts.pop(index)
+    if await alert_engine.remove(alert_id):
         return {"success": True}
     raise HTTPException(status_code=404, detail="Alert not found")
 
@@ -0,0 +1,258 @@
+"""
+Instrumentation
+A small in-process Prometheus registry (counters, histograms, callback
+gauges), stage timers that double as OpenTelemetry spans when the SDK is
+installed, and a sampling profiler that can be switched on at runtime.
+"""
+
+import logging
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as Tally
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from opentelemetry import trace
+    tracer = trace.get_tracer("kalshi-plus")
+except ImportError:
+    tracer = None
+
+logger = logging.getLogger("kalshi_plus")
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _labels(names: Sequence[str], values: Tuple) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{v}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple, List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        row = self._values.get(key)
+        if row is None:
+            row = self._values[key] = [0] * (len(self.buckets) + 2)
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, row in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), row[:-1]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _labels(self.labelnames + ("le",), key + (le,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {row[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class CallbackGauge:
+    """Gauge whose values are read from a callback at scrape time"""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str], read: Callable[[], Dict[Tuple, float]]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.read = read
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for key, value in sorted(self.read().items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str], read) -> CallbackGauge:
+        return self.register(CallbackGauge(name, help, labelnames, read))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                logger.exception("Error rendering metric %s", metric.name)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+upstream_seconds = REGISTRY.histogram(
+    "kalshi_plus_upstream_request_seconds", "Upstream HTTP request latency per attempt", ["upstream"]
+)
+upstream_responses = REGISTRY.counter(
+    "kalshi_plus_upstream_responses_total", "Upstream responses by status code", ["upstream", "status"]
+)
+stage_seconds = REGISTRY.histogram(
+    "kalshi_plus_stage_seconds", "Time spent in each processing stage", ["stage"]
+)
+cache_events = REGISTRY.counter(
+    "kalshi_plus_cache_events_total", "Cache lookups by cache and result", ["cache", "result"]
+)
+fallbacks = REGISTRY.counter(
+    "kalshi_plus_fallbacks_total", "Responses served from sample or default data", ["kind"]
+)
+errors = REGISTRY.counter(
+    "kalshi_plus_errors_total", "Errors caught and handled, by component", ["component"]
+)
+
+
+@contextmanager
+def stage(name: str, **attributes) -> Iterator[None]:
+    """Time a processing stage, as an OpenTelemetry span too when available"""
+    span = tracer.start_as_current_span(name, attributes=attributes) if tracer is not None else nullcontext()
+    start = time.perf_counter()
+    with span:
+        try:
+            yield
+        finally:
+            stage_seconds.observe(time.perf_counter() - start, stage=name)
+
+
+def record_error(component: str, message: str, *args):
+    """Log a handled exception (with traceback) and count it"""
+    errors.inc(component=component)
+    logger.warning(message, *args, exc_info=True)
+
+
+class SamplingProfiler:
+    """Statistical profiler sampling every thread's stack from a daemon thread.
+
+    Stacks are folded into `file:function;file:function` strings and
+    counted, which is the input format of flamegraph tools. Nothing runs
+    until `start` is called. `samples` is shared with the sampler thread,
+    so it is only touched under `_lock`.
+    """
+
+    def __init__(self, interval: float = 0.01, max_depth: int = 64):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples: Tally = Tally()
+        self.started_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: Optional[float] = None):
+        if self.running:
+            return
+        if interval:
+            self.interval = interval
+        with self._lock:
+            self.samples.clear()
+        self.started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop sampling, waiting up to `timeout` for the current sweep to end"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            if not self._thread.is_alive():
+                self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            stacks = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                    frame = frame.f_back
+                stacks.append(";".join(reversed(stack)))
+            with self._lock:
+                self.samples.update(stacks)
+
+    def _snapshot(self) -> Tally:
+        with self._lock:
+            return self.samples.copy()
+
+    def report(self, limit: int = 50) -> dict:
+        samples = self._snapshot()
+        total = sum(samples.values())
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "started_at": self.started_at,
+            "samples": total,
+            "stacks": [
+                {"stack": stack, "count": count, "share": round(count / total, 4)}
+                for stack, count in samples.most_common(limit)
+            ],
+        }
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self._snapshot().items())
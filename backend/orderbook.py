@@ -0,0 +1,258 @@
+"""
+Order books
+Compact per-market books of resting bids from Kalshi's
+/markets/{ticker}/orderbook, kept for watched and high-volume markets.
+"""
+
+import asyncio
+import time
+from array import array
+from typing import Callable, Dict, List, Optional, Set
+
+import numpy as np
+
+from metrics import record_error
+from snapshot import SnapshotCache
+from upstream import UpstreamClient
+
+LEVELS = 101  # price in cents 0-100 is the index; 0 and 100 stay empty
+SIDES = ("yes", "no")
+
+
+def _other(side: str) -> str:
+    return "no" if side == "yes" else "yes"
+
+
+class OrderBook:
+    """Resting bids on both sides of one market, one uint32 slot per cent.
+
+    Kalshi only lists bids: a YES ask at p cents is a NO bid at 100 - p.
+    Buying a side walks the other side's bids from the best one down.
+    """
+
+    __slots__ = ("ticker", "yes", "no", "updated_at")
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker
+        self.yes = array("I", bytes(4 * LEVELS))
+        self.no = array("I", bytes(4 * LEVELS))
+        self.updated_at = 0.0
+
+    def levels(self, side: str) -> array:
+        return self.yes if side == "yes" else self.no
+
+    def load(self, book: dict):
+        """Replace both sides from an orderbook response ([[price, qty], ...] per side)"""
+        for side in SIDES:
+            levels = self.levels(side)
+            for i in range(LEVELS):
+                levels[i] = 0
+            for price, qty in book.get(side) or ():
+                if 0 < price < 100:
+                    levels[price] = qty
+        self.updated_at = time.time()
+
+    def set_level(self, side: str, price: int, quantity: int):
+        self.levels(side)[price] = max(quantity, 0)
+        self.updated_at = time.time()
+
+    def apply_delta(self, side: str, price: int, delta: int):
+        """Incremental update: add (or remove) contracts resting at a level"""
+        levels = self.levels(side)
+        levels[price] = max(levels[price] + delta, 0)
+        self.updated_at = time.time()
+
+    def best_bid(self, side: str) -> Optional[int]:
+        levels = self.levels(side)
+        for price in range(99, 0, -1):
+            if levels[price]:
+                return price
+        return None
+
+    def best_ask(self, side: str) -> Optional[int]:
+        bid = self.best_bid(_other(side))
+        return None if bid is None else 100 - bid
+
+    def mid(self, side: str = "yes") -> Optional[float]:
+        bid, ask = self.best_bid(side), self.best_ask(side)
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 200
+
+    def spread(self, side: str = "yes") -> Optional[float]:
+        bid, ask = self.best_bid(side), self.best_ask(side)
+        if bid is None or ask is None:
+            return None
+        return (ask - bid) / 100
+
+    def depth(self, side: str, price: float) -> int:
+        """Contracts of `side` that can be bought at `price` (dollars) or better"""
+        opposite = self.levels(_other(side))
+        floor = max(100 - int(round(price * 100)), 1)
+        return sum(opposite[floor:100])
+
+    def fill(self, side: str, size: int, action: str = "buy") -> dict:
+        """Walk the book for `size` contracts.
+
+        Buying consumes the opposite side's bids; selling hits this side's.
+        Returns the filled size, depth-weighted average price, worst price
+        and slippage against the top of book, all in dollars.
+        """
+        if action == "buy":
+            levels = self.levels(_other(side))
+            to_price = lambda p: 100 - p
+        else:
+            levels = self.levels(side)
+            to_price = lambda p: p
+
+        filled = 0
+        notional = 0
+        best = worst = None
+        for price in range(99, 0, -1):
+            qty = levels[price]
+            if not qty:
+                continue
+            take = min(qty, size - filled)
+            worst = to_price(price)
+            if best is None:
+                best = worst
+            filled += take
+            notional += take * worst
+            if filled >= size:
+                break
+
+        if not filled:
+            return {"filled": 0, "average_price": None, "worst_price": None, "slippage": None, "notional": 0}
+        average = notional / filled / 100
+        return {
+            "filled": filled,
+            "average_price": round(average, 4),
+            "worst_price": worst / 100,
+            "slippage": round(abs(average - best / 100), 4),
+            "notional": round(notional / 100, 2),
+        }
+
+    def to_dict(self, size: int = 100) -> dict:
+        return {
+            "ticker": self.ticker,
+            "yes_bid": _dollars(self.best_bid("yes")),
+            "yes_ask": _dollars(self.best_ask("yes")),
+            "no_bid": _dollars(self.best_bid("no")),
+            "no_ask": _dollars(self.best_ask("no")),
+            "mid": self.mid(),
+            "spread": self.spread(),
+            "levels": {
+                side: [[p / 100, q] for p, q in enumerate(self.levels(side)) if q][::-1]
+                for side in SIDES
+            },
+            "fills": {
+                f"{action}_{side}": self.fill(side, size, action)
+                for action in ("buy", "sell") for side in SIDES
+            },
+            "updated_at": self.updated_at,
+        }
+
+
+def _dollars(cents: Optional[int]) -> Optional[float]:
+    return None if cents is None else cents / 100
+
+
+class OrderBookManager:
+    """Keeps order books for watched tickers and the top-N markets by volume.
+
+    Tickers are watched by reading their book and unwatched after
+    `watch_ttl` seconds without a read. `run` refreshes every tracked book
+    each interval with bounded concurrency and drops books that are no
+    longer tracked. Listeners receive the tickers refreshed each round.
+    """
+
+    def __init__(
+        self,
+        client: UpstreamClient,
+        markets: SnapshotCache,
+        top_n: int = 0,
+        depth: int = 0,
+        concurrency: int = 8,
+        watch_ttl: float = 300.0,
+    ):
+        self.client = client
+        self.markets = markets
+        self.top_n = top_n
+        self.depth = depth
+        self.concurrency = concurrency
+        self.watch_ttl = watch_ttl
+        self.books: Dict[str, OrderBook] = {}
+        self._watched: Dict[str, float] = {}
+        self.listeners: List[Callable[[List[str]], None]] = []
+
+    def get(self, ticker: str) -> Optional[OrderBook]:
+        return self.books.get(ticker)
+
+    def depth_at(self, ticker: str, side: str, price: float) -> Optional[int]:
+        """Contracts available to buy at `price`; None without a book"""
+        book = self.books.get(ticker)
+        return None if book is None else book.depth(side.lower(), price)
+
+    async def watch(self, ticker: str) -> OrderBook:
+        """Return the ticker's book, fetching it if it is not tracked yet"""
+        self._watched[ticker] = time.monotonic()
+        book = self.books.get(ticker)
+        if book is None:
+            book = await self.fetch(ticker)
+            self.books[ticker] = book
+        return book
+
+    async def fetch(self, ticker: str) -> OrderBook:
+        params = {"depth": self.depth} if self.depth else None
+        response = await self.client.get(f"/markets/{ticker}/orderbook", params=params)
+        response.raise_for_status()
+        book = self.books.get(ticker) or OrderBook(ticker)
+        book.load(response.json().get("orderbook") or {})
+        return book
+
+    def tracked(self) -> Set[str]:
+        now = time.monotonic()
+        for ticker, seen in list(self._watched.items()):
+            if now - seen > self.watch_ttl:
+                del self._watched[ticker]
+        tickers = set(self._watched)
+        snapshot = self.markets.peek("")
+        if self.top_n and snapshot is not None and len(snapshot.store):
+            volume = snapshot.store.volume
+            k = min(self.top_n, len(volume))
+            top = np.argpartition(-volume, k - 1)[:k]
+            tickers.update(snapshot.store.tickers[i] for i in top)
+        return tickers
+
+    async def refresh(self) -> List[str]:
+        """Refetch every tracked book; returns the tickers refreshed"""
+        tickers = self.tracked()
+        for ticker in set(self.books) - tickers:
+            del self.books[ticker]
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def one(ticker: str) -> Optional[str]:
+            async with semaphore:
+                try:
+                    self.books[ticker] = await self.fetch(ticker)
+                    return ticker
+                except Exception:
+                    record_error("orderbook", "Error fetching order book %s", ticker)
+                    return None
+
+        refreshed = [t for t in await asyncio.gather(*(one(t) for t in tickers)) if t]
+        for listener in self.listeners:
+            try:
+                listener(refreshed)
+            except Exception:
+                record_error("orderbook_listener", "Order book listener %r failed", listener)
+        return refreshed
+
+    async def run(self, interval: float):
+        while True:
+            if self.top_n or self._watched:
+                try:
+                    await self.refresh()
+                except Exception:
+                    record_error("orderbook", "Error refreshing order books")
+            await asyncio.sleep(interval)
@@ -0,0 +1,126 @@
+"""
+Encoded response cache
+Serializes snapshot-derived payloads once per snapshot generation and
+serves the cached bytes with strong ETags and gzip/brotli compression.
+"""
+
+import gzip
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Callable, Hashable, Iterable, List, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from metrics import cache_events, stage
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as DefaultResponse
+except ImportError:
+    orjson = None
+    DefaultResponse = JSONResponse
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, separators=(",", ":"), default=str).encode()
+
+
+def project(records: Iterable[dict], fields: Optional[str]) -> List[dict]:
+    """Keep only the comma-separated `fields` of each record"""
+    if not fields:
+        return list(records)
+    keys = [f.strip() for f in fields.split(",") if f.strip()]
+    return [{k: r[k] for k in keys if k in r} for r in records]
+
+
+class EncodedBody:
+    """One serialized payload and its lazily compressed variants"""
+
+    __slots__ = ("generation", "etag", "identity", "_encoded")
+
+    def __init__(self, generation: Hashable, body: bytes):
+        self.generation = generation
+        self.etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.identity = body
+        self._encoded = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        body = self._encoded.get(encoding)
+        if body is None:
+            if encoding == "br":
+                body = brotli.compress(self.identity, quality=5)
+            else:
+                body = gzip.compress(self.identity, compresslevel=5)
+            self._encoded[encoding] = body
+        return body
+
+
+def _accepts(request: Request, encoding: str) -> bool:
+    accepted = request.headers.get("accept-encoding", "")
+    return any(part.split(";")[0].strip() == encoding for part in accepted.split(","))
+
+
+class ResponseCache:
+    """LRU of encoded bodies per query key, valid for one snapshot generation.
+
+    Each representation gets its own strong ETag (the content hash plus an
+    encoding suffix), and a matching If-None-Match is answered with 304.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, EncodedBody]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0}
+
+    def body(self, key: Hashable, generation: Hashable, build: Callable[[], object]) -> EncodedBody:
+        entry = self._entries.get(key)
+        if entry is not None and entry.generation == generation:
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            cache_events.inc(cache="responses", result="hit")
+            return entry
+        self.stats["misses"] += 1
+        cache_events.inc(cache="responses", result="miss")
+        payload = build()
+        with stage("serialize"):
+            entry = EncodedBody(generation, dumps(payload))
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return entry
+
+    def respond(self, request: Request, key: Hashable, generation: Hashable, build: Callable[[], object]) -> Response:
+        entry = self.body(key, generation, build)
+
+        encoding = None
+        if len(entry.identity) >= MIN_COMPRESS_BYTES:
+            if brotli is not None and _accepts(request, "br"):
+                encoding = "br"
+            elif _accepts(request, "gzip"):
+                encoding = "gzip"
+        etag = f'"{entry.etag}-{encoding}"' if encoding else f'"{entry.etag}"'
+        headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+
+        if_none_match = request.headers.get("if-none-match", "")
+        if etag in [t.strip() for t in if_none_match.split(",")] or if_none_match.strip() == "*":
+            self.stats["not_modified"] += 1
+            cache_events.inc(cache="responses", result="not_modified")
+            return Response(status_code=304, headers=headers)
+
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            return Response(entry.encoded(encoding), media_type="application/json", headers=headers)
+        return Response(entry.identity, media_type="application/json", headers=headers)
@@ -0,0 +1,123 @@
+"""
+Portfolio valuation and risk
+Marks paper positions to the market snapshot and simulates settlement
+outcomes, all as NumPy operations over the positions array.
+"""
+
+from typing import List, Optional
+
+import numpy as np
+
+from store import MarketStore
+
+PERCENTILES = [1, 5, 25, 50, 75, 95, 99]
+
+# Random draws per simulation chunk, to bound memory at large path counts
+CHUNK_ELEMENTS = 1 << 22
+
+
+def _snapshot_rows(tickers, store: Optional[MarketStore]) -> np.ndarray:
+    """Row of each ticker in the store, -1 when missing"""
+    if store is None:
+        return np.full(len(tickers), -1, dtype=np.int64)
+    return np.fromiter((store.ticker_index.get(t, -1) for t in tickers), dtype=np.int64, count=len(tickers))
+
+
+def mark_positions(positions: List[dict], store: Optional[MarketStore]) -> dict:
+    """Value each position at the snapshot price for its side.
+
+    Positions on tickers missing from the snapshot are marked at cost.
+    Adds mark/value/unrealized_pnl/category to each position in place and
+    returns portfolio totals plus exposure by category.
+    """
+    n = len(positions)
+    quantity = np.fromiter((p["quantity"] for p in positions), dtype=np.float64, count=n)
+    cost = np.fromiter((p["cost"] for p in positions), dtype=np.float64, count=n)
+    is_yes = np.fromiter((p["side"] == "YES" for p in positions), dtype=bool, count=n)
+    avg_price = np.divide(cost, quantity, out=np.zeros(n), where=quantity > 0)
+
+    rows = _snapshot_rows([p["ticker"] for p in positions], store)
+    known = rows >= 0
+    mark = avg_price
+    categories = ["unknown"] * n
+    if known.any():
+        safe_rows = np.where(known, rows, 0)
+        side_price = np.where(is_yes, store.yes_price[safe_rows], store.no_price[safe_rows])
+        mark = np.where(known, side_price, avg_price)
+        categories = [store.category_names[c] if k else "unknown" for c, k in zip(store.category[safe_rows], known)]
+
+    value = quantity * mark
+    unrealized = value - cost
+    for p, m, v, u, c in zip(positions, mark.tolist(), value.tolist(), unrealized.tolist(), categories):
+        p.update(mark=m, value=round(v, 2), unrealized_pnl=round(u, 2), category=c)
+
+    names = sorted(set(categories))
+    codes = np.fromiter((names.index(c) for c in categories), dtype=np.int64, count=n)
+    exposure = np.bincount(codes, weights=value, minlength=len(names))
+
+    return {
+        "market_value": round(float(value.sum()), 2),
+        "cost_basis": round(float(cost.sum()), 2),
+        "unrealized_pnl": round(float(unrealized.sum()), 2),
+        "priced_positions": int(known.sum()),
+        "exposure_by_category": {str(k): round(float(v), 2) for k, v in zip(names, exposure)},
+    }
+
+
+def simulate_outcomes(
+    positions: List[dict],
+    store: Optional[MarketStore],
+    paths: int = 10000,
+    seed: Optional[int] = None,
+) -> dict:
+    """Monte Carlo distribution of settlement P&L.
+
+    Each ticker settles YES independently with probability equal to its
+    snapshot YES price; YES and NO positions on the same ticker share that
+    draw. P&L per path is `outcomes @ (yes_qty - no_qty) + no_qty - cost`,
+    evaluated in chunks of paths.
+    """
+    if not positions or paths <= 0:
+        return {"paths": 0}
+
+    tickers = [p["ticker"] for p in positions]
+    unique, inverse = np.unique(np.array(tickers, dtype=object), return_inverse=True)
+    quantity = np.fromiter((p["quantity"] for p in positions), dtype=np.float64, count=len(positions))
+    cost = float(sum(p["cost"] for p in positions))
+    is_yes = np.fromiter((p["side"] == "YES" for p in positions), dtype=bool, count=len(positions))
+
+    yes_qty = np.bincount(inverse, weights=np.where(is_yes, quantity, 0), minlength=len(unique))
+    no_qty = np.bincount(inverse, weights=np.where(is_yes, 0, quantity), minlength=len(unique))
+
+    # Implied YES probability per ticker, 0.5 when the snapshot lacks it
+    rows = _snapshot_rows(unique, store)
+    prob = np.full(len(unique), 0.5)
+    if store is not None:
+        known = rows >= 0
+        prob[known] = store.yes_price[rows[known]]
+    # Thresholds and P&L sums stay float64: a price within 1e-5 of a draw,
+    # or a large position, must not round across the comparison. Only the
+    # outcome matrix is stored compactly, as booleans.
+    threshold = np.clip(prob, 0.0, 1.0)
+
+    weights = yes_qty - no_qty
+    base = float(no_qty.sum()) - cost
+    rng = np.random.default_rng(seed)
+    pnl = np.empty(paths, dtype=np.float64)
+    m = len(unique)
+    chunk = max(1, CHUNK_ELEMENTS // m)
+    for start in range(0, paths, chunk):
+        size = min(chunk, paths - start)
+        outcomes = rng.random((size, m)) < threshold
+        pnl[start:start + size] = outcomes @ weights
+    pnl += base
+
+    return {
+        "paths": paths,
+        "mean": round(float(pnl.mean()), 2),
+        "std": round(float(pnl.std()), 2),
+        "prob_loss": round(float((pnl < 0).mean()), 4),
+        "percentiles": {str(q): round(float(v), 2) for q, v in zip(PERCENTILES, np.percentile(pnl, PERCENTILES))},
+        "best": round(float(pnl.max()), 2),
+        "worst": round(float(pnl.min()), 2),
+    }
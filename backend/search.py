@@ -0,0 +1,209 @@
+"""
+Market search index
+Inverted index over market titles and tickers with prefix, infix and
+typo-tolerant matching, updated incrementally as snapshots refresh.
+"""
+
+import math
+import re
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Score weight per match kind
+EXACT, PREFIX, INFIX, FUZZY = 3.0, 2.0, 1.5, 1.0
+
+QUERY_CACHE_SIZE = 256
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+def _trigrams(token: str) -> Set[str]:
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _within_distance(a: str, b: str, max_dist: int) -> bool:
+    """Levenshtein distance check that gives up once max_dist is exceeded"""
+    if abs(len(a) - len(b)) > max_dist:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_dist:
+            return False
+        previous = current
+    return previous[-1] <= max_dist
+
+
+class SearchIndex:
+    """Token -> document postings plus a sorted vocabulary and trigram table.
+
+    Each ticker gets a small integer document id (recycled when it leaves
+    the index) so results come back as NumPy arrays. `stamps[id]` changes
+    every time an id is assigned, so a holder of an older id -> market
+    mapping can tell a recycled id from the document it knew. Every query token must
+    match (AND). A token matches index terms exactly, by prefix, or as a
+    substring of a longer term; if none of those hit, terms within a small
+    edit distance are tried instead. Matches are scored by kind and weighted
+    by inverse document frequency.
+    """
+
+    def __init__(self, markets: Iterable[dict] = ()):
+        self.docs: Dict[str, tuple] = {}
+        self.doc_ids: Dict[str, int] = {}
+        self.postings: Dict[str, Set[int]] = {}
+        self.vocab: List[str] = []
+        self.trigrams: Dict[str, Set[str]] = {}
+        self.capacity = 0
+        self.stamps = np.zeros(0, dtype=np.int64)
+        self._stamp = 0
+        self._free_ids: List[int] = []
+        self._cache: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self.update(markets)
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def update(self, markets: Iterable[dict], prune: bool = True):
+        """Sync the index with a market list, touching only changed documents.
+
+        With `prune`, tickers missing from the list are dropped.
+        """
+        seen = set()
+        for m in markets:
+            ticker = m["ticker"]
+            seen.add(ticker)
+            key = (m["title"], ticker)
+            doc = self.docs.get(ticker)
+            if doc is not None and doc[0] == key:
+                continue
+            if doc is not None:
+                self._remove(ticker)
+            self._add(ticker, key)
+        if prune:
+            for ticker in [t for t in self.docs if t not in seen]:
+                self._remove(ticker)
+        self._cache.clear()
+
+    def _add(self, ticker: str, key: tuple):
+        tokens = frozenset(tokenize(key[0]) + tokenize(key[1]))
+        self.docs[ticker] = (key, tokens)
+        if self._free_ids:
+            doc_id = self._free_ids.pop()
+        else:
+            doc_id = self.capacity
+            self.capacity += 1
+            if doc_id >= len(self.stamps):
+                self.stamps = np.concatenate([self.stamps, np.zeros(max(doc_id, 64), dtype=np.int64)])
+        self._stamp += 1
+        self.stamps[doc_id] = self._stamp
+        self.doc_ids[ticker] = doc_id
+        for token in tokens:
+            posting = self.postings.get(token)
+            if posting is None:
+                posting = self.postings[token] = set()
+                insort(self.vocab, token)
+                for gram in _trigrams(token):
+                    self.trigrams.setdefault(gram, set()).add(token)
+            posting.add(doc_id)
+
+    def _remove(self, ticker: str):
+        _, tokens = self.docs.pop(ticker)
+        doc_id = self.doc_ids.pop(ticker)
+        self.stamps[doc_id] = 0
+        self._free_ids.append(doc_id)
+        for token in tokens:
+            posting = self.postings[token]
+            posting.discard(doc_id)
+            if not posting:
+                del self.postings[token]
+                del self.vocab[bisect_left(self.vocab, token)]
+                for gram in _trigrams(token):
+                    grams = self.trigrams[gram]
+                    grams.discard(token)
+                    if not grams:
+                        del self.trigrams[gram]
+
+    def _prefixed(self, prefix: str) -> List[str]:
+        start = bisect_left(self.vocab, prefix)
+        end = bisect_left(self.vocab, prefix + "\uffff", start)
+        return self.vocab[start:end]
+
+    def _term_matches(self, token: str) -> Dict[str, float]:
+        """Index terms matching one query token, with their match weight"""
+        matches: Dict[str, float] = {}
+        for term in self._prefixed(token):
+            matches[term] = EXACT if term == token else PREFIX
+
+        if len(token) >= 3:
+            # Substring of a longer term: every inner trigram must be present
+            inner = [token[i:i + 3] for i in range(len(token) - 2)]
+            candidates = None
+            for gram in sorted(inner, key=lambda g: len(self.trigrams.get(g, ()))):
+                terms = self.trigrams.get(gram, set())
+                candidates = terms if candidates is None else candidates & terms
+                if not candidates:
+                    break
+            for term in candidates or ():
+                if term not in matches and token in term:
+                    matches[term] = INFIX
+
+        if not matches and len(token) >= 4:
+            max_dist = 1 if len(token) < 8 else 2
+            grams = _trigrams(token)
+            counts: Dict[str, int] = {}
+            for gram in grams:
+                for term in self.trigrams.get(gram, ()):
+                    counts[term] = counts.get(term, 0) + 1
+            needed = len(grams) - 3 * max_dist
+            for term, shared in counts.items():
+                if shared >= needed and _within_distance(token, term, max_dist):
+                    matches[term] = FUZZY
+        return matches
+
+    def search(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Matching document ids and their relevance scores (higher is better)"""
+        cached = self._cache.get(query)
+        if cached is not None:
+            return cached
+
+        total = max(len(self.docs), 1)
+        result: Optional[Dict[int, float]] = None
+        for token in dict.fromkeys(tokenize(query)):
+            weighted = [
+                (weight * math.log(1 + total / len(self.postings[term])), term)
+                for term, weight in self._term_matches(token).items()
+            ]
+            # Apply lowest scores first so each document keeps its best match
+            scores: Dict[int, float] = {}
+            for score, term in sorted(weighted):
+                posting = self.postings[term]
+                scores.update(dict.fromkeys(posting if result is None else posting & result.keys(), score))
+            if result is None:
+                result = scores
+            else:
+                result = {d: result[d] + s for d, s in scores.items()}
+            if not result:
+                break
+
+        result = result or {}
+        found = (
+            np.fromiter(result.keys(), dtype=np.int64, count=len(result)),
+            np.fromiter(result.values(), dtype=np.float64, count=len(result)),
+        )
+        if len(self._cache) >= QUERY_CACHE_SIZE:
+            self._cache.clear()
+        self._cache[query] = found
+        return found
+
+    def matching_tickers(self, query: str) -> Set[str]:
+        ids = set(self.search(query)[0].tolist())
+        return {t for t, d in self.doc_ids.items() if d in ids}
@@ -0,0 +1,235 @@
+"""
+Shared market snapshots
+Lets several worker processes serve one snapshot: a leader, elected with an
+exclusive file lock, polls upstream and publishes each snapshot's columns,
+and followers map the published columns read-only instead of polling.
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from responses import dumps
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+COLUMNS = ("yes_price", "no_price", "volume", "spread", "close_time", "category")
+
+
+class PublishedSnapshot:
+    """One generation of a published snapshot, as a follower sees it"""
+
+    __slots__ = ("key", "generation", "published_at", "records", "columns", "category_names")
+
+    def __init__(
+        self,
+        key: str,
+        generation: int,
+        published_at: float,
+        records: List[dict],
+        columns: Dict[str, np.ndarray],
+        category_names: List[str],
+    ):
+        self.key = key
+        self.generation = generation
+        self.published_at = published_at
+        self.records = records
+        self.columns = columns
+        self.category_names = category_names
+
+
+class LeaderLock:
+    """Non-blocking exclusive flock on a file.
+
+    The OS drops the lock when the holding process exits, so a follower
+    calling `acquire` periodically takes over from a dead leader.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+def _readonly(array: np.ndarray) -> np.ndarray:
+    view = array.view()
+    view.flags.writeable = False
+    return view
+
+
+class MemoryBus:
+    """In-process stand-in for FileBus, for a single process or tests"""
+
+    def __init__(self):
+        self._latest: Dict[str, PublishedSnapshot] = {}
+        self._requests: Dict[str, float] = {}
+
+    def publish(self, snapshot) -> int:
+        store = snapshot.store
+        generation = self.generation(snapshot.key) + 1
+        self._latest[snapshot.key] = PublishedSnapshot(
+            snapshot.key,
+            generation,
+            time.time(),
+            snapshot.markets,
+            {name: _readonly(getattr(store, name)) for name in COLUMNS},
+            list(store.category_names),
+        )
+        return generation
+
+    def generation(self, key: str) -> int:
+        published = self._latest.get(key)
+        return published.generation if published else 0
+
+    def load(self, key: str, newer_than: int = 0) -> Optional[PublishedSnapshot]:
+        published = self._latest.get(key)
+        if published is None or published.generation <= newer_than:
+            return None
+        return published
+
+    def request(self, key: str):
+        self._requests[key] = time.time()
+
+    def requested(self, max_age: float) -> List[str]:
+        cutoff = time.time() - max_age
+        return [key for key, at in self._requests.items() if at >= cutoff]
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _key_hash(key: str) -> str:
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+
+
+class FileBus:
+    """Snapshots published as .npy columns and a records file under `root`.
+
+    Each publish writes a new `gen-N` directory and then atomically swaps
+    the key's CURRENT pointer, so readers never see a partial snapshot.
+    Followers open the columns with mmap, sharing the page cache instead
+    of copying; the market records are parsed once per generation. Only
+    the newest `keep` generations are kept on disk (a follower still
+    mapping a pruned one keeps reading it until it moves on).
+
+    Followers ask the leader for keys it does not publish yet by touching
+    a file under `requests/`; the leader keeps a key warm while it is
+    requested.
+    """
+
+    def __init__(self, root: str, keep: int = 3):
+        self.root = root
+        self.keep = keep
+        os.makedirs(os.path.join(root, "snapshots"), exist_ok=True)
+        os.makedirs(os.path.join(root, "requests"), exist_ok=True)
+
+    def _key_dir(self, key: str) -> str:
+        return os.path.join(self.root, "snapshots", _key_hash(key))
+
+    def publish(self, snapshot) -> int:
+        store = snapshot.store
+        directory = self._key_dir(snapshot.key)
+        os.makedirs(directory, exist_ok=True)
+        generation = self.generation(snapshot.key) + 1
+
+        tmp = os.path.join(directory, f".tmp-{generation}-{os.getpid()}")
+        os.makedirs(tmp)
+        for name in COLUMNS:
+            np.save(os.path.join(tmp, f"{name}.npy"), np.ascontiguousarray(getattr(store, name)))
+        with open(os.path.join(tmp, "records.json"), "wb") as f:
+            f.write(dumps(snapshot.markets))
+        meta = {
+            "key": snapshot.key,
+            "generation": generation,
+            "published_at": time.time(),
+            "category_names": store.category_names,
+        }
+        with open(os.path.join(tmp, "meta.json"), "wb") as f:
+            f.write(dumps(meta))
+        os.rename(tmp, os.path.join(directory, f"gen-{generation:012d}"))
+        _write_atomic(os.path.join(directory, "CURRENT"), str(generation).encode())
+
+        for name in os.listdir(directory):
+            if name.startswith("gen-") and int(name[4:]) <= generation - self.keep:
+                shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+        return generation
+
+    def generation(self, key: str) -> int:
+        try:
+            with open(os.path.join(self._key_dir(key), "CURRENT"), "rb") as f:
+                return int(f.read())
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def load(self, key: str, newer_than: int = 0) -> Optional[PublishedSnapshot]:
+        generation = self.generation(key)
+        if generation <= newer_than:
+            return None
+        path = os.path.join(self._key_dir(key), f"gen-{generation:012d}")
+        try:
+            with open(os.path.join(path, "meta.json"), "rb") as f:
+                meta = loads(f.read())
+            columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in COLUMNS}
+            with open(os.path.join(path, "records.json"), "rb") as f:
+                records = loads(f.read())
+        except FileNotFoundError:
+            # Pruned between reading CURRENT and opening the files
+            return None
+        return PublishedSnapshot(key, generation, meta["published_at"], records, columns, meta["category_names"])
+
+    def request(self, key: str):
+        _write_atomic(os.path.join(self.root, "requests", _key_hash(key)), key.encode())
+
+    def requested(self, max_age: float) -> List[str]:
+        directory = os.path.join(self.root, "requests")
+        cutoff = time.time() - max_age
+        keys = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            try:
+                if os.stat(path).st_mtime < cutoff:
+                    os.remove(path)
+                    continue
+                with open(path, "rb") as f:
+                    keys.append(f.read().decode())
+            except FileNotFoundError:
+                continue
+        return keys
@@ -0,0 +1,227 @@
+"""
+Market snapshot cache
+Keeps an in-process copy of open markets per series filter, refreshed in the
+background and served stale-while-revalidate. With a shared bus, only the
+leader process polls upstream and the others follow its published snapshots.
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from metrics import cache_events, logger, record_error, stage
+from store import MarketDelta, MarketStore
+
+
+# Seconds between checks while waiting for a key's first publish
+FOLLOW_POLL_INTERVAL = 0.25
+
+
+class MarketSnapshot:
+    """Transformed markets for one series filter at a point in time"""
+
+    __slots__ = ("key", "markets", "store", "delta", "fetched_at", "generation")
+
+    def __init__(
+        self,
+        key: str,
+        markets: List[dict],
+        fetched_at: float,
+        previous: Optional["MarketSnapshot"] = None,
+        store: Optional[MarketStore] = None,
+        generation: int = 0,
+    ):
+        self.key = key
+        self.markets = markets
+        # Reuse the previous search index so only changed titles are re-indexed
+        self.store = store or MarketStore(markets, previous.store.index if previous else None)
+        self.delta: MarketDelta = self.store.diff(previous.store if previous else None)
+        self.fetched_at = fetched_at
+        # Published generation when shared through a bus, else 0
+        self.generation = generation
+
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+
+class SnapshotCache:
+    """TTL cache of market snapshots with stale-while-revalidate and request coalescing.
+
+    `fetcher(key)` returns the transformed market list for a series filter key.
+    Fresh entries are returned directly, stale entries are returned immediately
+    while a single background refresh runs, and concurrent misses for the same
+    key all await the same upstream request. Listeners are called with each
+    new snapshot once it is in place; its `delta` against the previous
+    snapshot is computed once and shared by every listener.
+
+    With a `bus` (see shared.py), the process holding `leader` fetches and
+    publishes every snapshot; the others load the published generations
+    instead of calling `fetcher`, and take over once the leader lock frees.
+    """
+
+    def __init__(
+        self,
+        fetcher: Callable[[str], Awaitable[List[dict]]],
+        ttl: float = 15.0,
+        max_stale: float = 300.0,
+        bus=None,
+        leader=None,
+        follow_timeout: float = 10.0,
+    ):
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.bus = bus
+        self.leader = leader
+        self.follow_timeout = follow_timeout
+        self._entries: Dict[str, MarketSnapshot] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._last_access: Dict[str, float] = {}
+        self.listeners: List[Callable[[MarketSnapshot], None]] = []
+        self.pinned: Set[str] = set()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "errors": 0}
+
+    @property
+    def is_leader(self) -> bool:
+        return self.bus is None or self.leader is None or self.leader.held
+
+    def peek(self, key: str) -> Optional[MarketSnapshot]:
+        """Return the cached snapshot for a key without triggering a refresh"""
+        return self._entries.get(key)
+
+    def keys(self) -> List[str]:
+        return list(self._entries)
+
+    def touch(self, key: str):
+        """Mark a key as in use so the refresher keeps it warm"""
+        self._last_access[key] = time.monotonic()
+
+    def find(self, ticker: str) -> Optional[dict]:
+        """Look a market up in any cached snapshot"""
+        for entry in self._entries.values():
+            market = entry.store.get(ticker)
+            if market is not None:
+                return market
+        return None
+
+    async def get(self, key: str) -> Optional[MarketSnapshot]:
+        """Return a snapshot for the key, or None if upstream failed and nothing is cached"""
+        self._last_access[key] = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = entry.age()
+            if age < self.ttl:
+                self.stats["hits"] += 1
+                cache_events.inc(cache="snapshot", result="hit")
+                return entry
+            if age < self.ttl + self.max_stale:
+                self.stats["stale_hits"] += 1
+                cache_events.inc(cache="snapshot", result="stale_hit")
+                self.refresh(key)
+                return entry
+
+        self.stats["misses"] += 1
+        cache_events.inc(cache="snapshot", result="miss")
+        try:
+            return await asyncio.shield(self.refresh(key))
+        except Exception:
+            return entry
+
+    def refresh(self, key: str) -> asyncio.Task:
+        """Start a refresh for the key, or join the one already in flight"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._refresh(key))
+            self._inflight[key] = task
+            task.add_done_callback(_consume_exception)
+        return task
+
+    async def _refresh(self, key: str) -> MarketSnapshot:
+        try:
+            previous = self._entries.get(key)
+            if self.is_leader:
+                markets = await self.fetcher(key)
+                with stage("index"):
+                    entry = MarketSnapshot(key, markets, time.monotonic(), previous)
+                if self.bus is not None:
+                    # FileBus writes a column file per field; keep that off the loop
+                    with stage("publish"):
+                        entry.generation = await asyncio.to_thread(self.bus.publish, entry)
+            else:
+                entry = await self._follow(key, previous)
+                if entry is previous:
+                    return entry
+            self._entries[key] = entry
+            self.stats["refreshes"] += 1
+            with stage("listeners"):
+                for listener in self.listeners:
+                    try:
+                        listener(entry)
+                    except Exception:
+                        record_error("snapshot_listener", "Snapshot listener %r failed", listener)
+            return entry
+        except Exception:
+            self.stats["errors"] += 1
+            record_error("snapshot_refresh", "Error refreshing market snapshot %r", key)
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _follow(self, key: str, previous: Optional[MarketSnapshot]) -> MarketSnapshot:
+        """Load the leader's newest generation, or keep `previous` if there is none.
+
+        Requesting the key keeps it warm at the leader; a key the leader
+        has never published is waited for up to `follow_timeout`.
+        """
+        self.bus.request(key)
+        published = await asyncio.to_thread(self.bus.load, key, previous.generation if previous else 0)
+        deadline = time.monotonic() + self.follow_timeout
+        while published is None and previous is None:
+            if time.monotonic() >= deadline:
+                raise LookupError(f"No snapshot published for {key!r}")
+            await asyncio.sleep(FOLLOW_POLL_INTERVAL)
+            published = await asyncio.to_thread(self.bus.load, key)
+        if published is None:
+            return previous
+
+        with stage("index"):
+            store = MarketStore(
+                published.records,
+                previous.store.index if previous else None,
+                columns=published.columns,
+                category_names=published.category_names,
+            )
+            # Age counts from the leader's publish, not from this load
+            fetched_at = time.monotonic() - max(0.0, time.time() - published.published_at)
+            return MarketSnapshot(key, published.records, fetched_at, previous, store, published.generation)
+
+    async def run(self, interval: float):
+        """Background loop that refreshes every known key before it goes stale.
+
+        Keys nobody has read for longer than `max_stale` are dropped instead,
+        unless they are pinned. Followers retry the leader lock on every
+        tick, and the leader picks up keys that followers requested.
+        """
+        while True:
+            if self.leader is not None and not self.leader.held and self.leader.acquire():
+                logger.info("Took over as snapshot leader")
+            if self.bus is not None and self.is_leader:
+                for key in self.bus.requested(self.max_stale):
+                    self.touch(key)
+                    if key not in self._entries:
+                        self.refresh(key)
+            now = time.monotonic()
+            for key, entry in list(self._entries.items()):
+                idle = now - self._last_access.get(key, entry.fetched_at)
+                if idle > self.max_stale and key not in self.pinned:
+                    self._entries.pop(key, None)
+                    self._last_access.pop(key, None)
+                elif entry.age() >= self.ttl - interval:
+                    self.refresh(key)
+            await asyncio.sleep(interval)
+
+
+def _consume_exception(task: asyncio.Task):
+    # Background refreshes may fail with nobody awaiting them
+    if not task.cancelled():
+        task.exception()
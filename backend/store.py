@@ -0,0 +1,240 @@
+"""
+Columnar market store
+Struct-of-arrays view of a market snapshot so filters, bucketing and
+sorting run as vectorized NumPy operations.
+"""
+
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from search import SearchIndex
+
+BUCKET_NAMES = ["longshot", "unlikely", "uncertain", "likely", "favorite"]
+BUCKET_EDGES = np.array([0, 0.15, 0.35, 0.65, 0.85, 1.0])
+
+
+class MarketDelta:
+    """Rows added or changed and tickers removed between two snapshots of a store"""
+
+    __slots__ = ("store", "added", "changed", "removed")
+
+    def __init__(self, store: "MarketStore", added: np.ndarray, changed: np.ndarray, removed: List[str]):
+        self.store = store
+        self.added = added
+        self.changed = changed
+        self.removed = removed
+
+    def __bool__(self) -> bool:
+        return bool(len(self.added) or len(self.changed) or self.removed)
+
+    @property
+    def changed_tickers(self) -> List[str]:
+        tickers = self.store.tickers
+        return [tickers[i] for i in self.changed]
+
+    @property
+    def added_tickers(self) -> List[str]:
+        tickers = self.store.tickers
+        return [tickers[i] for i in self.added]
+
+
+def _close_timestamp(close_time: Optional[str]) -> float:
+    # Missing close times sort first, like the empty string they used to be
+    if not close_time:
+        return float("-inf")
+    try:
+        return datetime.fromisoformat(close_time).timestamp()
+    except ValueError:
+        return float("-inf")
+
+
+class MarketStore:
+    """Column arrays over a list of transformed markets.
+
+    `records` keeps the original market dicts; queries return rows from it
+    by index, so nothing is copied per request. Passing the previous
+    snapshot's search index updates it in place instead of rebuilding it.
+
+    `columns` (with `category_names`) supplies ready-made arrays, such as
+    read-only maps of a snapshot published by another process, instead of
+    building them from the records.
+    """
+
+    def __init__(
+        self,
+        markets: List[dict],
+        index: Optional[SearchIndex] = None,
+        columns: Optional[Dict[str, np.ndarray]] = None,
+        category_names: Optional[List[str]] = None,
+    ):
+        n = len(markets)
+        self.records = markets
+        # Interned ticker table
+        self.tickers = [m["ticker"] for m in markets]
+        self.ticker_index = {t: i for i, t in enumerate(self.tickers)}
+
+        if columns is not None:
+            self.yes_price = columns["yes_price"]
+            self.no_price = columns["no_price"]
+            self.volume = columns["volume"]
+            self.spread = columns["spread"]
+            self.close_time = columns["close_time"]
+            self.category = columns["category"]
+            self.category_names: List[str] = list(category_names or [])
+        else:
+            self.yes_price = np.fromiter((m["yes_price"] for m in markets), dtype=np.float64, count=n)
+            self.no_price = np.fromiter((m["no_price"] for m in markets), dtype=np.float64, count=n)
+            self.volume = np.fromiter((m["volume"] for m in markets), dtype=np.int64, count=n)
+            self.spread = np.fromiter((m["spread"] for m in markets), dtype=np.float64, count=n)
+            self.close_time = np.fromiter(
+                (_close_timestamp(m["close_time"]) for m in markets), dtype=np.float64, count=n
+            )
+            # Interned category table
+            self.category_names = []
+            category_ids = {}
+            codes = []
+            for m in markets:
+                code = category_ids.get(m["category"])
+                if code is None:
+                    code = category_ids[m["category"]] = len(self.category_names)
+                    self.category_names.append(m["category"])
+                codes.append(code)
+            self.category = np.array(codes, dtype=np.int16)
+
+        if index is None:
+            index = SearchIndex(markets)
+        else:
+            index.update(markets)
+        self.index = index
+        # Search document id -> row, -1 for documents this snapshot lacks,
+        # and the id's stamp per row when this snapshot was indexed
+        self.doc_rows = np.full(index.capacity, -1, dtype=np.int64)
+        self.doc_stamps = np.zeros(n, dtype=np.int64)
+        for i, ticker in enumerate(self.tickers):
+            doc_id = index.doc_ids[ticker]
+            self.doc_rows[doc_id] = i
+            self.doc_stamps[i] = index.stamps[doc_id]
+
+        # Bucket index per market, -1/5 for prices outside [0, 1)
+        self.bucket = np.digitize(self.yes_price, BUCKET_EDGES) - 1
+
+        self._sort_keys = {
+            "volume": self.volume,
+            "probability": self.yes_price,
+            "spread": self.spread,
+            "closing": self.close_time,
+        }
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, ticker: str) -> Optional[dict]:
+        i = self.ticker_index.get(ticker)
+        return self.records[i] if i is not None else None
+
+    def diff(self, previous: Optional["MarketStore"]) -> MarketDelta:
+        """Compare against the previous snapshot's store on price and volume"""
+        n = len(self)
+        if previous is None:
+            return MarketDelta(self, np.arange(n), np.arange(0), [])
+
+        prev_rows = np.fromiter((previous.ticker_index.get(t, -1) for t in self.tickers), dtype=np.int64, count=n)
+        existing = prev_rows >= 0
+        rows = np.flatnonzero(existing)
+        before = prev_rows[rows]
+        moved = (
+            (self.yes_price[rows] != previous.yes_price[before])
+            | (self.no_price[rows] != previous.no_price[before])
+            | (self.volume[rows] != previous.volume[before])
+        )
+        removed = [t for t in previous.tickers if t not in self.ticker_index]
+        return MarketDelta(self, np.flatnonzero(~existing), rows[moved], removed)
+
+    def mask(
+        self,
+        min_volume: int = 0,
+        search: Optional[str] = None,
+        bucket: Optional[str] = None,
+    ) -> np.ndarray:
+        """Boolean row mask for the volume, search and bucket filters"""
+        mask = np.ones(len(self), dtype=bool)
+        if min_volume:
+            mask &= self.volume >= min_volume
+        if bucket in BUCKET_NAMES:
+            mask &= self.bucket == BUCKET_NAMES.index(bucket)
+        if search:
+            mask &= self._search_mask(search)
+        return mask
+
+    def _search_rows(self, search: str):
+        ids, scores = self.index.search(search)
+        # The index is shared with newer snapshots, so it may know documents
+        # we don't, and may have recycled one of our ids for another market
+        known = ids < len(self.doc_rows)
+        ids, scores = ids[known], scores[known]
+        rows = self.doc_rows[ids]
+        present = (rows >= 0) & (self.index.stamps[ids] == self.doc_stamps[rows])
+        return rows[present], scores[present]
+
+    def _search_mask(self, search: str) -> np.ndarray:
+        found = np.zeros(len(self), dtype=bool)
+        found[self._search_rows(search)[0]] = True
+        return found
+
+    def relevance(self, search: str) -> np.ndarray:
+        """Search score per row, 0 for rows that do not match"""
+        relevance = np.zeros(len(self), dtype=np.float64)
+        rows, scores = self._search_rows(search)
+        relevance[rows] = scores
+        return relevance
+
+    def order(
+        self,
+        rows: np.ndarray,
+        sort_by: str = "volume",
+        sort_order: str = "desc",
+        limit: Optional[int] = None,
+        search: Optional[str] = None,
+    ) -> np.ndarray:
+        """Sort row indices, selecting the top `limit` with argpartition first"""
+        if limit is not None and limit < 0:
+            limit = 0
+        if sort_by == "relevance" and search:
+            key = self.relevance(search)
+        else:
+            key = self._sort_keys.get(sort_by)
+        if key is None:
+            return rows[:limit]
+
+        descending = sort_order == "desc"
+        # Closing sorts soonest-first when descending
+        if sort_by == "closing":
+            descending = not descending
+        keys = -key[rows] if descending else key[rows]
+
+        if limit is not None and limit < len(rows):
+            if limit == 0:
+                return rows[:0]
+            # Keep every row tied with the limit-th key, so the cut below
+            # breaks ties by row like the full sort instead of arbitrarily
+            cutoff = np.partition(keys, limit - 1)[limit - 1]
+            selected = keys <= cutoff
+            rows, keys = rows[selected], keys[selected]
+        # Ties keep snapshot order, like a stable list.sort
+        return rows[np.lexsort((rows, keys))][:limit]
+
+    def query(
+        self,
+        min_volume: int = 0,
+        search: Optional[str] = None,
+        bucket: Optional[str] = None,
+        sort_by: str = "volume",
+        sort_order: str = "desc",
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """Filter, sort and limit markets, returning the matching records"""
+        rows = np.flatnonzero(self.mask(min_volume, search, bucket))
+        records = self.records
+        return [records[i] for i in self.order(rows, sort_by, sort_order, limit, search)]
@@ -0,0 +1,188 @@
+"""
+Suggestion views
+Each suggestion rule is a materialized view over the full-market snapshot:
+its matching markets are kept up to date from refresh deltas and its top
+markets by volume are cached until membership changes.
+"""
+
+import heapq
+from typing import Callable, Dict, List, Optional
+
+from snapshot import MarketSnapshot
+
+Predicate = Callable[[dict, float], bool]
+
+# Markets below this volume are never suggested by the built-in rules
+MIN_VOLUME = 1000
+
+
+class SuggestionView:
+    """Markets matching one rule, ranked by volume"""
+
+    def __init__(self, name: str, predicate: Predicate, reason: Callable[[dict], str], k: int = 5):
+        self.name = name
+        self.predicate = predicate
+        self.reason = reason
+        self.k = k
+        self.members: Dict[str, int] = {}
+        self._top: Optional[List[dict]] = []
+        self._floor = 0
+
+    def update(self, m: dict, spread: float):
+        ticker = m["ticker"]
+        if self.predicate(m, spread):
+            self.members[ticker] = m["volume"]
+            if self._top is not None and (m["volume"] >= self._floor or len(self._top) < self.k):
+                self._top = None
+        else:
+            self.remove(ticker)
+            return
+        if self._top is not None and any(e["ticker"] == ticker for e in self._top):
+            self._top = None
+
+    def remove(self, ticker: str):
+        if self.members.pop(ticker, None) is not None and self._top is not None:
+            if any(e["ticker"] == ticker for e in self._top):
+                self._top = None
+
+    def top(self, records: Callable[[str], Optional[dict]], quote: Callable[[str], Optional[dict]]) -> List[dict]:
+        """Cached top-k suggestions, rebuilt only after a change that affects them"""
+        if self._top is None:
+            best = heapq.nlargest(self.k, self.members.items(), key=lambda item: item[1])
+            top = []
+            for ticker, _ in best:
+                m = records(ticker)
+                if m is not None:
+                    top.append({**m, **(quote(ticker) or {}), "reason": self.reason(m)})
+            self._top = top
+            self._floor = best[-1][1] if len(best) == self.k else 0
+        return self._top
+
+
+def builtin_views(k: int = 5) -> List[SuggestionView]:
+    return [
+        # Balanced: good probability range with decent volume
+        SuggestionView(
+            "balanced",
+            lambda m, spread: 0.3 <= m["yes_price"] <= 0.7 and m["volume"] > 5000,
+            lambda m: "Good probability range with strong volume",
+            k,
+        ),
+        # High potential: longshots with volume
+        SuggestionView(
+            "high_potential",
+            lambda m, spread: m["yes_price"] < 0.2 and m["volume"] > 2000,
+            lambda m: f"Potential {1/m['yes_price']:.1f}x return if YES wins",
+            k,
+        ),
+        # Low risk: high probability with tight spread
+        SuggestionView(
+            "low_risk",
+            lambda m, spread: m["yes_price"] > 0.75 and spread < 0.03,
+            lambda m: "High probability with tight spread",
+            k,
+        ),
+        # Best value: unusual volume at extreme odds
+        SuggestionView(
+            "best_value",
+            lambda m, spread: (m["yes_price"] < 0.15 or m["yes_price"] > 0.85) and m["volume"] > 10000,
+            lambda m: "Unusual volume at extreme odds",
+            k,
+        ),
+    ]
+
+
+def threshold_view(rule: dict, k: int = 5) -> SuggestionView:
+    """View for a user rule of probability, volume and spread bounds"""
+
+    def predicate(m: dict, spread: float) -> bool:
+        return (
+            rule["min_probability"] <= m["yes_price"] <= rule["max_probability"]
+            and m["volume"] >= rule["min_volume"]
+            and spread <= rule["max_spread"]
+        )
+
+    reason = rule.get("reason") or f"Matches rule {rule['name']}"
+    return SuggestionView(rule["name"], predicate, lambda m: reason, k)
+
+
+class SuggestionIndex:
+    """Built-in and user-defined suggestion views over the full-market snapshot.
+
+    Only markets added or changed in a refresh are re-evaluated against
+    each view. `quote(ticker)` may supply executable prices from an order
+    book; its `book_spread` then replaces the snapshot spread in rule checks.
+    """
+
+    def __init__(self, quote: Optional[Callable[[str], Optional[dict]]] = None, k: int = 5):
+        self.quote = quote or (lambda ticker: None)
+        self.k = k
+        self.views: Dict[str, SuggestionView] = {v.name: v for v in builtin_views(k)}
+        self.builtin = set(self.views)
+        self.rules: Dict[str, dict] = {}
+        self.store = None
+
+    def get(self, name: str) -> Optional[List[dict]]:
+        view = self.views.get(name)
+        if view is None:
+            return None
+        if self.store is None:
+            return []
+        return view.top(self.store.get, self.quote)
+
+    def all(self) -> Dict[str, List[dict]]:
+        return {name: self.get(name) for name in self.views}
+
+    def add_rule(self, rule: dict) -> dict:
+        view = threshold_view(rule, self.k)
+        self.rules[rule["name"]] = rule
+        self.views[rule["name"]] = view
+        if self.store is not None:
+            for m in self.store.records:
+                self._update(view, m, self.quote(m["ticker"]))
+        return rule
+
+    def remove_rule(self, name: str) -> bool:
+        if name not in self.rules:
+            return False
+        del self.rules[name]
+        del self.views[name]
+        return True
+
+    def _update(self, view: SuggestionView, m: dict, quote: Optional[dict] = None):
+        if view.name in self.builtin and m["volume"] < MIN_VOLUME:
+            view.remove(m["ticker"])
+            return
+        spread = quote["book_spread"] if quote else m.get("spread", 0.02)
+        view.update(m, spread)
+
+    def reprice(self, tickers: List[str]):
+        """Re-check markets whose executable quote changed"""
+        if self.store is None:
+            return
+        for ticker in tickers:
+            m = self.store.get(ticker)
+            if m is not None:
+                self.evaluate(m)
+
+    def evaluate(self, m: dict):
+        """Re-check one market against every view"""
+        quote = self.quote(m["ticker"])
+        for view in self.views.values():
+            self._update(view, m, quote)
+
+    def discard(self, ticker: str):
+        """Drop a market that is no longer listed from every view"""
+        for view in self.views.values():
+            view.remove(ticker)
+
+    def on_refresh(self, snapshot: MarketSnapshot):
+        if snapshot.key != "":
+            return
+        self.store = store = snapshot.store
+        delta = snapshot.delta
+        for ticker in delta.removed:
+            self.discard(ticker)
+        for rows in (delta.added, delta.changed):
+            for i in rows:
+                self.evaluate(store.records[i])
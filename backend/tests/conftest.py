@@ -0,0 +1,32 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Backend modules are imported flat, as uvicorn runs them from backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def client():
+    """The API wired to the bench's mock upstream; its lifespan runs once per session"""
+    import httpx
+    from fastapi.testclient import TestClient
+
+    from bench.mock_upstream import MockConfig, create_app
+
+    tmp = tempfile.mkdtemp(prefix="kalshi-tests-")
+    os.environ["PAPER_DB_PATH"] = os.path.join(tmp, "paper.db")
+    os.environ["KALSHI_API_URL"] = "http://upstream"
+    os.environ["ANTHROPIC_API_URL"] = "http://upstream"
+    os.environ.pop("ANTHROPIC_API_KEY", None)
+
+    import main as api
+
+    upstream = httpx.ASGITransport(app=create_app(MockConfig(markets=60, market_latency=0, llm_latency=0)))
+    api.kalshi.transport = upstream
+    api.anthropic.transport = upstream
+
+    with TestClient(api.app) as client:
+        yield client
@@ -0,0 +1,84 @@
+import asyncio
+import time
+
+from alerts import AlertEngine, QueueNotifier
+from snapshot import MarketSnapshot
+
+
+def market(ticker, price):
+    return {
+        "ticker": ticker,
+        "title": ticker,
+        "yes_price": price,
+        "no_price": round(1 - price, 2),
+        "volume": 100,
+        "spread": 0.01,
+        "close_time": "",
+        "category": "general",
+    }
+
+
+def alert(ticker, condition, target):
+    return {"ticker": ticker, "title": ticker, "condition": condition, "target_price": target}
+
+
+def snapshots(*prices):
+    """Snapshots of one market "A" at each price, each diffed against the last"""
+    previous = None
+    for price in prices:
+        previous = MarketSnapshot("", [market("A", price)], time.monotonic(), previous)
+        yield previous
+
+
+def test_evaluate_fires_only_crossed_thresholds():
+    engine = AlertEngine()
+
+    async def setup():
+        for target in (0.3, 0.5, 0.7):
+            await engine.add(alert("A", "above", target))
+        for target in (0.2, 0.4):
+            await engine.add(alert("A", "below", target))
+
+    asyncio.run(setup())
+    fired = engine.evaluate("A", 0.5)
+    assert sorted((a["condition"], a["target_price"]) for a in fired) == [("above", 0.3), ("above", 0.5)]
+    # Fired alerts are deactivated, so the same price fires nothing more
+    assert engine.evaluate("A", 0.5) == []
+    fired = engine.evaluate("A", 0.2)
+    assert sorted(a["target_price"] for a in fired) == [0.2, 0.4]
+    assert all(a["trigger_price"] == 0.2 for a in fired)
+
+
+def test_on_refresh_notifies_changed_markets():
+    notifier = QueueNotifier()
+    engine = AlertEngine([notifier])
+    asyncio.run(engine.add(alert("A", "above", 0.6)))
+    first, second = snapshots(0.5, 0.65)
+    engine.on_refresh(first)
+    assert notifier.recent() == []
+    engine.on_refresh(second)
+    assert [e["target_price"] for e in notifier.recent()] == [0.6]
+
+
+def test_shared_alerts_fire_once_across_engines(tmp_path):
+    path = str(tmp_path / "alerts.db")
+    queues = [QueueNotifier(), QueueNotifier()]
+    engines = [AlertEngine([q], db_path=path) for q in queues]
+    for engine in engines:
+        engine.open()
+    try:
+        async def scenario():
+            created = await engines[0].add(alert("A", "above", 0.6))
+            # The other worker picks the alert up from the database
+            assert [a["id"] for a in await engines[1].list()] == [created["id"]]
+            first, second = snapshots(0.5, 0.7)
+            for snapshot in (first, second):
+                await asyncio.gather(*(engine.on_refresh(snapshot) for engine in engines))
+            return await engines[1].triggered()
+
+        triggered = asyncio.run(scenario())
+        assert len(queues[0].recent()) + len(queues[1].recent()) == 1
+        assert [a["trigger_price"] for a in triggered] == [0.7]
+    finally:
+        for engine in engines:
+            engine.close()
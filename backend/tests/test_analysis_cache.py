@@ -0,0 +1,66 @@
+import asyncio
+
+from analysis_cache import AnalysisCache
+
+
+class Analyst:
+    def __init__(self, cacheable=True):
+        self.calls = 0
+        self.cacheable = cacheable
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {"ai_probability": 0.6, "call": self.calls}, self.cacheable
+
+
+def test_concurrent_requests_share_one_llm_call():
+    cache = AnalysisCache()
+    analyst = Analyst()
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_compute("A", 0.5, analyst) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+    assert analyst.calls == 1
+    assert all(r == results[0] for r in results)
+    assert cache.stats["coalesced"] == 4
+
+
+def test_price_move_invalidates():
+    cache = AnalysisCache(price_threshold=0.03)
+    analyst = Analyst()
+
+    async def scenario():
+        await cache.get_or_compute("A", 0.50, analyst)
+        await cache.get_or_compute("A", 0.52, analyst)
+        await cache.get_or_compute("A", 0.60, analyst)
+
+    asyncio.run(scenario())
+    assert analyst.calls == 2
+    assert cache.stats["invalidated"] == 1
+
+
+def test_fallback_results_are_not_cached():
+    cache = AnalysisCache()
+    analyst = Analyst(cacheable=False)
+
+    async def scenario():
+        await cache.get_or_compute("A", 0.5, analyst)
+        await cache.get_or_compute("A", 0.5, analyst)
+
+    asyncio.run(scenario())
+    assert analyst.calls == 2
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "analyses.db")
+    cache = AnalysisCache(db_path=path)
+    cache.open()
+    asyncio.run(cache.get_or_compute("A", 0.5, Analyst()))
+    cache.close()
+
+    reopened = AnalysisCache(db_path=path)
+    reopened.open()
+    assert reopened.get("A", 0.5)["ai_probability"] == 0.6
+    reopened.close()
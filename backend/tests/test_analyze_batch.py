@@ -0,0 +1,29 @@
+import json
+
+
+def test_ndjson_streams_one_result_per_unique_ticker(client):
+    tickers = [m["ticker"] for m in client.get("/api/markets", params={"limit": 3}).json()]
+    response = client.post("/api/analyze/batch", json={"tickers": tickers + tickers[:1]})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    results = [json.loads(line) for line in response.text.splitlines() if line]
+    assert sorted(r["market_ticker"] for r in results) == sorted(tickers)
+
+
+def test_sse_ends_with_done_event(client):
+    ticker = client.get("/api/markets", params={"limit": 1}).json()[0]["ticker"]
+    response = client.post("/api/analyze/batch", json={"tickers": [ticker], "format": "sse"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [e for e in response.text.split("\n\n") if e]
+    assert events[0].startswith("event: analysis\n")
+    assert json.loads(events[0].split("data: ", 1)[1])["market_ticker"] == ticker
+    assert events[-1] == "event: done\ndata: {}"
+
+
+def test_oversized_batch_is_rejected(client):
+    import main
+
+    tickers = [f"T{i}" for i in range(main.ANALYSIS_BATCH_MAX + 1)]
+    assert client.post("/api/analyze/batch", json={"tickers": tickers}).status_code == 400
@@ -0,0 +1,44 @@
+import time
+
+from arbitrage import ArbitrageScanner
+from snapshot import MarketSnapshot
+
+
+def market(ticker, yes_price, no_price, yes_quoted=True, no_quoted=True):
+    return {
+        "ticker": ticker,
+        "event_ticker": "EV",
+        "title": ticker,
+        "yes_price": yes_price,
+        "no_price": no_price,
+        "volume": 100,
+        "spread": abs(yes_price - (1 - no_price)),
+        "close_time": "",
+        "category": "general",
+        "yes_quoted": yes_quoted,
+        "no_quoted": no_quoted,
+    }
+
+
+def scan(markets):
+    scanner = ArbitrageScanner(contracts=100)
+    scanner.set_exclusive({"EV": True})
+    scanner.on_refresh(MarketSnapshot("", markets, time.monotonic()))
+    return {o.get("type") for o in scanner.top(50)}
+
+
+def test_underpriced_event_is_found():
+    # Three outcomes whose YES asks sum to 0.75
+    markets = [market(f"EV-{i}", 0.25, 0.77) for i in range(3)]
+    assert "event_yes_underpriced" in scan(markets)
+
+
+def test_missing_ask_voids_the_basket():
+    # The third outcome has no YES offer; its 0.50 placeholder must not be bought
+    markets = [market("EV-0", 0.2, 0.82), market("EV-1", 0.2, 0.82), market("EV-2", 0.5, 0.52, yes_quoted=False)]
+    assert scan(markets) == set()
+
+
+def test_missing_ask_hides_single_market_checks():
+    # 0.50 + 0.30 would look underpriced and 20c wide, but NO has no offer
+    assert scan([market("EV-0", 0.5, 0.3, no_quoted=False)]) == set()
@@ -0,0 +1,86 @@
+import pytest
+
+from backtest.data import ReplayState, iter_frames
+from backtest.engine import Simulator
+from backtest.recorder import SnapshotRecorder, frame_path
+from fees import kalshi_fee
+from store import MarketStore
+
+DAY = 1735732800.0  # 2025-01-01T12:00:00Z
+
+
+def market(ticker, price=0.5, volume=100):
+    return {
+        "ticker": ticker,
+        "title": ticker,
+        "yes_price": price,
+        "no_price": round(1 - price, 2),
+        "volume": volume,
+        "spread": 0.01,
+        "close_time": "",
+        "category": "general",
+    }
+
+
+def test_recorded_frames_replay_to_the_last_snapshot(tmp_path):
+    recorder = SnapshotRecorder(str(tmp_path))
+    snapshots = [
+        [market("A"), market("B")],
+        [market("A", 0.6), market("B"), market("C")],
+        [market("A", 0.6), market("C", volume=200)],
+    ]
+    for i, markets in enumerate(snapshots):
+        recorder.record(MarketStore(markets), DAY + 60 * i)
+
+    frames = list(iter_frames(frame_path(str(tmp_path), "2025-01-01")))
+    assert [f["keyframe"] for f in frames] == [True, False, False]
+    assert frames[1]["markets"] == [market("C"), {"ticker": "A", "yes_price": 0.6, "no_price": 0.4, "volume": 100, "spread": 0.01}]
+    assert frames[2]["removed"] == ["B"]
+
+    state = ReplayState()
+    for frame in frames:
+        state.apply(frame)
+    assert state.records == snapshots[-1]
+
+
+def test_probability_is_written_when_it_changes(tmp_path):
+    probabilities = {"A": 0.7}
+    recorder = SnapshotRecorder(str(tmp_path), probability=probabilities.get)
+    for i, prob in enumerate((0.7, 0.7, 0.8)):
+        probabilities["A"] = prob
+        recorder.record(MarketStore([market("A")]), DAY + 60 * i)
+
+    frames = list(iter_frames(frame_path(str(tmp_path), "2025-01-01")))
+    assert [f["markets"] for f in frames] == [
+        [{**market("A"), "ai_probability": 0.7}],
+        [],
+        [{"ticker": "A", "ai_probability": 0.8}],
+    ]
+
+
+def test_settled_winner_pays_out():
+    sim = Simulator("test", 100, {"A": ("yes", DAY + 10), "B": ("yes", DAY + 10)})
+    assert sim.buy(DAY, "A", "yes", 0.4, 10)
+    assert sim.buy(DAY, "B", "no", 0.5, 10)
+    assert not sim.buy(DAY, "A", "yes", 0.4, 10)
+
+    fees = kalshi_fee(0.4, 10) + kalshi_fee(0.5, 10)
+    sim.settle_due(DAY + 10)
+    assert sim.cash == pytest.approx(100 - 9 - fees + 10)
+    report = sim.report()
+    assert report["wins"] == 1 and report["settled"] == 2
+    assert report["pnl"] == pytest.approx(round(1 - fees, 2))
+
+
+def test_order_is_sized_to_cash_and_fees():
+    sim = Simulator("test", 10, {})
+    assert sim.buy(DAY, "A", "yes", 0.5, 100)
+    contracts = sim.positions["A"]["contracts"]
+    assert 0.5 * contracts + kalshi_fee(0.5, contracts) <= 10
+    assert 0.5 * (contracts + 1) + kalshi_fee(0.5, contracts + 1) > 10
+
+
+def test_market_recorded_after_settlement_is_not_bought():
+    sim = Simulator("test", 100, {"A": ("yes", DAY)})
+    assert not sim.buy(DAY + 1, "A", "yes", 0.4, 10)
+    assert sim.stats["skipped_settled"] == 1
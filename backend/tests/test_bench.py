@@ -0,0 +1,51 @@
+from collections import defaultdict
+
+from bench.mock_upstream import MockConfig, synthetic_markets
+from bench.run import check
+
+
+def result(**overrides):
+    return {"requests": 100, "errors": 0, "empty": 0, "rps": 1000, "p95_ms": 5, "peak_rss_mb": 100, **overrides}
+
+
+def test_check_flags_each_threshold():
+    thresholds = {
+        "scenarios": {"markets": {"p95_ms": 10, "min_rps": 500, "max_error_rate": 0, "require_results": True}},
+        "peak_rss_mb": 200,
+    }
+    assert check({"markets": result()}, thresholds) == []
+
+    failures = check({"markets": result(p95_ms=20, rps=100, errors=1, empty=3, peak_rss_mb=300)}, thresholds)
+    assert failures == [
+        "markets: p95 20ms > 10ms",
+        "markets: 100 rps < 500 rps",
+        "markets: 1/100 errors",
+        "markets: 3/100 empty responses",
+        "peak RSS 300MB > 200MB",
+    ]
+
+
+def test_empty_responses_pass_without_require_results():
+    thresholds = {"scenarios": {"analyze": {"max_error_rate": 0}}}
+    assert check({"analyze": result(empty=100)}, thresholds) == []
+
+
+def asks_by_event(markets):
+    events = defaultdict(lambda: [0, 0])
+    for m in markets:
+        events[m["event_ticker"]][0] += m["yes_ask"]
+        events[m["event_ticker"]][1] += m["no_ask"]
+    return events
+
+
+def test_fair_universe_has_no_basket_arbitrage():
+    markets = synthetic_markets(MockConfig(markets=400, mispriced=0))
+    assert len(markets) == 400
+    for yes, no in asks_by_event(markets).values():
+        assert yes > 100 and no > 300
+
+
+def test_mispriced_events_are_underpriced():
+    markets = synthetic_markets(MockConfig(markets=400, mispriced=1))
+    for yes, no in asks_by_event(markets).values():
+        assert yes < 100 or no < 300
@@ -0,0 +1,30 @@
+import pytest
+
+from categories import classify
+
+
+@pytest.mark.parametrize("ticker, title, category", [
+    ("KXPRES-28", "Who will win the 2028 presidential election?", "politics"),
+    ("KXBTCD-25DEC", "Bitcoin above 100k on Dec 31?", "crypto"),
+    ("KXNFLGAME-1", "Chiefs vs Bills", "sports"),
+    ("KXFED-25", "Fed rates cut in March?", "economics"),
+    ("KXWEATHER-NYC", "High temperature in NYC", "climate"),
+    ("KXAI-25", "Frontier model release", "tech"),
+    ("MISC-1", "Will it happen?", "general"),
+])
+def test_classify(ticker, title, category):
+    assert classify(ticker, title) == category
+
+
+def test_title_keywords_beat_series_prefix():
+    # An election market listed under a crypto series is still politics
+    assert classify("KXBTC-1", "Will crypto decide the election?") == "politics"
+
+
+def test_keywords_match_whole_words():
+    # "rate" must not match "pirates", nor "fed" match "federer"
+    assert classify("MISC-2", "Will the Pirates beat Federer?") == "general"
+
+
+def test_short_series_prefix_stands_alone():
+    assert classify("KXAIRLINE-1", "Flight delays") == "general"
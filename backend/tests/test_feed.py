@@ -0,0 +1,106 @@
+import asyncio
+import json
+
+from feed import FeedFilter, MarketFeed
+from snapshot import SnapshotCache
+
+
+def market(ticker, price=0.5, volume=100):
+    return {
+        "ticker": ticker,
+        "title": ticker,
+        "yes_price": price,
+        "no_price": round(1 - price, 2),
+        "volume": volume,
+        "spread": 0.01,
+        "close_time": "",
+        "category": "general",
+    }
+
+
+class Upstream:
+    def __init__(self, markets):
+        self.markets = markets
+
+    async def __call__(self, key):
+        return list(self.markets)
+
+
+def test_snapshot_then_delta():
+    upstream = Upstream([market("A"), market("B")])
+    feed = MarketFeed(SnapshotCache(upstream))
+
+    async def scenario():
+        subscription = await feed.subscribe(FeedFilter())
+        first = json.loads(await subscription.next_message())
+
+        upstream.markets = [market("A", 0.6), market("C")]
+        await feed.cache.refresh("")
+        return first, json.loads(await subscription.next_message())
+
+    first, delta = asyncio.run(scenario())
+    assert first["type"] == "snapshot"
+    assert {m["ticker"] for m in first["markets"]} == {"A", "B"}
+    assert delta["type"] == "delta"
+    assert [m["ticker"] for m in delta["added"]] == ["C"]
+    assert delta["removed"] == ["B"]
+    assert delta["changed"] == [{"ticker": "A", "yes_price": 0.6, "no_price": 0.4, "volume": 100, "spread": 0.01}]
+
+
+def test_market_leaving_filtered_view_is_removed():
+    upstream = Upstream([market("A", volume=500), market("B", volume=500)])
+    feed = MarketFeed(SnapshotCache(upstream))
+
+    async def scenario():
+        subscription = await feed.subscribe(FeedFilter(min_volume=200))
+        await subscription.next_message()
+
+        upstream.markets = [market("A", volume=500), market("B", volume=50)]
+        await feed.cache.refresh("")
+        return json.loads(await subscription.next_message())
+
+    delta = asyncio.run(scenario())
+    assert delta["removed"] == ["B"]
+    assert delta["added"] == [] and delta["changed"] == []
+
+
+def test_unchanged_refresh_sends_nothing():
+    upstream = Upstream([market("A")])
+    feed = MarketFeed(SnapshotCache(upstream))
+
+    async def scenario():
+        subscription = await feed.subscribe(FeedFilter())
+        await subscription.next_message()
+        await feed.cache.refresh("")
+        return subscription.queue.qsize()
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_slow_subscriber_is_resynced_with_a_snapshot():
+    upstream = Upstream([market("A")])
+    feed = MarketFeed(SnapshotCache(upstream), max_queue=2)
+
+    async def scenario():
+        subscription = await feed.subscribe(FeedFilter())
+        for i in range(5):
+            upstream.markets = [market("A", 0.1 + i / 10)]
+            await feed.cache.refresh("")
+        return json.loads(await subscription.next_message()), subscription.queue.qsize()
+
+    message, backlog = asyncio.run(scenario())
+    assert message["type"] == "snapshot"
+    assert message["markets"][0]["yes_price"] == 0.5
+    assert backlog == 0
+
+
+def test_websocket_sends_snapshot_and_resubscribes(client):
+    with client.websocket_connect("/ws/markets?limit=5") as websocket:
+        first = json.loads(websocket.receive_text())
+        assert first["type"] == "snapshot"
+        assert len(first["markets"]) == 5
+
+        websocket.send_json({"action": "subscribe", "limit": 2})
+        second = json.loads(websocket.receive_text())
+        assert second["type"] == "snapshot"
+        assert [m["ticker"] for m in second["markets"]] == [m["ticker"] for m in first["markets"][:2]]
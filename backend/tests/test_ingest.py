@@ -0,0 +1,64 @@
+import asyncio
+
+import httpx
+import pytest
+
+from ingest import iter_markets
+from upstream import UpstreamClient
+
+
+def upstream(markets_by_series):
+    """Kalshi-style /markets with integer cursors, per series_ticker"""
+    requests = []
+
+    def handler(request):
+        params = request.url.params
+        requests.append(dict(params))
+        series = params.get("series_ticker", "")
+        if series == "BROKEN":
+            return httpx.Response(500, json={})
+        rows = markets_by_series.get(series, [])
+        start = int(params.get("cursor") or 0)
+        limit = int(params["limit"])
+        cursor = str(start + limit) if start + limit < len(rows) else ""
+        return httpx.Response(200, json={"markets": rows[start:start + limit], "cursor": cursor})
+
+    client = UpstreamClient("kalshi", "http://upstream", retries=0, transport=httpx.MockTransport(handler))
+    return client, requests
+
+
+def collect(client, series, **kwargs):
+    async def go():
+        try:
+            return [m async for m in iter_markets(client, series, lambda m: m["ticker"], **kwargs)]
+        finally:
+            await client.aclose()
+
+    return asyncio.run(go())
+
+
+def rows(prefix, n):
+    return [{"ticker": f"{prefix}{i}"} for i in range(n)]
+
+
+def test_follows_every_cursor_page():
+    client, requests = upstream({"": rows("M", 250)})
+    assert collect(client, "", page_size=100) == [f"M{i}" for i in range(250)]
+    assert [r.get("cursor") for r in requests] == [None, "100", "200"]
+
+
+def test_stops_at_max_pages():
+    client, _ = upstream({"": rows("M", 250)})
+    assert len(collect(client, "", page_size=100, max_pages=2)) == 200
+
+
+def test_walks_each_series_of_a_filter():
+    client, _ = upstream({"A": rows("A", 30), "B": rows("B", 5)})
+    tickers = collect(client, "A,B", page_size=10, concurrency=2)
+    assert sorted(tickers) == sorted(f"A{i}" for i in range(30)) + sorted(f"B{i}" for i in range(5))
+
+
+def test_failed_series_surfaces_after_the_others():
+    client, _ = upstream({"A": rows("A", 3)})
+    with pytest.raises(httpx.HTTPStatusError):
+        collect(client, "A,BROKEN", page_size=10)
@@ -0,0 +1,56 @@
+import time
+
+import numpy as np
+
+from kelly import constrained_kelly, kelly_fraction
+
+
+def test_single_bet_matches_kelly_fraction():
+    f = constrained_kelly([0.6], [0.5], max_total=1.0)
+    assert np.allclose(f, kelly_fraction([0.6], [0.5]), atol=1e-6)
+
+
+def test_independent_bets_hold_back_cash_without_cap():
+    # YES at 0.50 with p=0.9, and NO at 0.74 with p(NO)=0.9: both can lose together
+    f = constrained_kelly([0.9, 0.9], [0.5, 0.74], max_total=10.0)
+    assert (f > 0).all()
+    assert f.sum() < 1
+
+
+def test_independent_bets_below_sum_of_single_fractions():
+    prob, price = np.array([0.9, 0.9]), np.array([0.5, 0.74])
+    f = constrained_kelly(prob, price, max_total=1.0)
+    assert f.sum() < kelly_fraction(prob, price).sum()
+    assert f.sum() < 1
+
+
+def test_default_cap_keeps_half_in_cash():
+    prob = np.full(40, 0.8)
+    price = np.full(40, 0.5)
+    f = constrained_kelly(prob, price)
+    assert f.sum() <= 0.5 + 1e-9
+
+
+def test_sampled_batch_respects_cap_and_edges():
+    rng = np.random.default_rng(1)
+    price = rng.uniform(0.05, 0.95, 500)
+    prob = np.clip(price + rng.normal(0.0, 0.05, 500), 0.01, 0.99)
+    f = constrained_kelly(prob, price, max_total=0.9)
+    assert f.sum() <= 0.9 + 1e-9
+    assert (f[prob <= price] == 0).all()
+
+
+def test_no_edge_allocates_nothing():
+    assert constrained_kelly([0.4, 0.5], [0.5, 0.5], max_total=1.0).sum() == 0
+
+
+def test_500_bets_solve_in_milliseconds():
+    rng = np.random.default_rng(1)
+    price = rng.uniform(0.05, 0.95, 500)
+    prob = np.clip(price + rng.normal(0.0, 0.05, 500), 0.01, 0.99)
+    elapsed = []
+    for _ in range(3):
+        start = time.perf_counter()
+        constrained_kelly(prob, price, max_total=0.9)
+        elapsed.append(time.perf_counter() - start)
+    assert min(elapsed) < 0.2
@@ -0,0 +1,73 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ledger import InsufficientBalance, PaperLedger
+
+
+def trade(ticker="A", side="yes", price=0.4, quantity=10):
+    return {"ticker": ticker, "title": ticker, "side": side, "price": price,
+            "quantity": quantity, "timestamp": "2025-01-01T00:00:00"}
+
+
+def open_ledger(tmp_path, balance=100):
+    ledger = PaperLedger(str(tmp_path / "paper.db"), starting_balance=balance)
+    ledger.open()
+    return ledger
+
+
+def test_trades_aggregate_into_positions(tmp_path):
+    ledger = open_ledger(tmp_path)
+    ledger.place_trade(trade(price=0.4, quantity=10))
+    balance = ledger.place_trade(trade(price=0.6, quantity=10))
+
+    portfolio = ledger.portfolio()
+    assert balance == pytest.approx(90)
+    assert portfolio["trade_count"] == 2
+    assert portfolio["total_cost"] == pytest.approx(10)
+    [position] = portfolio["positions"]
+    assert position["quantity"] == 20
+    assert position["price"] == pytest.approx(0.5)
+
+
+def test_overspend_is_rejected_without_a_trade(tmp_path):
+    ledger = open_ledger(tmp_path, balance=5)
+    with pytest.raises(InsufficientBalance):
+        ledger.place_trade(trade(price=0.6, quantity=10))
+
+    assert ledger.portfolio()["balance"] == 5
+    assert ledger.trades() == []
+
+
+def test_concurrent_trades_never_overdraw(tmp_path):
+    ledger = open_ledger(tmp_path, balance=10)
+
+    def buy(_):
+        try:
+            ledger.place_trade(trade(price=0.5, quantity=2))
+            return True
+        except InsufficientBalance:
+            return False
+
+    with ThreadPoolExecutor(8) as pool:
+        filled = sum(pool.map(buy, range(40)))
+
+    assert filled == 10
+    assert ledger.portfolio()["balance"] == pytest.approx(0)
+
+
+def test_reset_starts_a_new_epoch_and_keeps_history(tmp_path):
+    ledger = open_ledger(tmp_path)
+    ledger.place_trade(trade())
+    ledger.reset()
+    ledger.place_trade(trade(ticker="B"))
+
+    assert [t["ticker"] for t in ledger.trades()] == ["B"]
+    assert [p["ticker"] for p in ledger.positions()] == ["B"]
+    assert ledger.portfolio()["balance"] == pytest.approx(96)
+    ledger.close()
+
+    db = sqlite3.connect(str(tmp_path / "paper.db"))
+    assert db.execute("SELECT count(*) FROM trades").fetchone()[0] == 2
+    assert db.execute("SELECT epoch, trade_count FROM resets").fetchall() == [(0, 1)]
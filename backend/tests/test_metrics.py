@@ -0,0 +1,61 @@
+import threading
+import time
+
+from metrics import Counter, Histogram, Registry, SamplingProfiler
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency", ["route"], buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(value, route="a")
+
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{route="a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="a",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{route="a",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{route="a"} 6.05' in lines
+    assert 'latency_seconds_count{route="a"} 4' in lines
+
+
+def test_registry_skips_a_failing_metric():
+    registry = Registry()
+    counter = registry.register(Counter("hits_total", "Hits", ["cache"]))
+    registry.gauge("broken", "Raises on read", ["x"], read=lambda: 1 / 0)
+    counter.inc(cache="a")
+    counter.inc(2, cache="a")
+
+    text = registry.render()
+    assert 'hits_total{cache="a"} 3' in text
+    assert "broken" not in text
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_profiler_samples_a_busy_thread():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,))
+    worker.start()
+    profiler = SamplingProfiler(interval=0.001)
+    try:
+        profiler.start()
+        time.sleep(0.2)
+    finally:
+        profiler.stop(timeout=1)
+        stop.set()
+        worker.join()
+
+    report = profiler.report()
+    assert not profiler.running
+    assert report["samples"] > 0
+    assert any("test_metrics.py:busy_loop" in s["stack"] for s in report["stacks"])
+    assert "test_metrics.py:busy_loop" in profiler.folded()
+
+
+def test_metrics_endpoint_exposes_stage_timings(client):
+    client.get("/api/markets", params={"limit": 1})
+    text = client.get("/metrics").text
+    assert 'kalshi_plus_stage_seconds_count{stage="index"}' in text
+    assert "kalshi_plus_cache_events_total" in text
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from orderbook import OrderBook, OrderBookManager
+
+
+def make_book():
+    book = OrderBook("T")
+    # NO bids at 60 and 58 are YES asks at 40 and 42
+    book.load({"yes": [[35, 10]], "no": [[60, 5], [58, 10]]})
+    return book
+
+
+def test_fill_walks_the_opposite_side():
+    fill = make_book().fill("yes", 8)
+    assert fill["filled"] == 8
+    assert fill["worst_price"] == 0.42
+    assert fill["average_price"] == round((5 * 40 + 3 * 42) / 8 / 100, 4)
+    assert fill["slippage"] == round(fill["average_price"] - 0.40, 4)
+    assert fill["notional"] == round((5 * 40 + 3 * 42) / 100, 2)
+
+
+def test_fill_stops_at_available_depth():
+    assert make_book().fill("yes", 100)["filled"] == 15
+
+
+def test_empty_fill_has_the_same_keys():
+    empty = OrderBook("T").fill("yes", 10)
+    assert empty.keys() == make_book().fill("yes", 10).keys()
+    assert empty["filled"] == 0
+    assert empty["notional"] == 0
+
+
+class NoSnapshot:
+    def peek(self, key):
+        return None
+
+
+def test_failing_listener_does_not_stop_refresh():
+    manager = OrderBookManager(client=None, markets=NoSnapshot())
+
+    async def fetch(ticker):
+        return make_book()
+
+    manager.fetch = fetch
+    manager._watched["T"] = time.monotonic()
+    seen = []
+
+    def broken(tickers):
+        raise RuntimeError("listener bug")
+
+    manager.listeners.extend([broken, seen.append])
+    assert asyncio.run(manager.refresh()) == ["T"]
+    assert seen == [["T"]]
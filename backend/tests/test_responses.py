@@ -0,0 +1,34 @@
+import gzip
+import json
+
+
+def test_repeat_request_is_not_modified(client):
+    first = client.get("/api/markets", params={"limit": 5})
+    etag = first.headers["etag"]
+
+    second = client.get("/api/markets", params={"limit": 5}, headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert second.headers["etag"] == etag
+
+
+def test_other_query_has_its_own_etag(client):
+    five = client.get("/api/markets", params={"limit": 5})
+    six = client.get("/api/markets", params={"limit": 6}, headers={"If-None-Match": five.headers["etag"]})
+    assert six.status_code == 200
+    assert six.headers["etag"] != five.headers["etag"]
+    assert len(six.json()) == 6
+
+
+def test_gzip_body_has_a_separate_etag(client):
+    plain = client.get("/api/markets", params={"limit": 50}, headers={"Accept-Encoding": "identity"})
+    zipped = client.get("/api/markets", params={"limit": 50}, headers={"Accept-Encoding": "gzip"})
+
+    assert zipped.headers["content-encoding"] == "gzip"
+    assert zipped.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    assert zipped.json() == plain.json()
+
+
+def test_fields_projection(client):
+    markets = client.get("/api/markets", params={"limit": 3, "fields": "ticker,yes_price"}).json()
+    assert markets and all(set(m) == {"ticker", "yes_price"} for m in markets)
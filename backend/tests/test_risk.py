@@ -0,0 +1,45 @@
+import numpy as np
+
+from risk import mark_positions, simulate_outcomes
+from store import MarketStore
+
+
+def store(yes_price):
+    return MarketStore([{
+        "ticker": "A",
+        "title": "A",
+        "yes_price": yes_price,
+        "no_price": round(1 - yes_price, 6),
+        "volume": 100,
+        "spread": 0.0,
+        "close_time": "",
+        "category": "general",
+    }])
+
+
+def position(side, quantity, cost):
+    return {"ticker": "A", "side": side, "quantity": quantity, "cost": cost}
+
+
+def test_large_positions_keep_exact_pnl():
+    # 16,777,217 is the first integer float32 cannot hold
+    quantity = 2 ** 24 + 1
+    result = simulate_outcomes([position("YES", quantity, 1.0)], store(1.0), paths=1000, seed=1)
+    assert result["worst"] == result["best"] == quantity - 1.0
+
+
+def test_near_certain_price_is_not_rounded_to_certain():
+    # 0.99999 rounded to 1/65536 steps would be 1.0 and never lose
+    result = simulate_outcomes([position("YES", 1, 0.5)], store(0.99999), paths=400_000, seed=2)
+    # About four of the paths settle NO
+    assert result["worst"] == -0.5
+    assert result["prob_loss"] < 1e-4
+
+
+def test_unlisted_positions_are_marked_at_cost():
+    positions = [position("NO", 10, 4.0), {**position("YES", 5, 2.0), "ticker": "GONE"}]
+    valuation = mark_positions(positions, store(0.7))
+    assert positions[0]["mark"] == 0.3
+    assert positions[1]["mark"] == 0.4
+    assert valuation["market_value"] == round(10 * 0.3 + 5 * 0.4, 2)
+    assert np.isclose(valuation["unrealized_pnl"], 3.0 + 2.0 - 6.0)
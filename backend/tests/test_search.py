@@ -0,0 +1,36 @@
+from search import SearchIndex
+
+
+def markets(*titles):
+    return [{"ticker": f"T{i}", "title": title} for i, title in enumerate(titles)]
+
+
+def found(index, query):
+    return index.matching_tickers(query)
+
+
+def test_prefix_infix_and_typo_matches():
+    index = SearchIndex(markets("Bitcoin above 100k", "Ethereum merge", "Super Bowl winner"))
+    assert found(index, "bitc") == {"T0"}
+    assert found(index, "coin") == {"T0"}
+    assert found(index, "etherium") == {"T1"}
+    assert found(index, "super bowl") == {"T2"}
+    # Every query token must match
+    assert found(index, "bitcoin merge") == set()
+
+
+def test_exact_matches_outrank_prefix_matches():
+    index = SearchIndex(markets("Rate cut in March", "Rates held steady"))
+    ids, scores = index.search("rate")
+    by_ticker = {t: scores[list(ids).index(d)] for t, d in index.doc_ids.items() if d in ids}
+    assert by_ticker["T0"] > by_ticker["T1"]
+
+
+def test_update_reindexes_only_changed_titles():
+    index = SearchIndex(markets("Bitcoin above 100k", "Ethereum merge"))
+    index.update([{"ticker": "T0", "title": "Bitcoin above 100k"}, {"ticker": "T1", "title": "Solana outage"}])
+    assert found(index, "ethereum") == set()
+    assert found(index, "solana") == {"T1"}
+    index.update([{"ticker": "T1", "title": "Solana outage"}])
+    assert found(index, "bitcoin") == set()
+    assert "bitcoin" not in index.vocab
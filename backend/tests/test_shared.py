@@ -0,0 +1,89 @@
+import asyncio
+
+import numpy as np
+
+from shared import FileBus, LeaderLock
+from snapshot import MarketSnapshot, SnapshotCache
+
+
+def market(ticker, price=0.5):
+    return {
+        "ticker": ticker,
+        "title": ticker,
+        "yes_price": price,
+        "no_price": round(1 - price, 2),
+        "volume": 100,
+        "spread": 0.01,
+        "close_time": "",
+        "category": "general",
+    }
+
+
+class Upstream:
+    def __init__(self, price):
+        self.price = price
+        self.calls = 0
+
+    async def __call__(self, key):
+        self.calls += 1
+        return [market("A", self.price), market("B", self.price)]
+
+
+def test_only_one_lock_holder(tmp_path):
+    first = LeaderLock(str(tmp_path / "leader.lock"))
+    second = LeaderLock(str(tmp_path / "leader.lock"))
+
+    assert first.acquire()
+    assert not second.acquire()
+    first.release()
+    assert second.acquire()
+    second.release()
+
+
+def test_filebus_round_trip_and_pruning(tmp_path):
+    bus = FileBus(str(tmp_path), keep=2)
+    for price in (0.1, 0.2, 0.3):
+        snapshot = MarketSnapshot("", [market("A", price)], 0.0)
+        generation = bus.publish(snapshot)
+
+    published = bus.load("")
+    assert generation == published.generation == 3
+    assert bus.load("", newer_than=3) is None
+    assert published.records == [market("A", 0.3)]
+    assert np.asarray(published.columns["yes_price"]).tolist() == snapshot.store.yes_price.tolist()
+    assert sorted(p.name for p in (tmp_path / "snapshots").glob("*/gen-*")) == ["gen-000000000002", "gen-000000000003"]
+
+
+def test_requested_keys_reach_the_leader(tmp_path):
+    FileBus(str(tmp_path)).request("KXBTC")
+    assert FileBus(str(tmp_path)).requested(max_age=60) == ["KXBTC"]
+
+
+def test_follower_takes_over_from_a_dead_leader(tmp_path):
+    leader_lock = LeaderLock(str(tmp_path / "leader.lock"))
+    follower_lock = LeaderLock(str(tmp_path / "leader.lock"))
+    assert leader_lock.acquire() and not follower_lock.acquire()
+
+    leader_upstream, follower_upstream = Upstream(0.4), Upstream(0.7)
+    leader = SnapshotCache(leader_upstream, bus=FileBus(str(tmp_path)), leader=leader_lock)
+    follower = SnapshotCache(follower_upstream, ttl=0.05, bus=FileBus(str(tmp_path)), leader=follower_lock)
+
+    async def scenario():
+        await leader.get("")
+        followed = await follower.get("")
+        assert follower_upstream.calls == 0
+        assert followed.generation == 1
+        assert followed.store.get("A")["yes_price"] == 0.4
+
+        leader_lock.release()  # the leader process exits
+        runner = asyncio.create_task(follower.run(interval=0.01))
+        await asyncio.sleep(0.2)
+        runner.cancel()
+        return follower.peek("")
+
+    taken_over = asyncio.run(scenario())
+    assert follower.is_leader
+    assert follower_upstream.calls >= 1
+    assert taken_over.generation >= 2
+    assert taken_over.store.get("A")["yes_price"] == 0.7
+    follower_lock.release()
@@ -0,0 +1,94 @@
+import asyncio
+
+from snapshot import SnapshotCache
+
+
+def market(ticker, price=0.5):
+    return {
+        "ticker": ticker,
+        "title": ticker,
+        "yes_price": price,
+        "no_price": round(1 - price, 2),
+        "volume": 100,
+        "spread": 0.01,
+        "close_time": "",
+        "category": "general",
+    }
+
+
+class Upstream:
+    """Fetcher returning one market per call, priced by the call count"""
+
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+        self.fail = False
+
+    async def __call__(self, key):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return [market("A", self.calls / 100)]
+
+
+def test_concurrent_misses_share_one_fetch():
+    upstream = Upstream(delay=0.01)
+    cache = SnapshotCache(upstream, ttl=60)
+
+    async def scenario():
+        return await asyncio.gather(*(cache.get("") for _ in range(10)))
+
+    entries = asyncio.run(scenario())
+    assert upstream.calls == 1
+    assert all(entry is entries[0] for entry in entries)
+    assert cache.stats["misses"] == 10
+
+
+def test_stale_entry_is_served_while_refreshing():
+    upstream = Upstream()
+    cache = SnapshotCache(upstream, ttl=60, max_stale=300)
+
+    async def scenario():
+        first = await cache.get("")
+        first.fetched_at -= 61
+        stale = await cache.get("")
+        # The refresh runs in the background; the caller got the old snapshot
+        assert stale is first
+        await cache.refresh("")
+        return first, await cache.get("")
+
+    first, fresh = asyncio.run(scenario())
+    assert upstream.calls == 2
+    assert fresh is not first
+    assert fresh.store.get("A")["yes_price"] == 0.02
+    assert fresh.delta.changed.tolist() == [0]
+    assert cache.stats["stale_hits"] == 1
+
+
+def test_failed_refresh_keeps_serving_the_old_snapshot():
+    upstream = Upstream()
+    cache = SnapshotCache(upstream, ttl=60, max_stale=0)
+
+    async def scenario():
+        first = await cache.get("")
+        first.fetched_at -= 61
+        upstream.fail = True
+        return first, await cache.get(""), await cache.get("other")
+
+    first, served, missing = asyncio.run(scenario())
+    assert served is first
+    assert missing is None
+    assert cache.stats["errors"] == 2
+
+
+def test_listener_errors_do_not_block_others():
+    cache = SnapshotCache(Upstream(), ttl=60)
+    seen = []
+
+    def broken(snapshot):
+        raise RuntimeError("listener bug")
+
+    cache.listeners.extend([broken, seen.append])
+    entry = asyncio.run(cache.get(""))
+    assert seen == [entry]
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from store import MarketStore
+
+
+def make_markets(n):
+    return [
+        {
+            "ticker": f"T{i}",
+            "title": f"Market {i}",
+            "yes_price": round(0.1 + (i % 3) * 0.2, 2),
+            "no_price": round(0.9 - (i % 3) * 0.2, 2),
+            # Heavy ties: a few distinct volumes, many zeros
+            "volume": 0 if i % 4 == 0 else (i % 5) * 100,
+            "spread": 0.02,
+            "close_time": "2030-01-01T00:00:00" if i % 2 else "",
+            "category": "general",
+        }
+        for i in range(n)
+    ]
+
+
+SORT_KEYS = {
+    "volume": lambda m: m["volume"],
+    "probability": lambda m: m["yes_price"],
+    "spread": lambda m: m["spread"],
+}
+
+
+@pytest.mark.parametrize("sort_by", sorted(SORT_KEYS))
+@pytest.mark.parametrize("sort_order", ["desc", "asc"])
+@pytest.mark.parametrize("limit", [1, 37, 150, 299, 300, None])
+def test_limited_order_matches_stable_sort_on_ties(sort_by, sort_order, limit):
+    markets = make_markets(300)
+    store = MarketStore(markets)
+    expected = sorted(markets, key=SORT_KEYS[sort_by], reverse=sort_order == "desc")[:limit]
+    got = store.query(sort_by=sort_by, sort_order=sort_order, limit=limit)
+    assert [m["ticker"] for m in got] == [m["ticker"] for m in expected]
+
+
+def test_all_tied_keeps_snapshot_order():
+    markets = make_markets(300)
+    for m in markets:
+        m["volume"] = 5
+    got = MarketStore(markets).query(sort_by="volume", limit=150)
+    assert [m["ticker"] for m in got] == [f"T{i}" for i in range(150)]
+
+
+def test_old_store_search_ignores_recycled_doc_ids():
+    old = MarketStore([
+        {**make_markets(1)[0], "ticker": "BTC", "title": "Bitcoin above 100k"},
+        {**make_markets(1)[0], "ticker": "RAIN", "title": "Rain in Seattle"},
+    ])
+    # Later snapshots drop BTC, then add ETH, which takes BTC's freed id
+    rain = old.records[1]
+    MarketStore([rain], old.index)
+    new = MarketStore([rain, {**rain, "ticker": "ETH", "title": "Ethereum above 5k"}], old.index)
+    assert new.index.doc_ids["ETH"] == 0
+
+    assert [new.records[i]["ticker"] for i in np.flatnonzero(new.relevance("ethereum"))] == ["ETH"]
+    # The old store never had ETH, and must not return BTC in its place
+    assert not old.relevance("ethereum").any()
+    assert [old.records[i]["ticker"] for i in np.flatnonzero(old.relevance("seattle"))] == ["RAIN"]
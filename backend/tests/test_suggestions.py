@@ -0,0 +1,56 @@
+import time
+
+from snapshot import MarketSnapshot
+from suggestions import SuggestionIndex
+
+
+def market(ticker, price, volume):
+    return {
+        "ticker": ticker,
+        "title": ticker,
+        "yes_price": price,
+        "no_price": round(1 - price, 2),
+        "volume": volume,
+        "spread": 0.01,
+        "close_time": "",
+        "category": "general",
+    }
+
+
+def refresh(index, markets, previous=None):
+    snapshot = MarketSnapshot("", markets, time.monotonic(), previous)
+    index.on_refresh(snapshot)
+    return snapshot
+
+
+def tickers(view):
+    return [m["ticker"] for m in view]
+
+
+def test_views_follow_refresh_deltas():
+    index = SuggestionIndex()
+    first = refresh(index, [market("A", 0.5, 9000), market("B", 0.5, 6000), market("C", 0.1, 3000)])
+    assert tickers(index.get("balanced")) == ["A", "B"]
+    assert tickers(index.get("high_potential")) == ["C"]
+
+    # A leaves the balanced range, C is delisted, D is new and busiest
+    refresh(index, [market("A", 0.9, 9000), market("B", 0.5, 6000), market("D", 0.4, 20000)], first)
+    assert tickers(index.get("balanced")) == ["D", "B"]
+    assert index.get("high_potential") == []
+
+
+def test_rules_apply_to_the_current_snapshot():
+    index = SuggestionIndex()
+    refresh(index, [market("A", 0.5, 9000), market("B", 0.2, 1500)])
+    index.add_rule({
+        "name": "cheap",
+        "min_probability": 0,
+        "max_probability": 0.3,
+        "min_volume": 1000,
+        "max_spread": 1,
+        "reason": "",
+    })
+    assert tickers(index.get("cheap")) == ["B"]
+    assert set(index.all()) == {"balanced", "high_potential", "low_risk", "best_value", "cheap"}
+    assert index.remove_rule("cheap")
+    assert index.get("cheap") is None
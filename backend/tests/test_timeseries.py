@@ -0,0 +1,69 @@
+import time
+
+import numpy as np
+import pytest
+
+from timeseries import TimeSeriesStore
+
+
+def feed(store, volumes, start=0.0, step=60.0):
+    """Record one sample per row of `volumes` (samples x tickers)"""
+    tickers = [f"T{i}" for i in range(volumes.shape[1])]
+    for i, row in enumerate(volumes):
+        store.record(tickers, np.full(len(tickers), 0.5), row, now=start + i * step)
+    return tickers
+
+
+def test_zscore_matches_a_rescan_of_the_window():
+    rng = np.random.default_rng(1)
+    volumes = np.cumsum(rng.integers(0, 50, size=(40, 3)), axis=0).astype(np.float64)
+    store = TimeSeriesStore(capacity=64, window=10, min_points=5, min_std=0.0)
+    feed(store, volumes)
+
+    velocities = np.diff(volumes, axis=0)  # contracts per one-minute sample
+    window = velocities[-11:-1]
+    expected = (velocities[-1] - window.mean(axis=0)) / window.std(axis=0)
+    assert store.zscore == pytest.approx(expected, rel=1e-4)
+
+
+def test_volume_burst_is_a_spike():
+    volumes = np.cumsum(np.full((12, 2), 10.0), axis=0)
+    volumes[-1, 1] += 500
+    store = TimeSeriesStore(window=10, min_points=5)
+    tickers = feed(store, volumes)
+
+    spikes = store.spikes(tickers)
+    assert list(spikes) == ["T1"]
+    z, velocity = spikes["T1"]
+    # Flat history: the deviation is floored at min_std
+    assert z == pytest.approx(500)
+    assert velocity == pytest.approx(510)
+
+
+def test_no_score_before_min_points():
+    store = TimeSeriesStore(window=10, min_points=5)
+    feed(store, np.cumsum(np.full((5, 1), 10.0), axis=0))
+    assert not store.warmed_up()
+    assert np.isnan(store.zscore).all()
+
+
+def test_samples_inside_the_interval_are_dropped():
+    store = TimeSeriesStore(interval=60)
+    assert store.record(["A"], np.array([0.5]), np.array([1.0]), now=0)
+    assert not store.record(["A"], np.array([0.5]), np.array([2.0]), now=30)
+    assert store.record(["A"], np.array([0.5]), np.array([3.0]), now=60)
+    assert [p["volume"] for p in store.history("A")] == [1.0, 3.0]
+
+
+def test_persisted_samples_are_replayed(tmp_path):
+    now = time.time() - 600
+    volumes = np.cumsum(np.full((6, 2), 10.0), axis=0)
+    store = TimeSeriesStore(db_path=str(tmp_path / "ts.db"))
+    store.open()
+    feed(store, volumes, start=now)
+    store.close()
+
+    replayed = TimeSeriesStore(db_path=str(tmp_path / "ts.db"))
+    replayed.open()
+    assert replayed.history("T1") == store.history("T1")
+    replayed.close()
@@ -0,0 +1,82 @@
+import asyncio
+
+import httpx
+import pytest
+
+from upstream import UpstreamClient
+
+
+def client(handler, retries=2):
+    return UpstreamClient(
+        "test",
+        "http://upstream",
+        retries=retries,
+        backoff_base=0.001,
+        backoff_max=0.001,
+        transport=httpx.MockTransport(handler),
+    )
+
+
+def scripted(*outcomes):
+    """Handler answering each call with the next status code or raising the next exception"""
+    calls = []
+
+    def handler(request):
+        outcome = outcomes[min(len(calls), len(outcomes) - 1)]
+        calls.append(request.method)
+        if isinstance(outcome, Exception):
+            raise outcome
+        status, headers = outcome if isinstance(outcome, tuple) else (outcome, {})
+        return httpx.Response(status, headers=headers, json={})
+
+    return handler, calls
+
+
+def send(upstream, method):
+    async def go():
+        try:
+            return await upstream.request(method, "/x")
+        finally:
+            await upstream.aclose()
+
+    return asyncio.run(go())
+
+
+def test_get_retries_server_errors():
+    handler, calls = scripted(503, 502, 200)
+    assert send(client(handler), "GET").status_code == 200
+    assert len(calls) == 3
+
+
+def test_get_gives_up_after_retries():
+    handler, calls = scripted(503)
+    assert send(client(handler, retries=1), "GET").status_code == 503
+    assert len(calls) == 2
+
+
+def test_post_is_not_retried_on_server_errors():
+    handler, calls = scripted(503, 200)
+    assert send(client(handler), "POST").status_code == 503
+    assert calls == ["POST"]
+
+
+def test_post_is_not_retried_on_read_timeout():
+    handler, calls = scripted(httpx.ReadTimeout("slow"), 200)
+    with pytest.raises(httpx.ReadTimeout):
+        send(client(handler), "POST")
+    assert calls == ["POST"]
+
+
+def test_post_is_retried_when_never_sent():
+    handler, calls = scripted(httpx.ConnectError("refused"), 200)
+    assert send(client(handler), "POST").status_code == 200
+    assert len(calls) == 2
+
+
+def test_post_is_retried_on_overload_with_retry_after():
+    handler, calls = scripted((529, {"retry-after": "0"}), 200)
+    assert send(client(handler), "POST").status_code == 200
+    # Without Retry-After the upstream may have processed it
+    handler, calls = scripted(429, 200)
+    assert send(client(handler), "POST").status_code == 429
+    assert calls == ["POST"]
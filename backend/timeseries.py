@@ -0,0 +1,265 @@
+"""
+Market time series
+Fixed-size ring buffers of price and volume per ticker, sampled from the
+full-market snapshot, with rolling volume-velocity z-scores updated in O(1)
+per ticker per sample.
+"""
+
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from metrics import record_error
+from snapshot import MarketSnapshot
+
+
+class TimeSeriesStore:
+    """Price/volume history for every open market.
+
+    All tickers are sampled together, at most once per `interval` seconds,
+    so the sample timestamps live in one shared ring and each ticker owns
+    a row of `capacity` float32 slots. Volume velocity (contracts per minute)
+    is compared against a rolling window of the previous `window`
+    velocities through running sums, so no history is rescanned; the
+    window's deviation is floored at `min_std` contracts per minute. Memory is
+    bounded by rows x capacity; rows of closed markets are recycled.
+
+    With `db_path`, every sample is also appended to SQLite by a writer
+    thread, off the event loop, and rows older than `retention` seconds
+    are pruned. `persist()` may veto the writes, so that only one of
+    several processes sampling the same markets appends them.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 120,
+        window: int = 30,
+        interval: float = 60.0,
+        min_points: int = 5,
+        min_std: float = 1.0,
+        db_path: str = "",
+        retention: float = 7 * 86400,
+        persist: Optional[Callable[[], bool]] = None,
+    ):
+        self.capacity = capacity
+        self.window = window
+        self.interval = interval
+        self.min_points = min_points
+        self.min_std = min_std
+        self.db_path = db_path
+        self.retention = retention
+        self.persist = persist
+        self._db: Optional[sqlite3.Connection] = None
+        # One writer thread keeps inserts ordered and off the event loop
+        self._writer: Optional[ThreadPoolExecutor] = None
+
+        self.row_of: Dict[str, int] = {}
+        self._free_rows: List[int] = []
+        self.timestamps = np.full(capacity, np.nan)
+        self.head = 0
+        self.samples = 0
+        self.vel_head = 0
+        self._allocate(0)
+
+    def _allocate(self, rows: int):
+        """Grow per-row arrays to `rows`, keeping existing data"""
+        old = getattr(self, "price", None)
+        n = 0 if old is None else old.shape[0]
+
+        def grow(arr, shape, fill, dtype):
+            new = np.full(shape, fill, dtype=dtype)
+            if arr is not None and n:
+                new[:n] = arr
+            return new
+
+        self.price = grow(old, (rows, self.capacity), np.nan, np.float32)
+        self.volume = grow(getattr(self, "volume", None), (rows, self.capacity), np.nan, np.float32)
+        self.count = grow(getattr(self, "count", None), rows, 0, np.int32)
+        self.velocities = grow(getattr(self, "velocities", None), (rows, self.window), np.nan, np.float32)
+        self.vel_count = grow(getattr(self, "vel_count", None), rows, 0, np.int32)
+        self.vel_sum = grow(getattr(self, "vel_sum", None), rows, 0, np.float64)
+        self.vel_sumsq = grow(getattr(self, "vel_sumsq", None), rows, 0, np.float64)
+        self.velocity = grow(getattr(self, "velocity", None), rows, np.nan, np.float32)
+        self.zscore = grow(getattr(self, "zscore", None), rows, np.nan, np.float32)
+
+    def _reset_rows(self, rows):
+        self.price[rows] = np.nan
+        self.volume[rows] = np.nan
+        self.count[rows] = 0
+        self.velocities[rows] = np.nan
+        self.vel_count[rows] = 0
+        self.vel_sum[rows] = 0
+        self.vel_sumsq[rows] = 0
+        self.velocity[rows] = np.nan
+        self.zscore[rows] = np.nan
+
+    def _rows_for(self, tickers: List[str]) -> np.ndarray:
+        """Row per ticker, assigning (and growing) rows for new tickers"""
+        new = [t for t in tickers if t not in self.row_of]
+        if new:
+            recycled = self._free_rows[: len(new)]
+            del self._free_rows[: len(new)]
+            fresh_start = len(self.count)
+            needed = len(new) - len(recycled)
+            if needed > 0:
+                self._allocate(max(fresh_start + needed, fresh_start * 2))
+                self._free_rows.extend(range(fresh_start + needed, len(self.count)))
+            assigned = recycled + list(range(fresh_start, fresh_start + max(needed, 0)))
+            self._reset_rows(assigned)
+            for ticker, row in zip(new, assigned):
+                self.row_of[ticker] = row
+        return np.fromiter((self.row_of[t] for t in tickers), dtype=np.int64, count=len(tickers))
+
+    def forget(self, tickers: List[str]):
+        """Release rows of markets that are no longer open"""
+        rows = [self.row_of.pop(t) for t in tickers if t in self.row_of]
+        if rows:
+            self._reset_rows(rows)
+            self._free_rows.extend(rows)
+
+    def record(self, tickers: List[str], prices: np.ndarray, volumes: np.ndarray, now: Optional[float] = None) -> bool:
+        """Append one sample for every ticker; returns False if downsampled away"""
+        now = time.time() if now is None else now
+        last = self.timestamps[(self.head - 1) % self.capacity]
+        if self.samples and now - last < self.interval:
+            return False
+
+        rows = self._rows_for(tickers)
+        prev_slot = (self.head - 1) % self.capacity
+        slot = self.head
+
+        prev_volume = self.volume[rows, prev_slot].astype(np.float64)
+        minutes = (now - last) / 60 if self.samples else np.nan
+        velocity = np.where(self.count[rows] > 0, (volumes - prev_volume) / minutes, np.nan)
+
+        # z-score of this velocity against the window before it
+        n = self.vel_count[rows]
+        safe_n = np.maximum(n, 1)
+        mean = self.vel_sum[rows] / safe_n
+        std = np.sqrt(np.maximum(self.vel_sumsq[rows] / safe_n - mean ** 2, 0))
+        # A flat history would make any change an infinite z-score
+        std = np.maximum(std, self.min_std)
+        scored = (n >= self.min_points) & ~np.isnan(velocity)
+        z = np.full(len(rows), np.nan)
+        z[scored] = (velocity[scored] - mean[scored]) / std[scored]
+
+        # Slide the velocity window: drop the value leaving it, add the new one
+        leaving = self.velocities[rows, self.vel_head].astype(np.float64)
+        had = ~np.isnan(leaving)
+        self.vel_sum[rows] -= np.where(had, leaving, 0)
+        self.vel_sumsq[rows] -= np.where(had, leaving ** 2, 0)
+        self.vel_count[rows] -= had
+        valid = ~np.isnan(velocity)
+        self.vel_sum[rows] += np.where(valid, velocity, 0)
+        self.vel_sumsq[rows] += np.where(valid, velocity ** 2, 0)
+        self.vel_count[rows] += valid
+        self.velocities[rows, self.vel_head] = velocity
+        self.vel_head = (self.vel_head + 1) % self.window
+
+        self.velocity[rows] = velocity
+        self.zscore[rows] = z
+        self.price[rows, slot] = prices
+        self.volume[rows, slot] = volumes
+        self.count[rows] = np.minimum(self.count[rows] + 1, self.capacity)
+        self.timestamps[slot] = now
+        self.head = (self.head + 1) % self.capacity
+        self.samples += 1
+
+        if self._writer is not None and (self.persist is None or self.persist()):
+            self._writer.submit(self._append, now, list(tickers), prices.tolist(), volumes.tolist())
+        return True
+
+    def on_refresh(self, snapshot: MarketSnapshot):
+        """Sample the full-market snapshot"""
+        if snapshot.key != "":
+            return
+        self.forget(snapshot.delta.removed)
+        store = snapshot.store
+        self.record(store.tickers, store.yes_price, store.volume.astype(np.float64))
+
+    def spikes(self, tickers: List[str], threshold: float = 2.0) -> Dict[str, tuple]:
+        """(z-score, velocity) for tickers whose latest velocity z-score exceeds the threshold"""
+        result = {}
+        for ticker in tickers:
+            row = self.row_of.get(ticker)
+            if row is None:
+                continue
+            z = self.zscore[row]
+            if z > threshold:
+                result[ticker] = (float(z), float(self.velocity[row]))
+        return result
+
+    def warmed_up(self) -> bool:
+        return self.samples > self.min_points
+
+    def history(self, ticker: str) -> List[dict]:
+        """Recorded samples for a ticker, oldest first"""
+        row = self.row_of.get(ticker)
+        if row is None:
+            return []
+        count = int(self.count[row])
+        slots = [(self.head - count + i) % self.capacity for i in range(count)]
+        return [
+            {
+                "timestamp": float(self.timestamps[s]),
+                "yes_price": round(float(self.price[row, s]), 4),
+                "volume": float(self.volume[row, s]),
+            }
+            for s in slots
+        ]
+
+    # SQLite persistence
+
+    def open(self):
+        """Open the SQLite file (if configured), replay recent samples and start the writer"""
+        if not self.db_path or self._db is not None:
+            return
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS samples (ts REAL, ticker TEXT, price REAL, volume REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS samples_ts ON samples (ts)")
+        self._db.execute("DELETE FROM samples WHERE ts < ?", (time.time() - self.retention,))
+        self._db.commit()
+
+        since = time.time() - self.capacity * self.interval
+        rows = self._db.execute(
+            "SELECT ts, ticker, price, volume FROM samples WHERE ts >= ? ORDER BY ts", (since,)
+        ).fetchall()
+        batch: List[tuple] = []
+        for row in rows + [(None, None, None, None)]:
+            if batch and row[0] != batch[0][0]:
+                self.record(
+                    [r[1] for r in batch],
+                    np.array([r[2] for r in batch]),
+                    np.array([r[3] for r in batch]),
+                    now=batch[0][0],
+                )
+                batch = []
+            batch.append(row)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="timeseries-writer")
+
+    def close(self):
+        if self._writer is not None:
+            # Let queued samples land before the connection goes away
+            self._writer.shutdown(wait=True)
+            self._writer = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _append(self, now: float, tickers: List[str], prices: List[float], volumes: List[float]):
+        """Runs on the writer thread"""
+        try:
+            self._db.executemany(
+                "INSERT INTO samples (ts, ticker, price, volume) VALUES (?, ?, ?, ?)",
+                zip([now] * len(tickers), tickers, prices, volumes),
+            )
+            self._db.execute("DELETE FROM samples WHERE ts < ?", (now - self.retention,))
+            self._db.commit()
+        except Exception:
+            record_error("timeseries_db", "Error writing %d history samples", len(tickers))
@@ -0,0 +1,180 @@
+"""
+Upstream HTTP clients
+One long-lived, pooled httpx client per upstream API with retries and pool metrics.
+"""
+
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from metrics import upstream_responses, upstream_seconds
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# Non-idempotent requests (LLM calls) are only retried when the upstream
+# explicitly asks to be called again later...
+UNSENT_RETRY_STATUSES = {429, 529}
+# ...or when the request never reached it
+UNSENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class UpstreamClient:
+    """Pooled async HTTP client for a single upstream host.
+
+    Requests that fail with 429/5xx or a transport error are retried with
+    full-jitter exponential backoff, honoring Retry-After when present. A 429
+    also pauses every other request to the host until the Retry-After
+    window has passed, so concurrent callers back off together.
+
+    Non-idempotent requests (POST unless `idempotent=True`) may already have
+    been processed and billed when they fail, so they are only retried on
+    connection errors or a 429/529 carrying Retry-After, never on read
+    timeouts or 5xx.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        timeout: float = 30.0,
+        connect_timeout: float = 5.0,
+        max_connections: int = 20,
+        max_keepalive: int = 10,
+        http2: bool = True,
+        retries: int = 3,
+        backoff_base: float = 0.25,
+        backoff_max: float = 8.0,
+        headers: Optional[Dict[str, str]] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.name = name
+        self.base_url = base_url
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+        )
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.headers = headers or {}
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._cooldown_until = 0.0
+
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.counters = {"requests": 0, "retries": 0, "errors": 0, "throttled": 0}
+        self.status_counts: Dict[int, int] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                headers=self.headers,
+                transport=self.transport,
+            )
+        return self._client
+
+    async def start(self):
+        """Create the underlying connection pool"""
+        self.client
+
+    async def aclose(self):
+        """Close the connection pool"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def request(self, method: str, url: str, idempotent: Optional[bool] = None, **kwargs) -> httpx.Response:
+        """Send a request, retrying per the policy for its idempotency"""
+        if idempotent is None:
+            idempotent = method.upper() in IDEMPOTENT_METHODS
+        attempt = 0
+        while True:
+            wait = self._cooldown_until - time.monotonic()
+            if wait > 0:
+                self.counters["throttled"] += 1
+                await asyncio.sleep(wait)
+
+            self.counters["requests"] += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+            start = time.perf_counter()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as exc:
+                self.counters["errors"] += 1
+                upstream_responses.inc(upstream=self.name, status="transport_error")
+                if attempt >= self.retries or not (idempotent or isinstance(exc, UNSENT_ERRORS)):
+                    raise
+                response = None
+            finally:
+                self.in_flight -= 1
+                upstream_seconds.observe(time.perf_counter() - start, upstream=self.name)
+
+            if response is not None:
+                self.status_counts[response.status_code] = self.status_counts.get(response.status_code, 0) + 1
+                upstream_responses.inc(upstream=self.name, status=response.status_code)
+                if attempt >= self.retries or not self._retryable(response, idempotent):
+                    return response
+
+            self.counters["retries"] += 1
+            delay = self._backoff(attempt, response)
+            if response is not None and response.status_code == 429:
+                self._cooldown_until = max(self._cooldown_until, time.monotonic() + delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    @staticmethod
+    def _retryable(response: httpx.Response, idempotent: bool) -> bool:
+        if idempotent:
+            return response.status_code in RETRY_STATUSES
+        return response.status_code in UNSENT_RETRY_STATUSES and "retry-after" in response.headers
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    return min(float(retry_after), self.backoff_max)
+                except ValueError:
+                    pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def stats(self) -> dict:
+        """Pool saturation and request counters.
+
+        Saturation above 1.0 means requests are queued waiting for a connection.
+        """
+        max_connections = self.limits.max_connections
+        return {
+            "name": self.name,
+            "http2": self.http2,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "max_connections": max_connections,
+            "saturation": round(self.in_flight / max_connections, 3) if max_connections else 0,
+            **self.counters,
+            "status_codes": dict(self.status_counts),
+        }
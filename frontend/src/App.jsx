@@ -164,8 +164,15 @@ function MarketsPage() {
   const [loading, setLoading] = useState(true)
   const [category, setCategory] = useState('trending')
   const [search, setSearch] = useState('')
+  const [debouncedSearch, setDebouncedSearch] = useState('')
   const [sortBy, setSortBy] = useState('volume')
 
+  // Wait for a pause in typing before querying
+  useEffect(() => {
+    const timer = setTimeout(() => setDebouncedSearch(search.trim()), 150)
+    return () => clearTimeout(timer)
+  }, [search])
+
   useEffect(() => {
     const load = async () => {
       setLoading(true)
@@ -174,7 +181,7 @@ function MarketsPage() {
           category,
           sort_by: sortBy,
           limit: '50',
-          ...(search && { search })
+          ...(debouncedSearch && { search: debouncedSearch })
         })
         const data = await fetchAPI(`/markets?${params}`)
         setMarkets(data)
@@ -184,7 +191,7 @@ function MarketsPage() {
       setLoading(false)
     }
     load()
-  }, [category, search, sortBy])
+  }, [category, debouncedSearch, sortBy])
 
   return (
     <div className="max-w-7xl mx-auto px-4 py-6">
@@ -324,7 +331,7 @@ function ArbitragePage() {
               <div className="flex justify-between items-start mb-2">
                 <h3 className="text-white font-medium">{opp.title}</h3>
                 <span className={`px-2 py-1 rounded text-xs ${
-                  opp.type === 'underpriced' ? 'bg-[#00d26a]/20 text-[#00d26a]' : 'bg-yellow-500/20 text-yellow-400'
+                  opp.type !== 'wide_spread' ? 'bg-[#00d26a]/20 text-[#00d26a]' : 'bg-yellow-500/20 text-yellow-400'
                 }`}>
                   {opp.type}
                 </span>
@@ -591,11 +598,27 @@ function PortfolioPage() {
   const [probability, setProbability] = useState(0.6)
   const [odds, setOdds] = useState(2)
   const [bankroll, setBankroll] = useState(1000)
+  const [risk, setRisk] = useState(null)
+  const [simulating, setSimulating] = useState(false)
 
   useEffect(() => {
     fetchAPI('/paper/portfolio').then(setPortfolio).catch(console.error)
   }, [])
 
+  // The Monte Carlo run is only requested when the user asks for it
+  const simulateRisk = async () => {
+    setSimulating(true)
+    try {
+      const data = await fetchAPI('/paper/portfolio?simulate=true')
+      setPortfolio(data)
+      setRisk(data.simulation)
+    } catch (e) {
+      console.error(e)
+    } finally {
+      setSimulating(false)
+    }
+  }
+
   const calculateKelly = async () => {
     try {
       const data = await fetchAPI(`/kelly?probability=${probability}&odds=${odds}&bankroll=${bankroll}`)
@@ -711,6 +734,39 @@ function PortfolioPage() {
               <div className="text-xs text-gray-500">Total Invested</div>
             </div>
           </div>
+
+          {portfolio.positions.length > 0 && (
+            <div className="mt-4">
+              <button
+                onClick={simulateRisk}
+                disabled={simulating}
+                className="w-full bg-[#0d0d0d] border border-[#2a2a2a] hover:border-purple-600 text-white py-2 rounded-lg transition-colors disabled:opacity-50"
+              >
+                {simulating ? 'Simulating...' : 'Simulate Settlement P&L'}
+              </button>
+
+              {risk && risk.paths > 0 && (
+                <div className="mt-4 p-4 bg-[#0d0d0d] rounded-lg space-y-2">
+                  <div className="flex justify-between">
+                    <span className="text-gray-400">Expected P&L</span>
+                    <span className={risk.mean >= 0 ? 'text-[#00d26a] font-mono' : 'text-[#ff4757] font-mono'}>
+                      ${risk.mean.toFixed(2)}
+                    </span>
+                  </div>
+                  <div className="flex justify-between">
+                    <span className="text-gray-400">Chance of Loss</span>
+                    <span className="text-white font-mono">{(risk.prob_loss * 100).toFixed(1)}%</span>
+                  </div>
+                  <div className="flex justify-between">
+                    <span className="text-gray-400">5th / 95th Percentile</span>
+                    <span className="text-white font-mono">
+                      ${risk.percentiles['5'].toFixed(2)} / ${risk.percentiles['95'].toFixed(2)}
+                    </span>
+                  </div>
+                </div>
+              )}
+            </div>
+          )}
         </div>
       </div>
     </div>
@@ -764,9 +820,9 @@ function AlertsPage() {
     }
   }
 
-  const deleteAlert = async (index) => {
+  const deleteAlert = async (id) => {
     try {
-      await fetchAPI(`/alerts/${index}`, { method: 'DELETE' })
+      await fetchAPI(`/alerts/${id}`, { method: 'DELETE' })
       const a = await fetchAPI('/alerts')
       setAlerts(a)
     } catch (e) {
@@ -848,16 +904,17 @@ function AlertsPage() {
             <div className="text-gray-500 text-center py-12">No alerts set</div>
           ) : (
             <div className="space-y-3">
-              {alerts.map((alert, i) => (
-                <div key={i} className="bg-[#0d0d0d] rounded-lg p-3 flex justify-between items-center">
+              {alerts.map(alert => (
+                <div key={alert.id} className="bg-[#0d0d0d] rounded-lg p-3 flex justify-between items-center">
                   <div>
                     <div className="text-sm text-white">{alert.title}</div>
                     <div className="text-xs text-gray-500">
                       {alert.condition === 'above' ? '📈' : '📉'} {alert.condition} {(alert.target_price * 100).toFixed(0)}¢
+                      {!alert.active && ' · triggered'}
                     </div>
                   </div>
                   <button
-                    onClick={() => deleteAlert(i)}
+                    onClick={() => deleteAlert(alert.id)}
                     className="text-gray-500 hover:text-[#ff4757] transition-colors"
                   >
                     ✕